@@ -0,0 +1,198 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import datetime
+import tracemalloc
+import contextlib
+from corpus_manager import CorpusManager, SUPPORTED_EXTENSIONS
+from profiling import Profiler
+from synthetic_corpus import generate_corpus
+from corpus_cli import DEFAULT_CORPUS_DIR, DEFAULT_NLTK_DATA_DIR
+
+# Замеры производительности CorpusManager.
+# Корпус (синтетический или копия файлов существующего корпуса) обрабатывается во
+# временной директории, чтобы не трогать кэш рабочего корпуса. Замеряются:
+# обработка без кэша (с разбивкой по этапам, см. profiling.py), запуск из кэша,
+# запросы (конкорданс, информация о слове, частотные таблицы) и экспорт/импорт XML.
+# Для каждого шага записываются время и пиковый объем памяти (tracemalloc;
+# память дочерних процессов пула не учитывается). Результат - JSON, который можно
+# сравнить с результатом другой версии (--compare).
+#
+# Примеры:
+#   python benchmark.py --synthetic --files 200 --tokens-per-file 5000 -o results.json
+#   python benchmark.py --corpus corpus_texts --workers 4 --compare results.json
+
+# Версия формата файла результатов
+RESULTS_VERSION = 1
+# Сколько слов (частых и редких) используется в замерах запросов
+DEFAULT_QUERY_WORDS = 50
+
+
+class StepTimer:
+    """Время и пиковая память шагов замера."""
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.results = {}
+
+    @contextlib.contextmanager
+    def step(self, name, calls=1):
+        """Замеряет шаг name; calls - сколько операций в шаге (для среднего времени операции)."""
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(sys.stderr): # Сообщения модели не смешиваются с результатом
+            yield
+        seconds = time.perf_counter() - started
+        result = {'seconds': round(seconds, 6), 'calls': calls,
+                  'ms_per_call': round(seconds / calls * 1000, 6) if calls else 0.0}
+        if self.trace_memory:
+            result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        self.results[name] = result
+        print(f"{name:<24} {seconds:>10.3f} с", file=sys.stderr)
+
+
+def prepare_corpus(args, directory):
+    """Заполняет directory файлами корпуса. Возвращает описание корпуса для результата."""
+    if args.synthetic:
+        generate_corpus(directory, args.files, args.tokens_per_file, args.vocabulary,
+                        args.zipf, args.docx_fraction, args.seed)
+        return {'type': 'synthetic', 'files': args.files, 'tokens_per_file': args.tokens_per_file,
+                'vocabulary': args.vocabulary, 'zipf': args.zipf, 'docx_fraction': args.docx_fraction,
+                'seed': args.seed}
+    names = [name for name in sorted(os.listdir(args.corpus)) if name.lower().endswith(SUPPORTED_EXTENSIONS)]
+    for name in names:
+        shutil.copy2(os.path.join(args.corpus, name), os.path.join(directory, name))
+    return {'type': 'directory', 'path': os.path.abspath(args.corpus), 'files': len(names)}
+
+
+def query_words(model, count):
+    """Слова для замеров запросов: половина - самые частые, половина - самые редкие."""
+    frequency = model.get_wordform_frequency(None)
+    words = [word for word, _ in frequency[:count // 2]]
+    remaining = count - len(words)
+    if remaining > 0: # frequency[-0:] - это весь список
+        words += [word for word, _ in frequency[-remaining:]]
+    return words
+
+
+def run(args, directory):
+    """Выполняет все шаги замера. Возвращает словарь результатов."""
+    timer = StepTimer(trace_memory=not args.no_memory)
+    profiler = Profiler(enabled=True)
+
+    with timer.step('build_cold'):
+        model = CorpusManager(directory, args.nltk_data, workers=args.workers, profiler=profiler)
+    stages = profiler.report()['stages']
+    counters = profiler.report()['counters']
+    model.store.close()
+
+    with timer.step('start_from_cache'):
+        model = CorpusManager(directory, args.nltk_data, workers=args.workers)
+
+    words = query_words(model, args.query_words)
+    with timer.step('concordance', len(words)):
+        for word in words:
+            model.get_concordance(word)
+    with timer.step('concordance_by_lemma', len(words)):
+        for word in words:
+            model.get_concordance(word, by_lemma=True)
+    with timer.step('word_info', len(words)):
+        for word in words:
+            model.get_word_info(word)
+    with timer.step('frequency', 3):
+        model.get_wordform_frequency()
+        model.get_lemma_frequency()
+        model.get_pos_frequency()
+
+    xml_path = os.path.join(directory, "benchmark_export.xml")
+    with timer.step('save_to_xml'):
+        model.save_to_xml(xml_path)
+    xml_size = os.path.getsize(xml_path) if os.path.exists(xml_path) else 0
+    with timer.step('load_from_xml'):
+        model.load_from_xml(xml_path)
+
+    summary = model.get_corpus_summary()
+    return {
+        'version': RESULTS_VERSION,
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'workers': args.workers,
+        'tracemalloc': not args.no_memory,
+        'corpus': summary,
+        'xml_bytes': xml_size,
+        'steps': timer.results,
+        'stages': stages,
+        'counters': counters,
+    }
+
+
+def compare(results, baseline):
+    """Текстовое сравнение времени шагов и этапов с результатом другой версии."""
+    lines = [f"{'шаг':<24} {'было, с':>10} {'стало, с':>10} {'отношение':>10}"]
+    for section in ('steps', 'stages'):
+        for name, current in results[section].items():
+            previous = baseline.get(section, {}).get(name)
+            if previous is None:
+                continue
+            ratio = current['seconds'] / previous['seconds'] if previous['seconds'] else float('inf')
+            lines.append(f"{name:<24} {previous['seconds']:>10.3f} {current['seconds']:>10.3f} {ratio:>10.2f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры производительности обработки корпуса и запросов.")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_DIR,
+                        help=f"Директория с файлами корпуса (по умолчанию {DEFAULT_CORPUS_DIR}); файлы копируются")
+    parser.add_argument("--synthetic", action="store_true", help="Использовать синтетический корпус")
+    parser.add_argument("--files", type=int, default=20, help="Синтетический корпус: количество файлов")
+    parser.add_argument("--tokens-per-file", type=int, default=2000, help="Синтетический корпус: слов в файле")
+    parser.add_argument("--vocabulary", type=int, default=5000, help="Синтетический корпус: размер словаря")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Синтетический корпус: показатель закона Ципфа")
+    parser.add_argument("--docx-fraction", type=float, default=0.0, help="Синтетический корпус: доля DOCX")
+    parser.add_argument("--seed", type=int, default=0, help="Синтетический корпус: начальное значение генератора")
+    parser.add_argument("--nltk-data", default=DEFAULT_NLTK_DATA_DIR, help="Директория данных NLTK")
+    parser.add_argument("--workers", type=int, default=1, help="Количество процессов для обработки файлов")
+    parser.add_argument("--query-words", type=int, default=DEFAULT_QUERY_WORDS,
+                        help="Сколько слов использовать в замерах запросов")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Не замерять память (tracemalloc замедляет обработку)")
+    parser.add_argument("--keep", action="store_true", help="Не удалять временную директорию корпуса")
+    parser.add_argument("-o", "--output", help="Файл для результатов в JSON (по умолчанию stdout)")
+    parser.add_argument("--compare", help="Файл результатов другой версии для сравнения (вывод в stderr)")
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp(prefix="corpus_benchmark_")
+    if not args.no_memory:
+        tracemalloc.start()
+    try:
+        corpus = prepare_corpus(args, directory)
+        results = run(args, directory)
+        results['corpus'].update(corpus)
+    finally:
+        if not args.no_memory:
+            tracemalloc.stop()
+        if args.keep:
+            print(f"Корпус для замеров: {directory}", file=sys.stderr)
+        else:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print(compare(results, json.load(f)), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+import os
+import sys
+import json
+import mmap
+import struct
+from array import array
+
+# Двоичный формат файла кэша корпуса.
+# Файл состоит из заголовка, метаданных в JSON и секций - массивов целых чисел
+# фиксированной ширины или байтовых блоков. Файл открывается через mmap:
+# при запуске читаются только заголовок и метаданные, а страницы секций
+# загружаются операционной системой по мере обращения к ним.
+#
+# Заголовок: MAGIC (8 байт), версия формата (uint32), длина метаданных (uint32),
+# всегда в порядке байт little-endian. Метаданные содержат порядок байт данных,
+# пользовательские данные и таблицу секций {имя: [смещение, тип, размер элемента, размер в байтах]}.
+
+MAGIC = b"NCMCACHE"
+FORMAT_VERSION = 1
+HEADER_STRUCT = struct.Struct("<8sII")
+# Выравнивание начала секций (в байтах)
+SECTION_ALIGNMENT = 8
+# Тип секции с байтовым блоком
+BYTES_TYPECODE = "B"
+
+
+class CacheFormatError(Exception):
+    """Файл кэша не подходит: чужой файл, другая версия формата или порядок байт."""
+
+
+def _padding(position):
+    """Количество байт до ближайшей выровненной позиции."""
+    return -position % SECTION_ALIGNMENT
+
+
+def write_cache(path, meta, sections):
+    """Записывает файл кэша.
+       meta: Данные, сериализуемые в JSON (читаются целиком при открытии).
+       sections: {имя: array или bytes} - данные, которые читаются через mmap по требованию.
+       Запись атомарная: сначала во временный файл, затем замена.
+    """
+    table = {}
+    position = 0
+    layout = []
+    for name, data in sections.items():
+        if isinstance(data, array):
+            typecode, itemsize = data.typecode, data.itemsize
+            nbytes = len(data) * itemsize
+        else:
+            typecode, itemsize, nbytes = BYTES_TYPECODE, 1, len(data)
+        position += _padding(position)
+        table[name] = [position, typecode, itemsize, nbytes]
+        layout.append((position, data))
+        position += nbytes
+
+    meta_bytes = json.dumps({
+        'byteorder': sys.byteorder,
+        'sections': table,
+        'meta': meta,
+    }, ensure_ascii=False).encode("utf-8")
+    data_start = HEADER_STRUCT.size + len(meta_bytes)
+    data_start += _padding(data_start)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER_STRUCT.pack(MAGIC, FORMAT_VERSION, len(meta_bytes)))
+        f.write(meta_bytes)
+        f.write(b"\0" * (data_start - f.tell()))
+        for offset, data in layout:
+            f.write(b"\0" * (data_start + offset - f.tell()))
+            if isinstance(data, array):
+                data.tofile(f)
+            else:
+                f.write(data)
+    os.replace(tmp_path, path)
+
+
+class MappedCache:
+    """Файл кэша, открытый через mmap (только чтение)."""
+    def __init__(self, path):
+        """Открывает файл и проверяет заголовок. При несовместимом файле - CacheFormatError."""
+        with open(path, 'rb') as f:
+            header = f.read(HEADER_STRUCT.size)
+            if len(header) < HEADER_STRUCT.size:
+                raise CacheFormatError("файл кэша обрезан")
+            magic, version, meta_length = HEADER_STRUCT.unpack(header)
+            if magic != MAGIC:
+                raise CacheFormatError("файл не является кэшем корпуса")
+            if version != FORMAT_VERSION:
+                raise CacheFormatError(f"версия формата {version}, ожидается {FORMAT_VERSION}")
+            header_meta = json.loads(f.read(meta_length).decode("utf-8"))
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if header_meta.get('byteorder') != sys.byteorder:
+            self.close()
+            raise CacheFormatError(f"порядок байт {header_meta.get('byteorder')}, ожидается {sys.byteorder}")
+        data_start = HEADER_STRUCT.size + meta_length
+        self._data_start = data_start + _padding(data_start)
+        self._sections = header_meta['sections']
+        self.meta = header_meta['meta']
+        self._view = memoryview(self._mmap)
+
+    def __contains__(self, name):
+        return name in self._sections
+
+    def section(self, name):
+        """Секция в виде memoryview (массив целых чисел или байты). Данные не копируются."""
+        offset, typecode, itemsize, nbytes = self._sections[name]
+        if typecode != BYTES_TYPECODE and array(typecode).itemsize != itemsize:
+            raise CacheFormatError(f"размер элемента секции '{name}' не совпадает с платформой")
+        start = self._data_start + offset
+        view = self._view[start:start + nbytes]
+        return view if typecode == BYTES_TYPECODE else view.cast(typecode)
+
+    def close(self):
+        """Закрывает отображение файла.
+           Если на данные еще есть ссылки (memoryview), файл закроется при их удалении.
+        """
+        view = getattr(self, '_view', None)
+        try:
+            if view is not None:
+                view.release()
+            self._mmap.close()
+        except BufferError:
+            pass
+
+
+def load_array(view, typecode):
+    """Копирует секцию (memoryview) в изменяемый array."""
+    result = array(typecode)
+    # frombytes принимает только байтовое представление
+    result.frombytes(view.cast(BYTES_TYPECODE))
+    return result
@@ -1,7 +1,19 @@
 import os
 import shutil # Для копирования файлов
 import json # <--- Добавлен импорт json
+import queue
+import threading
+import time
 from pos_tag_descriptions import get_pos_description # <--- Добавлен импорт
+from corpus_manager import SUPPORTED_EXTENSIONS, DEFAULT_COLLOCATE_WINDOW
+from corpus_watcher import CorpusWatcher
+
+# Интервал опроса очереди событий фоновой перезагрузки (мс)
+RELOAD_POLL_INTERVAL_MS = 100
+# Названия этапов обработки корпуса для статус-бара
+RELOAD_STAGE_NAMES = {'extract': "Извлечение текста", 'process': "Обработка"}
+# Интервал опроса директории корпуса при включенном наблюдении (мс)
+WATCH_POLL_INTERVAL_MS = 1000
 
 class Controller:
     """Контроллер (MVC), связывающий модель и представление."""
@@ -11,12 +23,21 @@ class Controller:
         self.view = view
         # Передаем ссылку на контроллер в представление, чтобы оно могло вызывать его методы
         self.view.set_controller(self)
+        self.view.set_collocate_window(DEFAULT_COLLOCATE_WINDOW)
         self._update_corpus_files_view() # Обновляем список файлов при инициализации
         # Отображаем начальную информацию о корпусе, если он загружен
         self.show_initial_info()
         # Добавляем атрибут для хранения последней информации о слове
         self._last_word_info = None
         self._last_word_query = None
+        # Состояние фоновой перезагрузки корпуса (поток, очередь событий, флаг отмены)
+        self._reload_thread = None
+        self._reload_queue = queue.Queue()
+        self._reload_cancel = threading.Event()
+        self._reload_stage = None # (этап, время начала этапа) - для оценки оставшегося времени
+        self._reload_auto = False # Текущая перезагрузка запущена наблюдателем за директорией
+        # Наблюдатель за директорией корпуса (None - наблюдение выключено)
+        self._watcher = None
 
     def _update_corpus_files_view(self):
         """Обновляет список файлов корпуса в представлении."""
@@ -27,6 +48,17 @@ class Controller:
             print(f"Ошибка при обновлении списка файлов в GUI: {e}")
             self.view.update_corpus_files_list([]) # Показываем пустой список в случае ошибки
 
+    def _is_corpus_busy(self):
+        """Проверяет, идет ли перезагрузка корпуса, и сообщает об этом пользователю.
+           Пока корпус перезагружается в фоне, запросы к модели не выполняются.
+        """
+        if self._reload_thread is None:
+            return False
+        self.view.show_info("Корпус перезагружается",
+                            "Корпус сейчас перезагружается. Дождитесь окончания или отмените перезагрузку "
+                            "(Файл -> Отменить перезагрузку).")
+        return True
+
     def show_initial_info(self):
         """Отображает начальную информацию о загруженном корпусе."""
         if not self.model.tokens:
@@ -34,13 +66,14 @@ class Controller:
             self.view.set_status("Корпус пуст или не загружен")
         else:
             processed_files = self.model.get_processed_filenames()
+            summary = self.model.get_corpus_summary()
             info = (
                 f"Корпус успешно загружен (из кэша или обработан).\n"
                 f"Обработанные файлы ({len(processed_files)}): {processed_files}\n"
-                f"Всего токенов (словоформ): {len(self.model.tokens)}\n"
-                f"Всего лемм: {len(self.model.lemmas)}\n"
-                f"Всего уникальных словоформ: {len(set(self.model.tokens))}\n"
-                f"Всего уникальных лемм: {len(set(self.model.lemmas))}"
+                f"Всего токенов (словоформ): {summary['tokens']}\n"
+                f"Всего лемм: {summary['lemmas']}\n"
+                f"Всего уникальных словоформ: {summary['unique_wordforms']}\n"
+                f"Всего уникальных лемм: {summary['unique_lemmas']}"
             )
             self.view.show_output(info, "Информация о корпусе")
             self.view.set_status("Корпус загружен")
@@ -49,6 +82,14 @@ class Controller:
         """Форматирует список частот для вывода."""
         return "\n".join([f"{item}: {count}" for item, count in freq_list])
 
+    def _format_ngrams(self, ngram_list):
+        """Форматирует список n-грамм [(кортеж слов, частота)] для вывода."""
+        return "\n".join([f"{' '.join(words)}: {count}" for words, count in ngram_list])
+
+    def _format_collocations(self, collocations):
+        """Форматирует список коллокаций [(кортеж слов, мера, частота)] для вывода."""
+        return "\n".join([f"{' '.join(words)}: {score:.3f} (частота {count})" for words, score, count in collocations])
+
     def _format_pos_frequency(self, freq_list):
         """Форматирует список частот POS-тегов с описаниями."""
         return "\n".join([f"{get_pos_description(tag)} ({tag}): {count}" for tag, count in freq_list])
@@ -65,6 +106,8 @@ class Controller:
             self._last_word_query = None
             self.view.disable_export_button()
             return
+        if self._is_corpus_busy():
+            return
         if not self.model.tokens:
             self.view.show_error("Корпус не загружен. Загрузите или добавьте файлы.")
             self._last_word_info = None
@@ -109,18 +152,36 @@ class Controller:
         if not query:
             self.view.show_error("Введите слово для построения конкорданса.")
             return
+        if self._is_corpus_busy():
+            return
         if not self.model.tokens:
             self.view.show_error("Корпус не загружен. Загрузите или добавьте файлы.")
             return
 
-        # Получаем выбранный фильтр POS
-        target_pos = self.view.get_selected_pos_filter()
+        # Получаем выбранный фильтр POS (к фразам из нескольких слов он не применяется)
+        is_phrase = len(query.split()) > 1
+        target_pos = None if is_phrase else self.view.get_selected_pos_filter()
         pos_filter_text = f" (фильтр: {get_pos_description(target_pos) or 'Любая'})" if target_pos else ""
+        # Режим поиска: по словоформе или по лемме
+        by_lemma = self.view.get_concordance_by_lemma()
+        if by_lemma:
+            pos_filter_text = f" (лемма){pos_filter_text}"
+        if is_phrase:
+            pos_filter_text = f" (фраза){pos_filter_text}"
+        # Регулярное выражение или шаблон (bak*, *berry) раскрывается в список слов словаря
+        regex = self.view.get_query_regex()
+        if regex:
+            pos_filter_text = f" (рег. выражение){pos_filter_text}"
 
         self.view.set_status(f"Построение конкорданса для '{query}'{pos_filter_text}...")
         try:
-            # Передаем target_pos в модель
-            concordance_lines = self.model.get_concordance(query, width=80, target_pos=target_pos)
+            # Передаем target_pos и режим поиска в модель
+            if regex:
+                concordance_lines = self.model.get_pattern_concordance(query, width=80, target_pos=target_pos,
+                                                                       by_lemma=by_lemma, regex=True)
+            else:
+                concordance_lines = self.model.get_concordance(query, width=80, target_pos=target_pos,
+                                                               by_lemma=by_lemma)
             # Форматируем каждую строку конкорданса, добавляя имя файла
             formatted_lines = []
             if not concordance_lines:
@@ -140,6 +201,8 @@ class Controller:
 
     def on_get_wordform_freq_click(self):
         """Обработчик нажатия кнопки 'Частота словоформ'."""
+        if self._is_corpus_busy():
+            return
         if not self.model.tokens:
             self.view.show_error("Корпус не загружен. Загрузите или добавьте файлы.")
             return
@@ -155,6 +218,8 @@ class Controller:
 
     def on_get_lemma_freq_click(self):
         """Обработчик нажатия кнопки 'Частота лемм'."""
+        if self._is_corpus_busy():
+            return
         if not self.model.tokens:
             self.view.show_error("Корпус не загружен. Загрузите или добавьте файлы.")
             return
@@ -170,6 +235,8 @@ class Controller:
 
     def on_get_pos_freq_click(self):
         """Обработчик нажатия кнопки 'Частота частей речи'."""
+        if self._is_corpus_busy():
+            return
         if not self.model.tokens:
             self.view.show_error("Корпус не загружен. Загрузите или добавьте файлы.")
             return
@@ -184,6 +251,100 @@ class Controller:
             self.view.show_error(f"Ошибка при расчете частоты частей речи: {e}")
             self.view.set_status("Ошибка")
 
+    def on_get_ngrams_click(self):
+        """Обработчик нажатия кнопки 'N-граммы': частые биграммы и триграммы и коллокации."""
+        if self._is_corpus_busy():
+            return
+        if not self.model.tokens:
+            self.view.show_error("Корпус не загружен. Загрузите или добавьте файлы.")
+            return
+        # Флажок "Искать по лемме" переключает n-граммы словоформ на n-граммы лемм
+        by_lemma = self.view.get_concordance_by_lemma()
+        unit = "лемм" if by_lemma else "словоформ"
+        self.view.set_status(f"Расчет n-грамм {unit}...")
+        try:
+            sections = [
+                ("Биграммы (Топ 30)", self._format_ngrams(self.model.get_ngram_frequency(2, 30, by_lemma))),
+                ("Триграммы (Топ 30)", self._format_ngrams(self.model.get_ngram_frequency(3, 30, by_lemma))),
+            ]
+            for measure, title in (('pmi', "PMI"), ('log_likelihood', "логарифмическое правдоподобие"),
+                                   ('t_score', "t-score")):
+                collocations = self.model.get_collocations(2, measure, 20, by_lemma)
+                sections.append((f"Коллокации: {title} (Топ 20)",
+                                 self._format_collocations(collocations) or "Нет биграмм с достаточной частотой."))
+            output = "\n\n".join(f"--- {title} ---\n{text}" for title, text in sections)
+            self.view.show_output(output, f"N-граммы {unit}")
+            self.view.set_status(f"N-граммы {unit} рассчитаны.")
+        except Exception as e:
+            self.view.show_error(f"Ошибка при расчете n-грамм: {e}")
+            self.view.set_status("Ошибка")
+
+    def on_get_collocates_click(self):
+        """Обработчик нажатия кнопки 'Коллокаты': слова в окне вокруг запроса."""
+        query = self.view.get_query()
+        if not query:
+            self.view.show_error("Введите слово для поиска коллокатов.")
+            return
+        if self._is_corpus_busy():
+            return
+        if not self.model.tokens:
+            self.view.show_error("Корпус не загружен. Загрузите или добавьте файлы.")
+            return
+        window = self.view.get_collocate_window()
+        if window is None:
+            self.view.show_error("Размер окна коллокатов должен быть положительным целым числом.")
+            return
+        target_pos = self.view.get_selected_pos_filter()
+        by_lemma = self.view.get_concordance_by_lemma()
+        self.view.set_status(f"Поиск коллокатов для '{query}' (окно ±{window})...")
+        try:
+            sections = []
+            for sort_by, title in (('count', "по частоте"), ('log_likelihood', "по логарифмическому правдоподобию"),
+                                   ('pmi', "по PMI (частота не меньше 3)")):
+                collocates = self.model.get_collocates(query, window, by_lemma, target_pos, sort_by=sort_by,
+                                                       top_n=30, min_count=3 if sort_by == 'pmi' else 1)
+                lines = [f"{word}: {count} (PMI {scores['pmi']:.2f}, LL {scores['log_likelihood']:.2f}, "
+                         f"t {scores['t_score']:.2f})" for word, count, scores in collocates]
+                sections.append(f"--- Коллокаты {title} ---\n" + ("\n".join(lines) or "Не найдено."))
+            pos_filter_desc = f" (часть речи: {get_pos_description(target_pos)})" if target_pos else ""
+            mode = "лемма" if by_lemma else "словоформа"
+            self.view.show_output("\n\n".join(sections),
+                                  f"Коллокаты для '{query}' ({mode}, окно ±{window}){pos_filter_desc}")
+            self.view.set_status(f"Коллокаты для '{query}' найдены.")
+        except Exception as e:
+            self.view.show_error(f"Ошибка при поиске коллокатов: {e}")
+            self.view.set_status("Ошибка")
+
+    def on_get_pattern_words_click(self):
+        """Обработчик нажатия кнопки 'Слова по шаблону': слова словаря, подходящие под шаблон, и их частоты."""
+        query = self.view.get_query().strip()
+        if not query:
+            self.view.show_error("Введите шаблон (например, bak* или *berry) или регулярное выражение.")
+            return
+        if self._is_corpus_busy():
+            return
+        if not self.model.tokens:
+            self.view.show_error("Корпус не загружен. Загрузите или добавьте файлы.")
+            return
+        by_lemma = self.view.get_concordance_by_lemma()
+        regex = self.view.get_query_regex()
+        unit = "Леммы" if by_lemma else "Словоформы"
+        self.view.set_status(f"Поиск слов по шаблону '{query}'...")
+        try:
+            freq = self.model.get_pattern_frequency(query, top_n=None, by_lemma=by_lemma, regex=regex)
+            total = sum(count for _, count in freq)
+            output = (f"Найдено слов: {len(freq)}, вхождений: {total}\n\n" + self._format_frequency(freq)
+                      if freq else "Совпадений не найдено.")
+            kind = "регулярному выражению" if regex else "шаблону"
+            self.view.show_output(output, f"{unit} по {kind} '{query}'")
+            self.view.set_status(f"Найдено слов по шаблону '{query}': {len(freq)}.")
+        except ValueError as e:
+            self.view.show_error(str(e))
+            self.view.set_status("Ошибка")
+        except Exception as e:
+            self.view.show_error(f"Ошибка при поиске слов по шаблону: {e}")
+            self.view.set_status("Ошибка")
+
     # --- Новые обработчики --- 
     def on_view_edit_click(self):
         """Обработчик нажатия кнопки 'Просмотр/Редакт.'."""
@@ -191,6 +352,8 @@ class Controller:
         if not selected_file:
             self.view.show_error("Файл корпуса не выбран.")
             return
+        if self._is_corpus_busy():
+            return
         
         self.view.set_status(f"Загрузка текста файла '{selected_file}' для просмотра/редактирования...")
         try:
@@ -198,6 +361,10 @@ class Controller:
             
             # Определяем callback-функцию для кнопки "Сохранить" в окне редактирования
             def save_changes(edited_text):
+                # Перезагрузка могла начаться, пока открыто окно редактирования: она перестраивает
+                # хранилище и перезаписывает кэш, поэтому текст не сохраняем (окно остается открытым)
+                if self._is_corpus_busy():
+                    return False
                 try:
                     if self.model.update_raw_text(selected_file, edited_text):
                         # Закрываем окно редактирования (это происходит автоматически в view при нажатии кнопки)
@@ -260,12 +427,7 @@ class Controller:
             return
 
         self.view.set_status(f"Экспорт информации о слове '{self._last_word_query}' в '{filename}'...")
-        data_to_export = {
-            "wordform": self._last_word_query,
-            "lemma": self._last_word_info.get('lemma'),
-            "pos_tag": self._last_word_info.get('pos')
-            # Можно добавить другую информацию при необходимости
-        }
+        data_to_export = self._word_info_record(self._last_word_query, self._last_word_info)
         try:
             with open(filename, 'w', encoding='utf-8') as f:
                 json.dump(data_to_export, f, ensure_ascii=False, indent=4)
@@ -275,6 +437,93 @@ class Controller:
             self.view.show_error(f"Ошибка при экспорте JSON в файл '{filename}': {e}")
             self.view.set_status("Ошибка экспорта JSON")
 
+    @staticmethod
+    def _word_info_record(wordform, info):
+        """Запись JSON с информацией о слове (формат экспорта 'Экспорт JSON')."""
+        return {
+            "wordform": wordform,
+            "lemma": info.get('lemma'),
+            "pos_tag": info.get('pos')
+            # Можно добавить другую информацию при необходимости
+        }
+
+    @staticmethod
+    def _format_word_info_table(records):
+        """Таблица 'словоформа - лемма - часть речи' для списка записей JSON."""
+        lines = [f"{'Словоформа':<25} {'Лемма':<25} Часть речи"]
+        for record in records:
+            pos_tag = record.get("pos_tag") or "(не указано)"
+            pos_description = pos_tag if "(предположительно)" in pos_tag else get_pos_description(pos_tag)
+            lines.append(f"{record.get('wordform', '(не указано)'):<25} {record.get('lemma') or '(не указано)':<25} "
+                         f"{pos_description} ({pos_tag})")
+        return "\n".join(lines)
+
+    def on_word_list_info(self):
+        """Обработчик выбора меню 'Информация о словах из списка...'.
+           Читает список слов (TXT - по слову на строку, или JSON - список слов или записей
+           экспорта), получает информацию обо всех словах одним запросом к модели
+           и сохраняет результат в JSON (список записей в формате 'Экспорт JSON').
+        """
+        if self._is_corpus_busy():
+            return
+        filename = self.view.ask_open_filename(title="Выберите список слов",
+                                               filetypes=(("Текстовые файлы", "*.txt"), ("JSON файлы", "*.json"),
+                                                          ("Все файлы", "*.*")))
+        if not filename:
+            self.view.set_status("Загрузка списка слов отменена.")
+            return
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                if filename.lower().endswith(".json"):
+                    items = json.load(f)
+                    if not isinstance(items, list):
+                        raise ValueError("ожидается список слов или записей с ключом 'wordform'")
+                    words = [item.get("wordform") if isinstance(item, dict) else item for item in items]
+                    # Все элементы должны быть строками (числа, null, вложенные списки - ошибка формата)
+                    bad = [i for i, word in enumerate(words) if not isinstance(word, str)]
+                    if bad:
+                        raise ValueError(f"элементы {', '.join(map(str, bad[:5]))}{', ...' if len(bad) > 5 else ''} "
+                                         "не являются словами (ожидаются строки или записи с ключом 'wordform')")
+                else:
+                    words = f.read().splitlines()
+        except Exception as e:
+            self.view.show_error(f"Не удалось прочитать список слов из '{filename}':\n{e}")
+            self.view.set_status("Ошибка чтения списка слов")
+            return
+        # Пустые строки и повторы пропускаются, порядок сохраняется
+        words = list(dict.fromkeys(word.strip() for word in words if word and word.strip()))
+        if not words:
+            self.view.show_error("Список слов пуст.")
+            return
+
+        self.view.set_status(f"Получение информации для {len(words)} слов...")
+        try:
+            infos = self.model.get_word_info_batch(words)
+        except Exception as e:
+            self.view.show_error(f"Ошибка при получении информации о словах: {e}")
+            self.view.set_status("Ошибка")
+            return
+        records = [self._word_info_record(word, infos[word]) for word in words]
+        found = sum(1 for word in words if 'source_file' in infos[word])
+        self.view.show_output(f"Слов в списке: {len(words)}, найдено в корпусе: {found}\n\n"
+                              + self._format_word_info_table(records),
+                              f"Информация о словах из {os.path.basename(filename)}")
+
+        default_filename = os.path.splitext(os.path.basename(filename))[0] + "_info.json"
+        save_filename = self.view.ask_save_filename(default_filename=default_filename,
+                                                    filetypes=(("JSON файлы", "*.json"), ("Все файлы", "*.*")))
+        if not save_filename:
+            self.view.set_status(f"Информация для {len(words)} слов получена (не сохранена).")
+            return
+        try:
+            with open(save_filename, 'w', encoding='utf-8') as f:
+                json.dump(records, f, ensure_ascii=False, indent=4)
+            self.view.set_status(f"Информация для {len(words)} слов сохранена в '{save_filename}'.")
+            self.view.show_info("Экспорт JSON успешен", f"Данные сохранены в файл:\n{save_filename}")
+        except Exception as e:
+            self.view.show_error(f"Ошибка при экспорте JSON в файл '{save_filename}': {e}")
+            self.view.set_status("Ошибка экспорта JSON")
+
     def on_import_word_json(self):
         """Обработчик выбора меню 'Импорт слова из JSON...'."""
         filename = self.view.ask_open_json_filename()
@@ -286,7 +535,19 @@ class Controller:
         try:
             with open(filename, 'r', encoding='utf-8') as f:
                 imported_data = json.load(f)
-            
+
+            if isinstance(imported_data, list):
+                # Список записей (см. 'Информация о словах из списка...')
+                records = [record for record in imported_data if isinstance(record, dict)]
+                self.view.show_output(f"Импортированная информация из: {os.path.basename(filename)}\n\n"
+                                      + self._format_word_info_table(records),
+                                      f"Импорт из {os.path.basename(filename)}")
+                self.view.set_status(f"Информация о {len(records)} словах импортирована из '{filename}'.")
+                self._last_word_info = None
+                self._last_word_query = None
+                self.view.disable_export_button()
+                return
+
             # Проверяем наличие ожидаемых ключей (можно сделать строже)
             wordform = imported_data.get("wordform", "(не указано)")
             lemma = imported_data.get("lemma", "(не указано)")
@@ -364,29 +625,161 @@ class Controller:
         self.view.set_status(status_message)
 
     def on_reload_corpus(self):
-        """Обработчик выбора меню 'Перезагрузить корпус'."""
+        """Обработчик выбора меню 'Перезагрузить корпус'.
+           Переобработка идет в фоновом потоке; прогресс передается через очередь,
+           которую опрашивает главный цикл Tkinter (_poll_reload_queue).
+        """
+        if self._reload_thread is not None:
+            self.view.set_status("Перезагрузка корпуса уже выполняется.")
+            return
         self.view.set_status("Перезагрузка корпуса...")
-        self.view.show_output("Начата перезагрузка корпуса... Это может занять некоторое время.", "Перезагрузка")
-        # Запускаем перезагрузку в модели
-        # Небольшая задержка через after, чтобы окно успело обновиться
-        self.view.root.after(100, self._reload_corpus_action)
+        self.view.show_output("Начата перезагрузка корпуса... Это может занять некоторое время.\n"
+                              "Отменить: Файл -> Отменить перезагрузку.", "Перезагрузка")
+        self._start_reload(self.model.reload_corpus)
+
+    def _start_reload(self, job, auto=False):
+        """Запускает job(progress_callback, cancel_event) модели в фоновом потоке.
+           auto: Обновление запущено наблюдателем - результат показывается только в статус-баре.
+        """
+        self._reload_cancel.clear()
+        self._reload_stage = None
+        self._reload_auto = auto
+        self.view.set_reload_in_progress(True)
+        self._reload_thread = threading.Thread(target=self._reload_corpus_worker, args=(job,), daemon=True)
+        self._reload_thread.start()
+        self.view.root.after(RELOAD_POLL_INTERVAL_MS, self._poll_reload_queue)
+
+    def on_cancel_reload(self):
+        """Обработчик выбора меню 'Отменить перезагрузку'."""
+        if self._reload_thread is None:
+            return
+        self._reload_cancel.set()
+        self.view.set_status("Отмена перезагрузки... (завершается обработка текущего файла)")
 
-    def _reload_corpus_action(self):
-        """Действие перезагрузки, выполняемое после обновления GUI."""
+    def _reload_corpus_worker(self, job):
+        """Выполняется в фоновом потоке: перезагружает корпус и отправляет события в очередь.
+           С виджетами Tkinter здесь работать нельзя - только через очередь.
+        """
         try:
-            success = self.model.reload_corpus()
-            self._update_corpus_files_view() # Обновляем список файлов после перезагрузки
-            if success:
-                self.show_initial_info() # Обновляем информацию на экране
-                self.view.set_status("Корпус успешно перезагружен.")
-                self.view.show_info("Перезагрузка корпуса", "Корпус успешно перезагружен и обработан.")
-            else:
-                self.view.show_error("Не удалось перезагрузить корпус. Проверьте консоль на наличие ошибок.")
-                self.view.set_status("Ошибка перезагрузки корпуса")
+            success = job(progress_callback=lambda progress: self._reload_queue.put(('progress', progress)),
+                          cancel_event=self._reload_cancel)
+            self._reload_queue.put(('done', success))
         except Exception as e:
-            self.view.show_error(f"Произошла ошибка во время перезагрузки корпуса: {e}")
+            self._reload_queue.put(('error', e))
+
+    def _poll_reload_queue(self):
+        """Обрабатывает события фоновой перезагрузки (вызывается через root.after)."""
+        while True:
+            try:
+                event, data = self._reload_queue.get_nowait()
+            except queue.Empty:
+                break
+            if event == 'progress':
+                self.view.set_status(self._format_reload_progress(data))
+            else:
+                self._finish_reload(event, data)
+                return
+        self.view.root.after(RELOAD_POLL_INTERVAL_MS, self._poll_reload_queue)
+
+    def _format_reload_progress(self, progress):
+        """Текст статус-бара для события прогресса: файлы, токены и оценка оставшегося времени."""
+        stage = progress['stage']
+        now = time.perf_counter()
+        if self._reload_stage is None or self._reload_stage[0] != stage:
+            self._reload_stage = (stage, now)
+        files_done, files_total = progress['files_done'], progress['files_total']
+        text = f"{RELOAD_STAGE_NAMES.get(stage, stage)}: файлов {files_done}/{files_total}"
+        if stage == 'process':
+            text += f", токенов {progress['tokens_done']}"
+        elapsed = now - self._reload_stage[1]
+        if files_done and files_total > files_done:
+            text += f", осталось ~{elapsed / files_done * (files_total - files_done):.0f} с"
+        return f"{text} ({progress['filename']})"
+
+    def _finish_reload(self, event, data):
+        """Завершение фоновой перезагрузки: обновление интерфейса и сообщения пользователю."""
+        self._reload_thread = None
+        self.view.set_reload_in_progress(False)
+        cancelled = self._reload_cancel.is_set()
+        self._update_corpus_files_view() # Обновляем список файлов после перезагрузки
+        if self._reload_auto:
+            # Автоматическое обновление не должно прерывать работу диалогами
+            if event == 'error':
+                print(f"Ошибка при обновлении корпуса: {data}")
+                self.view.set_status(f"Ошибка при обновлении корпуса: {data}")
+            elif cancelled:
+                self.view.set_status("Обновление корпуса отменено.")
+            else:
+                self.view.set_status(f"Корпус обновлен по изменениям в директории. Токенов: {len(self.model.tokens)}")
+            return
+        if self._watcher is not None:
+            # Полная перезагрузка уже учла текущее состояние директории
+            self._watcher.reset()
+        if event == 'error':
+            self.view.show_error(f"Произошла ошибка во время перезагрузки корпуса: {data}")
+            self.view.set_status("Ошибка перезагрузки корпуса")
+        elif cancelled:
+            self.view.set_status("Перезагрузка корпуса отменена. Используется прежний корпус.")
+            self.view.show_info("Перезагрузка корпуса", "Перезагрузка отменена, корпус не изменен.")
+        elif data:
+            self.show_initial_info() # Обновляем информацию на экране
+            self.view.set_status("Корпус успешно перезагружен.")
+            self.view.show_info("Перезагрузка корпуса", "Корпус успешно перезагружен и обработан.")
+        else:
+            self.view.show_error("Не удалось перезагрузить корпус. Проверьте консоль на наличие ошибок.")
             self.view.set_status("Ошибка перезагрузки корпуса")
 
+    def on_toggle_watch_corpus(self):
+        """Обработчик пункта меню 'Следить за директорией корпуса'."""
+        if self.view.get_watch_corpus():
+            if self._watcher is None:
+                self._watcher = CorpusWatcher(self.model.corpus_directory, SUPPORTED_EXTENSIONS)
+                self.view.root.after(WATCH_POLL_INTERVAL_MS, self._poll_corpus_watcher, self._watcher)
+            self.view.set_status("Наблюдение за директорией корпуса включено.")
+        else:
+            self._watcher = None # Запланированный опрос увидит это и остановится
+            self.view.set_status("Наблюдение за директорией корпуса выключено.")
+
+    def _poll_corpus_watcher(self, watcher):
+        """Периодический опрос директории корпуса (вызывается через root.after).
+           После паузы в изменениях запускает инкрементальное обновление в фоне.
+        """
+        if watcher is not self._watcher:
+            return # Наблюдение выключено (или включено заново другим наблюдателем)
+        # Во время перезагрузки изменения не забираются - их учтет следующее обновление
+        if self._reload_thread is None:
+            changed = watcher.poll()
+            if changed:
+                print(f"Изменения в директории корпуса: {', '.join(sorted(changed))}")
+                self.view.set_status(f"Обнаружены изменения в файлах корпуса ({len(changed)}). Обновление...")
+                self._start_reload(self.model.refresh_corpus, auto=True)
+        self.view.root.after(WATCH_POLL_INTERVAL_MS, self._poll_corpus_watcher, watcher)
+
+    def on_toggle_profiling(self):
+        """Обработчик пунктов меню 'Профилирование обработки' и 'Профилирование вызовов (cProfile)'.
+           Данные собираются при следующей перезагрузке или обновлении корпуса.
+        """
+        enabled, profile_calls = self.view.get_profiling_options()
+        if profile_calls and not enabled:
+            # cProfile запускается только вместе с профилированием этапов (Profiler.profiled)
+            enabled = True
+            self.view.set_profiling_options(enabled, profile_calls)
+        profiler = self.model.profiler
+        if enabled and not profiler.enabled:
+            profiler.reset()
+        profiler.enabled = enabled
+        profiler.profile_calls = profile_calls
+        if enabled:
+            mode = " (с cProfile)" if profile_calls else ""
+            self.view.set_status(f"Профилирование включено{mode}. Перезагрузите корпус, чтобы собрать данные.")
+        else:
+            self.view.set_status("Профилирование выключено.")
+
+    def on_show_profile_report(self):
+        """Обработчик пункта меню 'Отчет профилирования'."""
+        self.view.show_output(self.model.get_profile_report(), "Отчет профилирования")
+        self.view.set_status("Показан отчет профилирования.")
+
     def on_show_about(self):
         """Обработчик выбора меню 'О программе'."""
         about_text = (
@@ -412,6 +805,8 @@ class Controller:
     # --- XML Handlers ---
     def on_load_corpus_xml(self):
         """Обработчик выбора меню 'Загрузить корпус из XML...'."""
+        if self._is_corpus_busy():
+            return
         filename = self.view.ask_open_filename(
             title="Загрузить корпус из XML",
             filetypes=(("XML файлы", "*.xml"), ("Все файлы", "*.*"))
@@ -421,8 +816,14 @@ class Controller:
             return
 
         self.view.set_status(f"Загрузка корпуса из XML '{filename}'...")
+
+        def show_progress(loaded_files, fname, fraction):
+            # Показываем прогресс в статус-баре после каждого документа
+            self.view.set_status(f"Загрузка корпуса из XML: {fraction:.0%}, файлов: {loaded_files} ({fname})")
+            self.view.root.update_idletasks()
+
         try:
-            success = self.model.load_from_xml(filename)
+            success = self.model.load_from_xml(filename, progress_callback=show_progress)
             if success:
                 # Обновляем интерфейс после успешной загрузки
                 self._update_corpus_files_view()
@@ -443,6 +844,8 @@ class Controller:
 
     def on_save_corpus_xml(self):
         """Обработчик выбора меню 'Сохранить корпус как XML...'."""
+        if self._is_corpus_busy():
+            return
         if not self.model.tokens: # Проверяем, есть ли что сохранять
             self.view.show_error("Корпус пуст. Нечего сохранять в XML.")
             return
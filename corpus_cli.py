@@ -0,0 +1,291 @@
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+from corpus_manager import CorpusManager, DEFAULT_RAW_TEXT_BUDGET, DEFAULT_COLLOCATE_WINDOW
+from profiling import Profiler
+from ngrams import ASSOCIATION_MEASURES, NGRAM_SIZES, DEFAULT_MIN_COUNT
+
+# Командная строка для пакетной обработки корпуса без графического интерфейса.
+# Результаты выводятся в JSON (конкорданс - в JSON Lines, по строке на запрос)
+# в stdout или в файл --output; сообщения модели направляются в stderr,
+# чтобы не смешиваться с результатами.
+#
+# Примеры:
+#   python corpus_cli.py --corpus corpus_texts build --workers 8
+#   python corpus_cli.py freq --kind lemmas --top 50
+#   python corpus_cli.py ngrams -n 2 --measure log_likelihood --by-lemma
+#   python corpus_cli.py collocates bake --by-lemma --window 4 --pos NN --sort log_likelihood
+#   python corpus_cli.py concordance --queries words.txt --pos NN --by-lemma
+#   python corpus_cli.py concordance 'bak*' '*berry'
+#   python corpus_cli.py words 'bak(e|ed|ing)' --regex --top 0
+#   python corpus_cli.py export-xml corpus.xml --compact
+
+# Директория корпуса и данных NLTK по умолчанию (как в main.py)
+DEFAULT_CORPUS_DIR = "corpus_texts"
+DEFAULT_NLTK_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nltk_data')
+
+# Виды частотных таблиц: {аргумент --kind: метод модели}
+FREQUENCY_KINDS = {
+    'wordforms': 'get_wordform_frequency',
+    'lemmas': 'get_lemma_frequency',
+    'pos': 'get_pos_frequency',
+}
+
+
+def _open_model(args, use_cache=True):
+    """Создает модель: загрузка из кэша и обработка новых или измененных файлов
+       (use_cache=False - обработка всех файлов без кэша).
+    """
+    profiler = Profiler(enabled=args.profile or args.profile_calls, profile_calls=args.profile_calls)
+    return CorpusManager(args.corpus, args.nltk_data, workers=args.workers,
+                         raw_text_budget=args.raw_text_budget, profiler=profiler, use_cache=use_cache)
+
+
+@contextlib.contextmanager
+def _output(args):
+    """Файл для результатов: --output или stdout."""
+    if args.output in (None, "-"):
+        yield sys.stdout
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            yield f
+
+
+def _write_json(args, data):
+    """Выводит результат команды одним JSON документом."""
+    with _output(args) as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def _read_queries(path):
+    """Запросы из файла (по одному на строку, пустые строки пропускаются); '-' - stdin."""
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    return [line.strip() for line in lines if line.strip()]
+
+
+def cmd_build(args):
+    """Строит или обновляет кэш корпуса."""
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stderr):
+        # При --full кэш не читается, и каждый файл обрабатывается один раз
+        model = _open_model(args, use_cache=not args.full)
+        if args.full and not len(model.store):
+            print("Не удалось обработать корпус.")
+    summary = model.get_corpus_summary()
+    summary['seconds'] = round(time.perf_counter() - started, 3)
+    summary['lemma_cache'] = model.get_lemma_cache_stats()
+    if model.profiler.enabled:
+        summary['profile'] = model.profiler.report()
+    _write_json(args, summary)
+    return 0 if summary['tokens'] else 1
+
+
+def cmd_freq(args):
+    """Частотные таблицы словоформ, лемм или частей речи."""
+    with contextlib.redirect_stdout(sys.stderr):
+        model = _open_model(args)
+    result = {}
+    for kind in args.kind or list(FREQUENCY_KINDS):
+        frequency = getattr(model, FREQUENCY_KINDS[kind])(args.top, args.file)
+        result[kind] = [{'item': item, 'count': count} for item, count in frequency]
+    _write_json(args, result)
+    return 0
+
+
+def cmd_ngrams(args):
+    """Частые n-граммы и коллокации (n-граммы с наибольшей мерой связанности)."""
+    with contextlib.redirect_stdout(sys.stderr):
+        model = _open_model(args)
+    result = {
+        'n': args.n,
+        'by_lemma': args.by_lemma,
+        'frequency': [{'ngram': list(words), 'count': count}
+                      for words, count in model.get_ngram_frequency(args.n, args.top, args.by_lemma, args.file)],
+    }
+    for measure in args.measure or []:
+        collocations = model.get_collocations(args.n, measure, args.top, args.by_lemma, args.file, args.min_count)
+        result[measure] = [{'ngram': list(words), 'score': score, 'count': count}
+                           for words, score, count in collocations]
+    _write_json(args, result)
+    return 0
+
+
+def cmd_collocates(args):
+    """Коллокаты слов: по строке JSON на запрос."""
+    with contextlib.redirect_stdout(sys.stderr):
+        model = _open_model(args)
+    with _output(args) as f:
+        for query in args.words:
+            collocates = model.get_collocates(query, args.window, args.by_lemma, args.pos, args.file,
+                                              args.sort, args.top, args.min_count)
+            record = {
+                'query': query,
+                'window': args.window,
+                'collocates': [{'item': item, 'count': count, **scores} for item, count, scores in collocates],
+            }
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return 0
+
+
+def cmd_concordance(args):
+    """Конкорданс для списка запросов: по строке JSON на запрос.
+       Для некорректного запроса записывается {'query', 'error'}, остальные запросы выполняются,
+       код возврата - 2.
+    """
+    queries = list(args.words)
+    if args.queries:
+        queries.extend(_read_queries(args.queries))
+    if not queries:
+        print("Не заданы запросы (слова в аргументах или --queries).", file=sys.stderr)
+        return 2
+    with contextlib.redirect_stdout(sys.stderr):
+        model = _open_model(args)
+    status = 0
+    with _output(args) as f:
+        for query in queries:
+            try:
+                with contextlib.redirect_stdout(sys.stderr):
+                    if args.regex:
+                        lines = model.get_pattern_concordance(query, width=args.width, target_pos=args.pos,
+                                                              by_lemma=args.by_lemma, regex=True)
+                    else:
+                        lines = model.get_concordance(query, width=args.width, target_pos=args.pos,
+                                                      by_lemma=args.by_lemma)
+            except ValueError as e:
+                print(e, file=sys.stderr)
+                record = {'query': query, 'error': str(e)}
+                status = 2
+            else:
+                record = {
+                    'query': query,
+                    'count': len(lines),
+                    'lines': [{'left': left, 'word': word, 'right': right, 'file': filename}
+                              for left, word, right, filename in lines],
+                }
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return status
+
+
+def cmd_words(args):
+    """Слова словаря, подходящие под шаблон или регулярное выражение, с частотами.
+       Для некорректного шаблона в результат записывается {'error'}, код возврата - 2.
+    """
+    with contextlib.redirect_stdout(sys.stderr):
+        model = _open_model(args)
+    result = {}
+    status = 0
+    for pattern in args.patterns:
+        try:
+            frequency = model.get_pattern_frequency(pattern, args.top or None, args.by_lemma, args.regex, args.file)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            result[pattern] = {'error': str(e)}
+            status = 2
+            continue
+        result[pattern] = [{'item': item, 'count': count} for item, count in frequency]
+    _write_json(args, result)
+    return status
+
+
+def cmd_export_xml(args):
+    """Экспорт корпуса в XML."""
+    with contextlib.redirect_stdout(sys.stderr):
+        model = _open_model(args)
+        saved = model.save_to_xml(args.filename, indent=None if args.compact else "  ")
+    _write_json(args, {'filename': args.filename, 'saved': saved,
+                       'files': len(model.get_processed_filenames())})
+    return 0 if saved else 1
+
+
+def build_parser():
+    """Парсер аргументов командной строки."""
+    parser = argparse.ArgumentParser(description="Пакетная обработка корпуса и запросы без графического интерфейса.")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_DIR,
+                        help=f"Директория корпуса (по умолчанию {DEFAULT_CORPUS_DIR})")
+    parser.add_argument("--nltk-data", default=DEFAULT_NLTK_DATA_DIR, help="Директория данных NLTK")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Количество процессов для обработки файлов (по умолчанию - число CPU)")
+    parser.add_argument("--raw-text-budget", type=int, default=DEFAULT_RAW_TEXT_BUDGET,
+                        help="Сколько символов исходных текстов держать в памяти (остальные читаются с диска)")
+    parser.add_argument("-o", "--output", help="Файл для результатов (по умолчанию stdout)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Замерять этапы обработки (отчет - в stderr, для build - также в результате)")
+    parser.add_argument("--profile-calls", action="store_true",
+                        help="Дополнительно профилировать вызовы функций через cProfile")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Построить или обновить кэш корпуса")
+    build.add_argument("--full", action="store_true", help="Переобработать все файлы, не используя кэш")
+    build.set_defaults(func=cmd_build)
+
+    freq = subparsers.add_parser("freq", help="Частотные таблицы")
+    freq.add_argument("--kind", action="append", choices=list(FREQUENCY_KINDS),
+                      help="Вид таблицы (можно повторять; по умолчанию все)")
+    freq.add_argument("--top", type=int, default=20, help="Количество записей в таблице")
+    freq.add_argument("--file", help="Ограничить подсчет одним файлом корпуса")
+    freq.set_defaults(func=cmd_freq)
+
+    ngrams = subparsers.add_parser("ngrams", help="Частые n-граммы и коллокации")
+    ngrams.add_argument("-n", type=int, default=2, choices=NGRAM_SIZES, help="Длина n-граммы")
+    ngrams.add_argument("--measure", action="append", choices=list(ASSOCIATION_MEASURES),
+                        help="Мера связанности для коллокаций (можно повторять)")
+    ngrams.add_argument("--min-count", type=int, default=DEFAULT_MIN_COUNT,
+                        help="Минимальная частота n-граммы для коллокаций")
+    ngrams.add_argument("--top", type=int, default=20, help="Количество записей в таблице")
+    ngrams.add_argument("--by-lemma", action="store_true", help="N-граммы лемм, а не словоформ")
+    ngrams.add_argument("--file", help="Ограничить подсчет одним файлом корпуса")
+    ngrams.set_defaults(func=cmd_ngrams)
+
+    collocates = subparsers.add_parser("collocates", help="Коллокаты слов в окне ±N токенов (JSON Lines)")
+    collocates.add_argument("words", nargs="+", help="Искомые слова")
+    collocates.add_argument("--window", type=int, default=DEFAULT_COLLOCATE_WINDOW,
+                            help="Размер окна (токенов слева и справа)")
+    collocates.add_argument("--sort", default='count', choices=['count'] + list(ASSOCIATION_MEASURES),
+                            help="Сортировка: по частоте или по мере связанности")
+    collocates.add_argument("--min-count", type=int, default=1, help="Минимальная частота коллоката")
+    collocates.add_argument("--top", type=int, default=20, help="Количество коллокатов")
+    collocates.add_argument("--pos", help="Часть речи коллокатов (POS-тег или префикс, например NN)")
+    collocates.add_argument("--by-lemma", action="store_true", help="Искать и считать по леммам")
+    collocates.add_argument("--file", help="Ограничить поиск одним файлом корпуса")
+    collocates.set_defaults(func=cmd_collocates)
+
+    concordance = subparsers.add_parser("concordance", help="Конкорданс для списка запросов (JSON Lines)")
+    concordance.add_argument("words", nargs="*",
+                             help="Искомые слова или фразы в кавычках ('preheat * oven', * - любое слово)")
+    concordance.add_argument("--queries", help="Файл с запросами, по одному на строку ('-' - stdin)")
+    concordance.add_argument("--width", type=int, default=80, help="Ширина контекста в символах")
+    concordance.add_argument("--pos", help="POS-тег или его префикс (например, NN)")
+    concordance.add_argument("--by-lemma", action="store_true", help="Искать по лемме")
+    concordance.add_argument("--regex", action="store_true", help="Запросы - регулярные выражения")
+    concordance.set_defaults(func=cmd_concordance)
+
+    words = subparsers.add_parser("words", help="Слова по шаблону (bak*, *berry) или регулярному выражению")
+    words.add_argument("patterns", nargs="+", help="Шаблоны")
+    words.add_argument("--regex", action="store_true", help="Шаблоны - регулярные выражения")
+    words.add_argument("--by-lemma", action="store_true", help="Искать среди лемм")
+    words.add_argument("--top", type=int, default=20, help="Количество записей (0 - все)")
+    words.add_argument("--file", help="Частоты по одному файлу корпуса")
+    words.set_defaults(func=cmd_words)
+
+    export_xml = subparsers.add_parser("export-xml", help="Экспортировать корпус в XML")
+    export_xml.add_argument("filename", help="Путь к XML файлу")
+    export_xml.add_argument("--compact", action="store_true", help="Без отступов и переводов строк")
+    export_xml.set_defaults(func=cmd_export_xml)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,56 +1,84 @@
 import os
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
+import re
+import importlib
+import functools
+import threading
+import time
 from collections import Counter
 import string
-import pickle # Для сохранения/загрузки обработанных данных
+import json
 import datetime # Для проверки времени модификации файлов
 import xml.etree.ElementTree as ET # Added import
-from xml.dom import minidom # For pretty printing XML
-
-# Библиотеки для чтения разных форматов
-try:
-    import PyPDF2
-except ImportError:
-    PyPDF2 = None
-    print("Предупреждение: библиотека PyPDF2 не найдена. Чтение PDF будет недоступно.")
-    print("Установите ее: pip install PyPDF2")
-
-try:
-    import docx
-except ImportError:
-    docx = None
-    print("Предупреждение: библиотека python-docx не найдена. Чтение DOCX будет недоступно.")
-    print("Установите ее: pip install python-docx")
-
-try:
-    from striprtf.striprtf import rtf_to_text
-except ImportError:
-    rtf_to_text = None
-    print("Предупреждение: библиотека striprtf не найдена. Чтение RTF будет недоступно.")
-    print("Установите ее: pip install striprtf")
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor # Параллельная обработка файлов
+from text_processing import (LemmaCache, init_worker, get_wordnet_pos, process_file, align_lowered_spans,
+                             ensure_nltk_data, create_lemmatizer)
+from extraction_cache import ExtractedTextStore
+from corpus_store import CorpusStore, TokenView, intersect_postings, PATTERN_SPECIAL_CHARS
+from binary_cache import MappedCache, CacheFormatError, write_cache
+from raw_text_store import RawTextStore, DEFAULT_BUDGET as DEFAULT_RAW_TEXT_BUDGET
+from corpus_xml import write_corpus_xml, iter_corpus_xml, CorpusXMLError
+from profiling import Profiler
+from ngrams import ASSOCIATION_MEASURES, DEFAULT_MIN_COUNT
+
+# Библиотеки для чтения разных форматов импортируются при первом файле своего формата
+# (см. _import_optional): при запуске с актуальным кэшем они не нужны.
+# {формат: (модуль, пакет pip)}
+OPTIONAL_LIBRARIES = {
+    'PDF': ('PyPDF2', 'PyPDF2'),
+    'DOCX': ('docx', 'python-docx'),
+    'RTF': ('striprtf.striprtf', 'striprtf'),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _import_optional(file_format):
+    """Импортирует библиотеку чтения формата file_format. Возвращает модуль или None, если она не установлена."""
+    module_name, package_name = OPTIONAL_LIBRARIES[file_format]
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        print(f"Предупреждение: библиотека {package_name} не найдена. Чтение {file_format} будет недоступно.")
+        print(f"Установите ее: pip install {package_name}")
+        return None
 
 
 # Имя файла для сохранения кэша обработанных данных
-CACHE_FILENAME = "corpus_cache.pkl"
+CACHE_FILENAME = "corpus_cache.bin"
+# Версия формата кэша (кэш другой версии игнорируется и корпус обрабатывается заново)
+CACHE_VERSION = 12
+# Директория (внутри директории корпуса) для текста, извлеченного из PDF/DOCX/RTF
+EXTRACTED_TEXTS_DIRNAME = ".extracted_texts"
+# Директория (внутри директории корпуса) для исходных текстов документов
+RAW_TEXTS_DIRNAME = ".raw_texts"
+# Поддерживаемые форматы файлов корпуса
+SUPPORTED_EXTENSIONS = (".txt", ".pdf", ".docx", ".rtf")
+# Пропуск во фразовом запросе: на его месте может стоять любой токен
+PHRASE_WILDCARD = "*"
+# Размер окна коллокатов по умолчанию (токенов слева и справа от слова)
+DEFAULT_COLLOCATE_WINDOW = 5
 
 class CorpusManager:
     """Модель для управления корпусом текстов."""
-    def __init__(self, corpus_directory, nltk_data_dir):
+    def __init__(self, corpus_directory, nltk_data_dir, workers=1, raw_text_budget=DEFAULT_RAW_TEXT_BUDGET,
+                 profiler=None, use_cache=True):
         """Инициализирует менеджер и загружает корпус.
            Пытается загрузить обработанные данные из кэша, если это возможно.
            nltk_data_dir: Путь к директории с данными NLTK.
+           workers: Количество процессов для обработки файлов (1 - без пула процессов).
+           raw_text_budget: Сколько символов исходных текстов держать в памяти (остальные читаются с диска).
+           profiler: Profiler для замера этапов обработки (по умолчанию выключенный, см. profiling.py).
+           use_cache: Загружать результаты из кэша; False - обработать все файлы заново (кэш перезаписывается).
         """
         self.corpus_directory = corpus_directory
         self.nltk_data_dir = nltk_data_dir # Сохраняем путь
-        
-        # --- Гарантируем, что путь к данным NLTK известен библиотеке --- 
-        if self.nltk_data_dir not in nltk.data.path:
-            nltk.data.path.append(self.nltk_data_dir)
-            print(f"Добавлен путь к данным NLTK: {self.nltk_data_dir}")
-        print(f"Текущие пути NLTK: {nltk.data.path}") # Для отладки
-        # -----------------------------------------------------------
+        self.workers = max(1, int(workers or 1))
+        self.profiler = profiler if profiler is not None else Profiler()
+        # Данные NLTK проверяются (и при необходимости скачиваются) только перед первой
+        # обработкой текста, см. _ensure_nltk
+        self._nltk_ready = False
+        self._nltk_warm = False # Теггер и WordNet уже загружены (см. warm_up_nltk)
+        self._nltk_lock = threading.Lock() # Запросы могут выполняться из нескольких потоков (query_server.py)
         
         # --- Гарантируем, что путь к корпусу - это директория --- 
         try:
@@ -67,24 +95,70 @@ class CorpusManager:
             pass # Или raise SystemExit(f"Не удалось создать директорию {self.corpus_directory}")
         # ---------------------------------------------------------
         self.cache_filepath = os.path.join(self.corpus_directory, CACHE_FILENAME)
-        self.lemmatizer = WordNetLemmatizer()
-        self.raw_texts = {} # Словарь для хранения исходных текстов {filename: text}
-        self.tokens = []    # Список всех токенов (словоформ) корпуса [(token, filename)]
-        self.tagged_tokens = [] # Список всех токенов с POS-тегами [((token, tag), filename)]
-        self.lemmas = []    # Список всех лемм корпуса [(lemma, filename)]
+        # Извлеченный текст хранится отдельно от кэша обработки, по хэшу содержимого файла
+        self.extracted_texts = ExtractedTextStore(os.path.join(self.corpus_directory, EXTRACTED_TEXTS_DIRNAME))
+        # Кэш лемм {(token, wordnet_pos): lemma}, сохраняется вместе с кэшем обработки.
+        # Лемматизатор WordNet создается при первом промахе кэша.
+        self.lemma_cache = LemmaCache()
+        # Исходные тексты {filename: text}: хранятся на диске, в памяти - только недавно прочитанные
+        self.raw_texts = RawTextStore(os.path.join(self.corpus_directory, RAW_TEXTS_DIRNAME), raw_text_budget)
+        # Столбцовое хранилище токенов, тегов и лемм (см. corpus_store.py).
+        # Прежние списки кортежей доступны через свойства tokens, tagged_tokens и lemmas.
+        self.store = CorpusStore()
         self.processed_files_mtimes = {} # Время модификации обработанных файлов
+        self.processed_files_sizes = {} # Размер обработанных файлов в байтах
+        self.processed_files_hashes = {} # Хэш содержимого файлов PDF/DOCX/RTF (ключ хранилища извлеченного текста)
+
+        # Загружаем результаты из кэша и обрабатываем только новые или измененные файлы
+        self._load_and_process_corpus(self._load_from_cache() if use_cache else None)
+
+    def _ensure_nltk(self):
+        """Проверяет данные NLTK перед первым использованием теггера или лемматизатора."""
+        with self._nltk_lock:
+            if not self._nltk_ready:
+                ensure_nltk_data(self.nltk_data_dir)
+                self._nltk_ready = True
+
+    def warm_up_nltk(self):
+        """Загружает теггер и WordNet (через лемматизатор) под блокировкой, один раз.
+           Ленивые загрузчики NLTK (LazyCorpusLoader) не потокобезопасны, поэтому при
+           запросах из нескольких потоков первое обращение к ним не должно быть одновременным.
+        """
+        self._ensure_nltk()
+        with self._nltk_lock:
+            if self._nltk_warm:
+                return
+            try:
+                import nltk
+                nltk.pos_tag_sents([["warm"]])
+                if self.lemma_cache.lemmatizer is None:
+                    self.lemma_cache.lemmatizer = create_lemmatizer()
+                self.lemma_cache.lemmatizer.lemmatize("warm", pos=get_wordnet_pos('NN'))
+            except Exception as e:
+                print(f"Ошибка при загрузке теггера и лемматизатора NLTK: {e}")
+            self._nltk_warm = True
+
+    @property
+    def tokens(self):
+        """Все токены (словоформы) корпуса в виде последовательности [(token, filename)]."""
+        return TokenView(self.store, 'tokens')
 
-        # Пытаемся загрузить из кэша или загружаем и обрабатываем
-        if not self._load_from_cache():
-            self._load_and_process_corpus()
+    @property
+    def tagged_tokens(self):
+        """Все токены корпуса с POS-тегами в виде последовательности [((token, tag), filename)]."""
+        return TokenView(self.store, 'tagged_tokens')
+
+    @property
+    def lemmas(self):
+        """Все леммы корпуса в виде последовательности [(lemma, filename)]."""
+        return TokenView(self.store, 'lemmas')
 
     def _get_corpus_files(self):
         """Возвращает список поддерживаемых файлов в директории корпуса."""
-        supported_extensions = [".txt", ".pdf", ".docx", ".rtf"]
         files = []
         try:
             for filename in os.listdir(self.corpus_directory):
-                if any(filename.lower().endswith(ext) for ext in supported_extensions):
+                if filename.lower().endswith(SUPPORTED_EXTENSIONS):
                     files.append(filename)
         except FileNotFoundError:
             print(f"Ошибка: Директория корпуса '{self.corpus_directory}' не найдена при поиске файлов.")
@@ -100,237 +174,239 @@ class CorpusManager:
             print(f"Не удалось получить время модификации для {filename}: {e}")
             return 0 # Возвращаем 0, чтобы гарантировать переобработку
 
-    def _needs_reprocessing(self):
-        """Проверяет, нужно ли переобрабатывать корпус (файлы изменились или добавились/удалились)."""
-        current_files = set(self._get_corpus_files())
-        cached_files = set(self.processed_files_mtimes.keys())
-
-        if current_files != cached_files:
-            print("Обнаружены изменения в наборе файлов корпуса. Требуется переобработка.")
-            return True
+    def _get_file_signature(self, filename):
+        """Возвращает (mtime, size) файла или None, если файл недоступен.
+           По этой паре определяется, можно ли использовать результаты из кэша.
+        """
+        try:
+            stat = os.stat(os.path.join(self.corpus_directory, filename))
+            return stat.st_mtime, stat.st_size
+        except Exception as e:
+            print(f"Не удалось получить сведения о файле {filename}: {e}")
+            return None
 
+    def _split_changed_files(self, current_files, cached_files):
+        """Разделяет файлы директории на неизменные (есть в кэше с той же подписью) и новые/измененные.
+           Возвращает (unchanged, changed, signatures).
+        """
+        unchanged, changed = [], []
+        signatures = {}
         for filename in current_files:
-            current_mtime = self._get_file_mtime(filename)
-            cached_mtime = self.processed_files_mtimes.get(filename, 0)
-            if current_mtime > cached_mtime:
-                print(f"Файл '{filename}' был изменен. Требуется переобработка.")
-                return True
-
-        print("Файлы корпуса не изменились с момента последнего кэширования.")
-        return False
+            signature = self._get_file_signature(filename)
+            signatures[filename] = signature
+            entry = cached_files.get(filename)
+            if signature is not None and entry is not None and (entry.get('mtime'), entry.get('size')) == signature:
+                unchanged.append(filename)
+            else:
+                changed.append(filename)
+        return unchanged, changed, signatures
 
     def _load_from_cache(self):
-        """Пытается загрузить обработанные данные из файла кэша."""
+        """Открывает файл кэша и загружает из него результаты обработки по отдельным файлам.
+           Хранилище токенов из кэша записывается в self.store; его столбцы и индексы
+           читаются из файла через mmap по мере обращения.
+           Возвращает словарь {filename: {'mtime', 'size', 'content_hash'}}
+           (пустой, если кэш отсутствует, устарел или поврежден). Файлы, тексты которых
+           отсутствуют в хранилище текстов, в словарь не включаются и будут обработаны заново.
+        """
         if not os.path.exists(self.cache_filepath):
             print("Файл кэша не найден. Требуется полная загрузка и обработка.")
-            return False
+            return {}
+        mapped = None
         try:
             print(f"Попытка загрузки из кэша: {self.cache_filepath}")
-            with open(self.cache_filepath, 'rb') as f:
-                cached_data = pickle.load(f)
-            self.tokens = cached_data.get('tokens', [])
-            self.tagged_tokens = cached_data.get('tagged_tokens', [])
-            self.lemmas = cached_data.get('lemmas', [])
-            self.processed_files_mtimes = cached_data.get('mtimes', {})
-            self.raw_texts = cached_data.get('raw_texts', {}) # Загружаем и сырые тексты из кэша
-
-            if not self.tokens or not self.processed_files_mtimes:
-                 print("Кэш пуст или поврежден. Требуется переобработка.")
-                 return False
-
-            # Проверяем, не изменились ли файлы с момента кэширования
-            if self._needs_reprocessing():
-                # Очищаем старые данные перед переобработкой
-                self.tokens, self.tagged_tokens, self.lemmas, self.raw_texts, self.processed_files_mtimes = [], [], [], {}, {}
-                return False
-
-            print("Данные успешно загружены из кэша.")
-            print(f"Всего токенов: {len(self.tokens)}")
-            print(f"Всего лемм: {len(self.lemmas)}")
-            return True
-
-        except (pickle.UnpicklingError, EOFError, FileNotFoundError, KeyError, Exception) as e:
+            with self.profiler.stage('cache_read'):
+                mapped = MappedCache(self.cache_filepath)
+            cached_data = mapped.meta
+            if cached_data.get('version') != CACHE_VERSION:
+                print("Кэш старого формата. Требуется переобработка.")
+                mapped.close()
+                return {}
+            cached_files = {}
+            for fname, entry in cached_data.get('files', {}).items():
+                if self.raw_texts.register(fname):
+                    cached_files[fname] = entry
+            with self.profiler.stage('cache_read'):
+                lemma_table = {(token, pos): lemma
+                               for token, pos, lemma in json.loads(str(mapped.section('lemma_table'), 'utf-8'))}
+            self.store = CorpusStore.from_mapped(mapped, cached_data['store'])
+            self.lemma_cache = LemmaCache(self.lemma_cache.lemmatizer, lemma_table)
+            if not cached_files:
+                print("Кэш пуст. Требуется переобработка.")
+            return cached_files
+
+        except CacheFormatError as e:
+            print(f"Кэш несовместимого формата: {e}. Требуется переобработка.")
+            return {}
+        except Exception as e:
+            if mapped is not None:
+                mapped.close()
             print(f"Ошибка при загрузке кэша: {e}. Требуется переобработка.")
-            # Очищаем потенциально поврежденные данные
-            self.tokens, self.tagged_tokens, self.lemmas, self.raw_texts, self.processed_files_mtimes = [], [], [], {}, {}
-            return False
+            return {}
 
-    def _save_to_cache(self):
-        """Сохраняет обработанные данные в файл кэша."""
-        if not self.tokens: # Не сохраняем пустой кэш
+    def _save_to_cache(self, exclude=()):
+        """Сохраняет обработанные данные в файл кэша: хранилище токенов и запись для каждого файла.
+           exclude: Файлы, которые не нужно сохранять (будут переобработаны при следующем запуске).
+        """
+        if not self.processed_files_mtimes: # Не сохраняем пустой кэш
             print("Нет данных для сохранения в кэш.")
             return
         try:
             print(f"Сохранение данных в кэш: {self.cache_filepath}")
-            data_to_cache = {
-                'tokens': self.tokens,
-                'tagged_tokens': self.tagged_tokens,
-                'lemmas': self.lemmas,
-                'mtimes': self.processed_files_mtimes,
-                'raw_texts': self.raw_texts # Сохраняем и сырые тексты
+            # Хранилище копируется в память и отпускает старый файл кэша перед его заменой
+            store_meta, sections = self.store.to_sections()
+            files = {}
+            for fname, mtime in self.processed_files_mtimes.items():
+                if fname in exclude or fname not in self.processed_files_sizes:
+                    continue
+                # Сырые тексты хранятся отдельно (self.raw_texts)
+                files[fname] = {
+                    'mtime': mtime,
+                    'size': self.processed_files_sizes[fname],
+                    'content_hash': self.processed_files_hashes.get(fname),
+                }
+            sections['lemma_table'] = json.dumps(
+                [[token, pos, lemma] for (token, pos), lemma in self.lemma_cache.table.items()],
+                ensure_ascii=False).encode('utf-8')
+            # Документы хранилища без записи в files (например, исключенные) при загрузке удаляются
+            cache_meta = {
+                'version': CACHE_VERSION,
+                'files': files,
+                'store': store_meta,
             }
-            with open(self.cache_filepath, 'wb') as f:
-                pickle.dump(data_to_cache, f)
+            with self.profiler.stage('cache_write'):
+                write_cache(self.cache_filepath, cache_meta, sections)
+            self.profiler.count(cache_bytes_written=os.path.getsize(self.cache_filepath))
             print("Данные успешно сохранены в кэш.")
         except Exception as e:
             print(f"Ошибка при сохранении кэша: {e}")
 
-    def save_to_xml(self, filename):
-        """Сохраняет данные корпуса (сырые тексты, токены, леммы, теги) в XML файл."""
+    def save_to_xml(self, filename, indent="  "):
+        """Сохраняет данные корпуса (сырые тексты, токены, леммы, теги) в XML файл.
+           Файл записывается потоково, по одному документу (см. corpus_xml.py).
+           indent: Отступ одного уровня вложенности; None - без форматирования.
+        """
         print(f"Начало сохранения корпуса в XML: {filename}")
         if not self.raw_texts:
             print("Нет данных для сохранения в XML.")
             return False
 
-        root = ET.Element("corpus")
-        files_element = ET.SubElement(root, "files")
-
-        # Группируем токены, теги и леммы по файлам для удобства
-        tokens_by_file = {}
-        tagged_tokens_by_file = {}
-        lemmas_by_file = {}
-
-        for token, fname in self.tokens:
-            tokens_by_file.setdefault(fname, []).append(token)
-        for (token, tag), fname in self.tagged_tokens:
-             tagged_tokens_by_file.setdefault(fname, []).append((token, tag))
-        for lemma, fname in self.lemmas:
-            lemmas_by_file.setdefault(fname, []).append(lemma)
-
-        # Обрабатываем каждый файл, для которого есть сырой текст
-        for fname, raw_text in self.raw_texts.items():
-            mtime = self.processed_files_mtimes.get(fname, 0) # Получаем время модификации
-            file_element = ET.SubElement(files_element, "file", name=fname, mtime=str(mtime))
-
-            # Добавляем сырой текст
-            raw_text_element = ET.SubElement(file_element, "raw_text")
-            raw_text_element.text = raw_text
-
-            # Добавляем токены
-            if fname in tokens_by_file:
-                tokens_element = ET.SubElement(file_element, "tokens")
-                for token in tokens_by_file[fname]:
-                    ET.SubElement(tokens_element, "token").text = token
-
-            # Добавляем тегированные токены
-            if fname in tagged_tokens_by_file:
-                tagged_tokens_element = ET.SubElement(file_element, "tagged_tokens")
-                for token, tag in tagged_tokens_by_file[fname]:
-                    ET.SubElement(tagged_tokens_element, "tagged_token", token=token, tag=tag)
-
-            # Добавляем леммы
-            if fname in lemmas_by_file:
-                lemmas_element = ET.SubElement(file_element, "lemmas")
-                for lemma in lemmas_by_file[fname]:
-                    ET.SubElement(lemmas_element, "lemma").text = lemma
-
-        # Преобразуем ElementTree в строку и форматируем для читаемости
+        def documents():
+            # Обрабатываем каждый файл, для которого есть сырой текст
+            for fname in self.raw_texts:
+                mtime = self.processed_files_mtimes.get(fname, 0) # Получаем время модификации
+                raw_text = self.raw_texts.get(fname, "")
+                # Файл без токенов записывается только с сырым текстом
+                data = self.store.get_document_data(fname) if self.store.document_range(fname) is not None else None
+                yield fname, mtime, raw_text, data
+
+        # Пишем во временный файл, чтобы при ошибке не оставить обрезанный XML
+        tmp_filename = filename + ".tmp"
         try:
-            rough_string = ET.tostring(root, 'utf-8')
-            reparsed = minidom.parseString(rough_string)
-            pretty_xml_as_string = reparsed.toprettyxml(indent="  ")
-
-            with open(filename, "w", encoding='utf-8') as f:
-                f.write(pretty_xml_as_string)
+            with open(tmp_filename, "w", encoding='utf-8', newline='') as f, self.profiler.stage('xml_export'):
+                write_corpus_xml(f, documents(), indent)
+            os.replace(tmp_filename, filename)
             print(f"Корпус успешно сохранен в XML: {filename}")
             return True
         except Exception as e:
             print(f"Ошибка при записи XML файла {filename}: {e}")
+            try:
+                os.remove(tmp_filename)
+            except OSError:
+                pass
             return False
 
-    def load_from_xml(self, filename):
-        """Загружает данные корпуса (сырые тексты, токены, леммы, теги) из XML файла."""
+    def load_from_xml(self, filename, progress_callback=None):
+        """Загружает данные корпуса (сырые тексты, токены, леммы, теги) из XML файла.
+           Файл читается потоково (iterparse), документы добавляются в хранилища по мере чтения.
+           progress_callback: Функция (loaded_files, filename, fraction), вызываемая после
+           каждого документа; fraction - доля прочитанного XML файла.
+        """
         print(f"Начало загрузки корпуса из XML: {filename}")
+        loaded_files = 0
         try:
-            tree = ET.parse(filename)
-            root = tree.getroot()
-
-            if root.tag != "corpus":
-                print(f"Ошибка: Корневой элемент не 'corpus' в файле {filename}")
-                return False
-
-            files_element = root.find("files")
-            if files_element is None:
-                print(f"Ошибка: Не найден элемент 'files' в файле {filename}")
-                return False
-
-            # Очищаем текущие данные перед загрузкой
-            self.raw_texts = {}
-            self.tokens = []
-            self.tagged_tokens = []
-            self.lemmas = []
-            self.processed_files_mtimes = {}
-            # Очищаем кэш-файл, т.к. загружаем данные из другого источника
-            if os.path.exists(self.cache_filepath):
-                try:
-                    os.remove(self.cache_filepath)
-                    print(f"Удален старый файл кэша: {self.cache_filepath}")
-                except OSError as e:
-                    print(f"Не удалось удалить старый файл кэша {self.cache_filepath}: {e}")
-
-            # Загружаем данные для каждого файла
-            for file_element in files_element.findall("file"):
-                fname = file_element.get("name")
-                mtime_str = file_element.get("mtime")
-                if not fname:
-                    print("Предупреждение: пропущен элемент 'file' без атрибута 'name'.")
-                    continue
-
-                # Загружаем время модификации
-                try:
-                    mtime = float(mtime_str) if mtime_str else 0.0
-                except ValueError:
-                    print(f"Предупреждение: Некорректное значение mtime ('{mtime_str}') для файла {fname}. Установлено в 0.")
-                    mtime = 0.0
-                self.processed_files_mtimes[fname] = mtime
-
-                # Загружаем сырой текст
-                raw_text_element = file_element.find("raw_text")
-                raw_text = raw_text_element.text if raw_text_element is not None and raw_text_element.text else ""
-                self.raw_texts[fname] = raw_text
-
-                # Загружаем токены
-                tokens_element = file_element.find("tokens")
-                if tokens_element is not None:
-                    for token_element in tokens_element.findall("token"):
-                        if token_element.text:
-                            self.tokens.append((token_element.text, fname))
-
-                # Загружаем тегированные токены
-                tagged_tokens_element = file_element.find("tagged_tokens")
-                if tagged_tokens_element is not None:
-                    for tagged_token_element in tagged_tokens_element.findall("tagged_token"):
-                        token = tagged_token_element.get("token")
-                        tag = tagged_token_element.get("tag")
-                        if token and tag:
-                            self.tagged_tokens.append(((token, tag), fname))
-
-                # Загружаем леммы
-                lemmas_element = file_element.find("lemmas")
-                if lemmas_element is not None:
-                    for lemma_element in lemmas_element.findall("lemma"):
-                        if lemma_element.text:
-                            self.lemmas.append((lemma_element.text, fname))
+            total_size = os.path.getsize(filename)
+            with open(filename, 'rb') as f, self.profiler.stage('xml_import'):
+                for record in iter_corpus_xml(f):
+                    if not loaded_files:
+                        # Очищаем текущие данные перед загрузкой первого документа
+                        self._clear_corpus()
+                    fname = record['name']
+                    if not fname:
+                        print("Предупреждение: пропущен элемент 'file' без атрибута 'name'.")
+                        continue
+
+                    # Загружаем время модификации
+                    mtime_str = record['mtime']
+                    try:
+                        mtime = float(mtime_str) if mtime_str else 0.0
+                    except ValueError:
+                        print(f"Предупреждение: Некорректное значение mtime ('{mtime_str}') для файла {fname}. Установлено в 0.")
+                        mtime = 0.0
+                    self.processed_files_mtimes[fname] = mtime
+
+                    # Сырой текст сразу записывается в хранилище текстов
+                    self.raw_texts[fname] = record['raw_text']
+                    self._add_xml_document(fname, record['raw_text'], record['tokens'], record['tags'], record['lemmas'])
+
+                    loaded_files += 1
+                    print(f"  - Загружен файл {loaded_files}: {fname}")
+                    if progress_callback:
+                        progress_callback(loaded_files, fname, f.tell() / total_size if total_size else 1.0)
+            if not loaded_files:
+                self._clear_corpus()
 
             print(f"Корпус успешно загружен из XML: {filename}")
             print(f"Загружено файлов: {len(self.raw_texts)}")
-            print(f"Всего токенов: {len(self.tokens)}")
-            print(f"Всего лемм: {len(self.lemmas)}")
+            print(f"Всего токенов: {len(self.store)}")
             return True # Возвращаем True в случае успеха
 
+        except CorpusXMLError as e:
+            print(f"Ошибка: {e} в файле {filename}")
         except ET.ParseError as e:
             print(f"Ошибка парсинга XML файла {filename}: {e}")
-            return False
         except FileNotFoundError:
             print(f"Ошибка: XML файл не найден {filename}")
-            return False
         except Exception as e:
             print(f"Непредвиденная ошибка при загрузке XML файла {filename}: {e}")
-            return False
+        if loaded_files:
+            print(f"Корпус загружен частично: {loaded_files} файлов.")
+        return False
+
+    def _clear_corpus(self):
+        """Очищает корпус перед загрузкой из другого источника и удаляет файл кэша."""
+        self.raw_texts.clear()
+        self.store.close()
+        self.store = CorpusStore()
+        self.processed_files_mtimes = {}
+        self.processed_files_sizes = {}
+        self.processed_files_hashes = {}
+        # Очищаем кэш-файл, т.к. загружаем данные из другого источника
+        if os.path.exists(self.cache_filepath):
+            try:
+                os.remove(self.cache_filepath)
+                print(f"Удален старый файл кэша: {self.cache_filepath}")
+            except OSError as e:
+                print(f"Не удалось удалить старый файл кэша {self.cache_filepath}: {e}")
+
+    def _add_xml_document(self, fname, raw_text, file_tokens, file_tags, file_lemmas):
+        """Добавляет в хранилище документ, загруженный из XML.
+           Столбцы хранилища должны быть одной длины, поэтому при расхождении
+           количества токенов, тегов и лемм лишние элементы отбрасываются.
+           Позиции токенов в XML не хранятся и восстанавливаются поиском по тексту.
+        """
+        count = min(len(file_tokens), len(file_tags), len(file_lemmas))
+        if count != max(len(file_tokens), len(file_tags), len(file_lemmas)):
+            print(f"Предупреждение: Разное количество токенов, тегов и лемм для файла {fname}. "
+                  f"Используются первые {count}.")
+        if count:
+            file_spans = align_lowered_spans(raw_text, file_tokens[:count])
+            self.store.add_document(fname, file_tokens[:count], file_tags[:count], file_lemmas[:count], file_spans)
 
     # --- Функции для извлечения текста из разных форматов ---
     def _extract_text_pdf(self, filepath):
         """Извлекает текст из PDF файла."""
+        PyPDF2 = _import_optional('PDF')
         if not PyPDF2:
             print(f"Чтение PDF не поддерживается (PyPDF2 не найден). Файл пропущен: {os.path.basename(filepath)}")
             return ""
@@ -349,6 +425,7 @@ class CorpusManager:
 
     def _extract_text_docx(self, filepath):
         """Извлекает текст из DOCX файла."""
+        docx = _import_optional('DOCX')
         if not docx:
             print(f"Чтение DOCX не поддерживается (python-docx не найден). Файл пропущен: {os.path.basename(filepath)}")
             return ""
@@ -364,7 +441,8 @@ class CorpusManager:
 
     def _extract_text_rtf(self, filepath):
         """Извлекает текст из RTF файла."""
-        if not rtf_to_text:
+        striprtf = _import_optional('RTF')
+        if not striprtf:
             print(f"Чтение RTF не поддерживается (striprtf не найден). Файл пропущен: {os.path.basename(filepath)}")
             return ""
         try:
@@ -372,7 +450,7 @@ class CorpusManager:
                 rtf_content = f.read()
             # striprtf может выбрасывать исключения на некорректных RTF
             try:
-                return rtf_to_text(rtf_content)
+                return striprtf.rtf_to_text(rtf_content)
             except Exception as striprtf_error:
                  print(f"Ошибка striprtf при обработке файла {os.path.basename(filepath)}: {striprtf_error}. Попытка игнорировать.")
                  # Можно попытаться вернуть исходный контент, хотя он будет с разметкой
@@ -381,40 +459,75 @@ class CorpusManager:
         except Exception as e:
             print(f"Ошибка при чтении RTF файла {os.path.basename(filepath)}: {e}")
             return ""
-    # -----------------------------------------------------------
 
-    def _load_corpus(self):
-        """Загружает текстовые файлы из указанной директории, поддерживая разные форматы."""
-        print(f"Загрузка корпуса из: {os.path.abspath(self.corpus_directory)}")
-        self.raw_texts = {}
-        self.processed_files_mtimes = {}
-        corpus_files = self._get_corpus_files()
+    def _extract_text_cached(self, filepath, extract, extracted_by_hash):
+        """Извлекает текст через хранилище извлеченного текста.
+           Текст берется из хранилища (или из extracted_by_hash для одинаковых файлов
+           в текущей загрузке) и извлекается заново, только если содержимое файла новое.
+           Возвращает (text, content_hash).
+        """
+        try:
+            content_hash = self.extracted_texts.hash_file(filepath)
+        except Exception as e:
+            print(f"Не удалось вычислить хэш файла {os.path.basename(filepath)}: {e}")
+            return extract(filepath), None
+
+        if content_hash in extracted_by_hash:
+            print(f"  - Файл {os.path.basename(filepath)} совпадает с уже извлеченным, повторное извлечение не требуется.")
+            return extracted_by_hash[content_hash], content_hash
+        text = self.extracted_texts.get(content_hash)
+        if text is None:
+            text = extract(filepath)
+            if text: # Неудачное извлечение не сохраняем, чтобы повторить его в следующий раз
+                self.extracted_texts.put(content_hash, text)
+        else:
+            print(f"  - Текст {os.path.basename(filepath)} взят из хранилища извлеченного текста.")
+        extracted_by_hash[content_hash] = text
+        return text, content_hash
+    # -----------------------------------------------------------
 
+    def _load_corpus(self, corpus_files, progress_callback=None, cancel_event=None):
+        """Загружает указанные файлы из директории корпуса, поддерживая разные форматы.
+           Возвращает (texts, hashes): словарь {filename: text} для файлов, из которых удалось
+           извлечь текст, и словарь {filename: content_hash} для файлов PDF/DOCX/RTF.
+           progress_callback, cancel_event: см. _load_and_process_corpus.
+        """
+        texts = {}
+        hashes = {}
         if not corpus_files:
-            print(f"Предупреждение: Поддерживаемые файлы (.txt, .pdf, .docx, .rtf) в директории '{self.corpus_directory}' не найдены.")
-            return
-
-        for filename in corpus_files:
+            return texts, hashes
+        extractors = {
+            ".pdf": self._extract_text_pdf,
+            ".docx": self._extract_text_docx,
+            ".rtf": self._extract_text_rtf,
+        }
+        extracted_by_hash = {} # Одинаковые по содержимому файлы извлекаются один раз
+        print(f"Загрузка файлов корпуса из: {os.path.abspath(self.corpus_directory)}")
+
+        for files_done, filename in enumerate(corpus_files):
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            self._report_progress(progress_callback, 'extract', files_done, len(corpus_files), 0, filename)
             filepath = os.path.join(self.corpus_directory, filename)
             text = ""
             try:
                 file_ext = os.path.splitext(filename)[1].lower()
-                if file_ext == ".txt":
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        text = f.read()
-                elif file_ext == ".pdf":
-                    text = self._extract_text_pdf(filepath)
-                elif file_ext == ".docx":
-                    text = self._extract_text_docx(filepath)
-                elif file_ext == ".rtf":
-                    text = self._extract_text_rtf(filepath)
-                else:
-                    print(f"Неподдерживаемый формат файла: {filename}")
-                    continue # Пропускаем файл
+                with self.profiler.stage('extract', filename):
+                    if file_ext == ".txt":
+                        with open(filepath, 'r', encoding='utf-8') as f:
+                            text = f.read()
+                    elif file_ext in extractors:
+                        text, content_hash = self._extract_text_cached(filepath, extractors[file_ext], extracted_by_hash)
+                        if content_hash:
+                            hashes[filename] = content_hash
+                    else:
+                        print(f"Неподдерживаемый формат файла: {filename}")
+                        continue # Пропускаем файл
+                if self.profiler.enabled:
+                    self.profiler.count(filename, bytes_read=os.path.getsize(filepath), chars_extracted=len(text))
 
                 if text: # Добавляем только если удалось извлечь текст
-                    self.raw_texts[filename] = text
-                    self.processed_files_mtimes[filename] = self._get_file_mtime(filename)
+                    texts[filename] = text
                     print(f"  - Обработан файл: {filename}")
                 else:
                      print(f"  - Не удалось извлечь текст из файла: {filename}")
@@ -422,156 +535,385 @@ class CorpusManager:
             except Exception as e:
                 print(f"Общая ошибка при обработке файла {filename}: {e}")
 
-        if not self.raw_texts:
+        if not texts:
             print("Не удалось загрузить текст ни из одного файла.")
+        return texts, hashes
 
     def _get_wordnet_pos(self, treebank_tag):
         """Конвертирует тег Penn Treebank в формат WordNet.
            Необходимо для корректной лемматизации.
         """
-        if treebank_tag.startswith('J'):
-            return nltk.corpus.wordnet.ADJ
-        elif treebank_tag.startswith('V'):
-            return nltk.corpus.wordnet.VERB
-        elif treebank_tag.startswith('N'):
-            return nltk.corpus.wordnet.NOUN
-        elif treebank_tag.startswith('R'):
-            return nltk.corpus.wordnet.ADV
-        else:
-            # По умолчанию считаем существительным
-            return nltk.corpus.wordnet.NOUN
+        return get_wordnet_pos(treebank_tag)
 
-    def _process_corpus(self):
-        """Обрабатывает загруженные тексты: токенизация, POS-теггинг, лемматизация."""
+    def _process_files_parallel(self, items):
+        """Обрабатывает файлы в пуле процессов (генератор результатов process_file).
+           Результаты выдаются в порядке items, поэтому итог совпадает с последовательной обработкой.
+        """
+        filenames = [filename for filename, text in items]
+        texts = [text for filename, text in items]
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(items)),
+                                 initializer=init_worker,
+                                 initargs=(self.nltk_data_dir, self.lemma_cache.table)) as executor:
+            try:
+                # map сохраняет порядок входных данных независимо от порядка завершения задач
+                yield from executor.map(process_file, filenames, texts, repeat(None), repeat(self.profiler.enabled))
+            finally:
+                # Если обработку прервали (отмена), еще не начатые задачи не выполняются
+                executor.shutdown(cancel_futures=True)
+
+    def _iter_processed_files(self, items):
+        """Результаты process_file для items по мере готовности: в пуле процессов или последовательно."""
+        done = 0
+        if self.workers > 1 and len(items) > 1:
+            try:
+                print(f"Параллельная обработка: {min(self.workers, len(items))} процессов.")
+                for result in self._process_files_parallel(items):
+                    done += 1
+                    yield result
+                return
+            except Exception as e:
+                # Например, если платформа не позволяет запустить дочерние процессы
+                print(f"Ошибка пула процессов: {e}. Переход к последовательной обработке.")
+        for filename, text in items[done:]:
+            yield process_file(filename, text, self.lemma_cache, self.profiler.enabled)
+
+    @staticmethod
+    def _report_progress(progress_callback, stage, files_done, files_total, tokens_done, filename):
+        """Передает событие прогресса обработки корпуса, если задан progress_callback."""
+        if progress_callback is not None:
+            progress_callback({
+                'stage': stage, # 'extract' - извлечение текста, 'process' - обработка NLP
+                'files_done': files_done,
+                'files_total': files_total,
+                'tokens_done': tokens_done,
+                'filename': filename,
+            })
+
+    def _process_corpus(self, texts, progress_callback=None, cancel_event=None):
+        """Обрабатывает тексты: токенизация, POS-теггинг, лемматизация.
+           texts: Словарь {filename: text}.
+           Возвращает словарь {filename: (tokens, tagged, lemmas, spans) или None} в порядке texts.
+           Файлы, при обработке которых произошла ошибка, в результат не попадают.
+           progress_callback, cancel_event: см. _load_and_process_corpus.
+        """
+        if not texts:
+            return {}
+        self._ensure_nltk()
         print("Обработка корпуса...")
-        # Списки очищаются в _load_and_process_corpus или reload_corpus перед вызовом
         
-        total_raw_text_len = sum(len(text) for text in self.raw_texts.values())
+        total_raw_text_len = sum(len(text) for text in texts.values())
         print(f"Общий объем сырого текста: {total_raw_text_len} символов")
         
-        processed_tokens_count = 0
-        for filename, text in self.raw_texts.items():
+        items = []
+        for filename, text in texts.items():
             if not text or not isinstance(text, str):
                 print(f"Предупреждение: Пустой или некорректный текст для файла {filename}. Пропуск.")
                 continue
-            try:
-                # 1. Токенизация (разбиение на слова и пунктуацию)
-                file_tokens = word_tokenize(text.lower()) # Приводим к нижнему регистру сразу
-                
-                # 2. Фильтрация (удаление пунктуации и слишком коротких токенов)
-                # Оставляем только слова (алфавитные символы)
-                file_tokens_filtered = [token for token in file_tokens if token.isalpha()]
-                
-                if not file_tokens_filtered:
-                    continue # Пропускаем файлы без значимых токенов
-                
-                # 3. POS-теггинг (определение частей речи)
-                # Используем теггер по умолчанию (английский)
-                file_tagged = nltk.pos_tag(file_tokens_filtered) 
-                
-                # 4. Лемматизация (приведение к начальной форме)
-                file_lemmas = []
-                for token, tag in file_tagged:
-                    lemma = self.lemmatizer.lemmatize(token, pos=self._get_wordnet_pos(tag))
-                    file_lemmas.append(lemma)
-                
-                # Добавляем результаты в общие списки с указанием источника
-                self.tokens.extend([(token, filename) for token in file_tokens_filtered])
-                self.tagged_tokens.extend([((token, tag), filename) for token, tag in file_tagged])
-                self.lemmas.extend([(lemma, filename) for lemma in file_lemmas])
-                
-                processed_tokens_count += len(file_tokens_filtered)
-            except Exception as e:
-                print(f"Ошибка при обработке файла {filename}: {e}")
+            items.append((filename, text))
+
+        processed = {}
+        processed_tokens_count = 0
+        started = time.perf_counter()
+        results = self._iter_processed_files(items)
+        for files_done, (filename, result, error, lemma_delta, timings) in enumerate(results, 1):
+            if lemma_delta is not None:
+                self.lemma_cache.merge(*lemma_delta) # Новые записи кэша лемм из дочернего процесса
+            if timings:
+                for stage, seconds in timings.items():
+                    self.profiler.record(stage, seconds, filename)
+            if error is not None:
+                print(f"Ошибка при обработке файла {filename}: {error}")
+            else:
+                processed[filename] = result # None - файл без значимых токенов
+                if result is not None:
+                    processed_tokens_count += len(result[0])
+                    self.profiler.count(filename, tokens=len(result[0]))
+            self._report_progress(progress_callback, 'process', files_done, len(items),
+                                  processed_tokens_count, filename)
+            if cancel_event is not None and cancel_event.is_set():
+                results.close() # Останавливаем пул процессов
+                print("Обработка файлов прервана.")
+                break
         
-        print("Корпус успешно обработан.")
-        print(f"Всего токенов: {len(self.tokens)}")
-        print(f"Всего лемм: {len(self.lemmas)}")
-
-    def _load_and_process_corpus(self):
-        """Объединяет загрузку и обработку корпуса."""
-        self._load_corpus()
-        self._process_corpus()
-        self._save_to_cache() # Сохраняем результат в кэш
-
-    def reload_corpus(self):
-        """Перезагружает и переобрабатывает корпус."""
+        # Время обработки всех файлов (для пула процессов - по часам основного процесса)
+        self.profiler.record('process', time.perf_counter() - started)
+        print(f"Обработано файлов: {len(processed)}, токенов: {processed_tokens_count}")
+        stats = self.lemma_cache.get_stats()
+        print(f"Кэш лемм: записей {stats['entries']}, попаданий {stats['hits']}, промахов {stats['misses']}")
+        return processed
+
+    def _load_and_process_corpus(self, cached_files=None, progress_callback=None, cancel_event=None):
+        """Объединяет загрузку и обработку корпуса (см. _update_corpus).
+           При включенном профилировании замеряется целиком, а в журнал выводится отчет.
+        """
+        with self.profiler.profiled('load_and_process'):
+            result = self._update_corpus(cached_files, progress_callback, cancel_event)
+        if self.profiler.enabled:
+            print(self.profiler.format_report())
+        return result
+
+    def _update_corpus(self, cached_files=None, progress_callback=None, cancel_event=None):
+        """Загружает и обрабатывает файлы корпуса.
+           cached_files: Результаты из кэша по файлам (см. _load_from_cache). Файлы с той же
+           подписью (mtime, size) берутся из кэша, заново загружаются и обрабатываются только
+           новые и измененные файлы, удаленные файлы отбрасываются.
+           Без cached_files все файлы обрабатываются заново в новом хранилище, которое
+           заменяет текущее только после окончания обработки.
+           progress_callback: Функция, получающая события прогресса (словарь, см. _report_progress).
+           cancel_event: threading.Event; если он установлен, обработка прерывается между файлами,
+           а корпус остается прежним.
+           Возвращает False, если обработка была отменена.
+        """
+        cached_files = cached_files or {}
+        current_files = self._get_corpus_files()
+        if not current_files:
+            print(f"Предупреждение: Поддерживаемые файлы (.txt, .pdf, .docx, .rtf) в директории '{self.corpus_directory}' не найдены.")
+
+        unchanged, changed, signatures = self._split_changed_files(current_files, cached_files)
+        removed = [fname for fname in cached_files if fname not in signatures]
+        if cached_files:
+            print(f"Файлы из кэша: {len(unchanged)}, новые или измененные: {len(changed)}, удаленные: {len(removed)}.")
+
+        texts, hashes = self._load_corpus(changed, progress_callback, cancel_event)
+        processed = self._process_corpus(texts, progress_callback, cancel_event)
+        if cancel_event is not None and cancel_event.is_set():
+            print("Обработка корпуса отменена. Корпус не изменен.")
+            return False
+
+        # Удаляем из хранилища документы удаленных и измененных файлов
+        unchanged = set(unchanged)
+        if not cached_files:
+            store = CorpusStore()
+        else:
+            store = self.store
+        for name in store.document_names():
+            if name not in unchanged:
+                store.remove_document(name)
+
+        # Собираем корпус: документы неизмененных файлов остаются в хранилище,
+        # новые и измененные файлы добавляются в порядке файлов директории.
+        # Тексты неизмененных файлов уже есть в хранилище текстов.
+        kept_texts = set()
+        self.processed_files_mtimes, self.processed_files_sizes, self.processed_files_hashes = {}, {}, {}
+        for filename in current_files:
+            if filename in unchanged:
+                content_hash = cached_files[filename].get('content_hash')
+            elif filename in processed:
+                self.raw_texts[filename] = texts[filename]
+                content_hash = hashes.get(filename)
+                if processed[filename] is not None:
+                    file_tokens, file_tagged, file_lemmas, file_spans = processed[filename]
+                    with self.profiler.stage('index', filename):
+                        store.add_document(filename, file_tokens, [tag for token, tag in file_tagged],
+                                           file_lemmas, file_spans)
+            else:
+                # Текст не извлечен или обработка завершилась ошибкой: файл будет
+                # обработан повторно при следующем запуске
+                if filename in texts:
+                    self.raw_texts[filename] = texts[filename]
+                    kept_texts.add(filename)
+                continue
+
+            kept_texts.add(filename)
+            self.processed_files_mtimes[filename], self.processed_files_sizes[filename] = signatures[filename]
+            if content_hash:
+                self.processed_files_hashes[filename] = content_hash
+
+        # Тексты удаленных файлов больше не нужны
+        self.raw_texts.retain(kept_texts)
+        if store is not self.store:
+            self.store.close()
+            self.store = store
+
+        print(f"Всего токенов: {len(self.store)}")
+        print(f"Уникальных строк в словаре: {len(self.store.vocab)}")
+        if changed or removed:
+            self._save_to_cache() # Сохраняем результат в кэш
+            # Тексты удаленных и измененных файлов больше не нужны
+            self.extracted_texts.prune(set(self.processed_files_hashes.values()) | set(hashes.values()))
+        else:
+            print("Файлы корпуса не изменились с момента последнего кэширования.")
+        return True
+
+    def reload_corpus(self, progress_callback=None, cancel_event=None):
+        """Перезагружает и переобрабатывает корпус.
+           Кэш не используется, но текущий корпус и файл кэша остаются на месте до конца
+           обработки: при отмене (cancel_event) корпус не меняется.
+           progress_callback, cancel_event: см. _load_and_process_corpus.
+           Возвращает True, если обработка завершена и корпус не пуст.
+        """
         print("\nПерезагрузка корпуса...")
-        # Очищаем кэш перед полной перезагрузкой
-        if os.path.exists(self.cache_filepath):
+        if not self._load_and_process_corpus(progress_callback=progress_callback, cancel_event=cancel_event):
+            return False
+        # Если обработанных файлов нет, новый кэш не записан - удаляем устаревший
+        if not self.processed_files_mtimes and os.path.exists(self.cache_filepath):
             try:
                 os.remove(self.cache_filepath)
                 print("Старый файл кэша удален.")
             except Exception as e:
                 print(f"Не удалось удалить старый кэш: {e}")
-        self._load_and_process_corpus()
-        return bool(self.tokens) # Возвращаем True, если обработка прошла успешно
-
-    def get_wordform_frequency(self, top_n=20):
-        """Возвращает частотный словарь словоформ."""
-        if not self.tokens:
-            return []
-        # Извлекаем только токены для подсчета частоты
-        freq_dist = Counter(token for token, filename in self.tokens)
-        return freq_dist.most_common(top_n)
-
-    def get_lemma_frequency(self, top_n=20):
-        """Возвращает частотный словарь лемм."""
-        if not self.lemmas:
-            return []
-        # Извлекаем только леммы для подсчета частоты
-        freq_dist = Counter(lemma for lemma, filename in self.lemmas)
-        return freq_dist.most_common(top_n)
+        return len(self.store) > 0 # Возвращаем True, если обработка прошла успешно
+
+    def refresh_corpus(self, progress_callback=None, cancel_event=None):
+        """Инкрементально обновляет корпус по текущему состоянию директории.
+           Как при запуске с кэшем: заново обрабатываются только новые и измененные файлы,
+           документы удаленных файлов убираются из хранилища.
+           progress_callback, cancel_event: см. _load_and_process_corpus.
+           Возвращает False, если обновление было отменено.
+        """
+        cached_files = {
+            fname: {'mtime': mtime,
+                    'size': self.processed_files_sizes.get(fname),
+                    'content_hash': self.processed_files_hashes.get(fname)}
+            for fname, mtime in self.processed_files_mtimes.items()
+        }
+        print("\nОбновление корпуса по изменениям в директории...")
+        return self._load_and_process_corpus(cached_files, progress_callback, cancel_event)
+
+    def get_wordform_frequency(self, top_n=20, filename=None):
+        """Возвращает частотный словарь словоформ (всего корпуса или файла filename)."""
+        return self.store.most_common('tokens', top_n, filename)
+
+    def get_lemma_frequency(self, top_n=20, filename=None):
+        """Возвращает частотный словарь лемм (всего корпуса или файла filename)."""
+        return self.store.most_common('lemmas', top_n, filename)
+
+    def get_pos_frequency(self, top_n=10, filename=None):
+        """Возвращает частотный словарь частей речи (всего корпуса или файла filename)."""
+        return self.store.most_common('tags', top_n, filename)
+
+    def get_ngram_frequency(self, n=2, top_n=20, by_lemma=False, filename=None):
+        """Возвращает самые частые n-граммы [(кортеж слов, частота)] (всего корпуса или файла filename).
+           n: Длина n-граммы (2 - биграммы, 3 - триграммы).
+           by_lemma: Строить n-граммы из лемм, а не из словоформ.
+        """
+        return self.store.most_common_ngrams('lemmas' if by_lemma else 'tokens', n, top_n, filename)
 
-    def get_pos_frequency(self, top_n=10):
-        """Возвращает частотный словарь частей речи."""
-        if not self.tagged_tokens:
+    def get_collocations(self, n=2, measure='pmi', top_n=20, by_lemma=False, filename=None,
+                         min_count=DEFAULT_MIN_COUNT):
+        """Возвращает коллокации - n-граммы с наибольшей мерой связанности [(кортеж слов, мера, частота)].
+           measure: 'pmi', 'log_likelihood' или 't_score' (см. ngrams.ASSOCIATION_MEASURES).
+           min_count: Учитывать только n-граммы, встретившиеся не меньше min_count раз.
+        """
+        if measure not in ASSOCIATION_MEASURES:
+            raise ValueError(f"Неизвестная мера связанности '{measure}', допустимые: "
+                             f"{', '.join(ASSOCIATION_MEASURES)}")
+        return self.store.collocations('lemmas' if by_lemma else 'tokens', n, measure, top_n, filename,
+                                       min_count)
+
+    def get_collocates(self, keyword, window=DEFAULT_COLLOCATE_WINDOW, by_lemma=False, target_pos=None,
+                       filename=None, sort_by='count', top_n=20, min_count=1):
+        """Возвращает коллокаты слова - слова, встречающиеся в окне ±window токенов вокруг него.
+           keyword (str): Искомое слово (словоформа или лемма - зависит от by_lemma).
+           by_lemma (bool): Искать по лемме и считать коллокаты по леммам.
+           target_pos (str, optional): Учитывать только коллокаты с этой частью речи (POS-тег или префикс).
+           filename (str, optional): Ограничить поиск одним файлом корпуса.
+           sort_by: 'count' - по частоте в окнах, иначе название меры связанности
+                    ('pmi', 'log_likelihood', 't_score').
+           min_count: Минимальная частота коллоката в окнах.
+           Результат: [(коллокат, частота в окнах, {мера: значение})].
+        """
+        if sort_by != 'count' and sort_by not in ASSOCIATION_MEASURES:
+            raise ValueError(f"Неизвестный порядок сортировки '{sort_by}', допустимые: "
+                             f"count, {', '.join(ASSOCIATION_MEASURES)}")
+        store = self.store
+        keyword_id = store.vocab.get_id(keyword.lower())
+        if keyword_id is None:
             return []
-        # Извлекаем только теги для подсчета частоты
-        tags = [tag for (token, tag), filename in self.tagged_tokens]
-        freq_dist = Counter(tags)
-        return freq_dist.most_common(top_n)
+        postings = (store.lemma_index if by_lemma else store.token_index).get(keyword_id)
+        if filename is not None:
+            postings = store.document_postings(postings, filename)
+        collocates = store.collocates(postings, 'lemmas' if by_lemma else 'tokens', window, target_pos,
+                                      filename, min_count)
+        if sort_by != 'count':
+            collocates.sort(key=lambda item: (-item[2][sort_by], -item[1], item[0]))
+        return collocates if top_n is None else collocates[:top_n]
+
+    def get_corpus_summary(self):
+        """Возвращает сводку по корпусу: число файлов, токенов, уникальных словоформ и лемм."""
+        store = self.store
+        return {
+            'files': len(self.get_processed_filenames()),
+            'tokens': len(store),
+            'lemmas': len(store.lemma_ids),
+            'unique_wordforms': len(store.counts['tokens']),
+            'unique_lemmas': len(store.counts['lemmas']),
+        }
 
     def get_word_info(self, wordform):
         """Возвращает лемму и морфологические характеристики для словоформы."""
-        wordform_lower = wordform.lower()
-        info = []
-        found_lemma = None
-        found_tag = None
-        found_filename = None # Добавляем для возможного использования
-        # Ищем в кэшированных данных
-        for i, (token, filename) in enumerate(self.tokens):
-            if token == wordform_lower:
-                # Находим соответствующие тег и лемму по индексу i
-                # Доступ к tagged_tokens и lemmas должен быть синхронизирован с tokens
-                if i < len(self.tagged_tokens) and i < len(self.lemmas):
-                    (original_token, tag), tag_filename = self.tagged_tokens[i]
-                    lemma, lemma_filename = self.lemmas[i]
-                    # Убедимся, что данные согласованы (хотя бы по имени файла)
-                    if filename == tag_filename == lemma_filename and original_token == token:
-                        if not found_lemma:
-                            found_lemma = lemma
-                            found_tag = tag
-                            found_filename = filename # Сохраняем имя файла первого совпадения
-                        break # Нашли первое вхождение, выходим
-                else:
-                    print(f"Предупреждение: Несоответствие индексов при поиске информации для слова '{wordform_lower}'. Индекс {i}")
-                    # Можно прервать поиск или продолжить, но лучше прервать, т.к. данные могут быть повреждены
-                    break
-
-        if found_lemma:
-            # Возвращаем словарь, можно добавить и filename при необходимости
-            return {'lemma': found_lemma, 'pos': found_tag, 'source_file': found_filename}
-        else:
-            # Если слово не найдено в обработанном корпусе, пробуем лемматизировать его напрямую
+        return self.get_word_info_batch([wordform])[wordform]
+
+    def get_word_info_batch(self, wordforms):
+        """Возвращает информацию о словоформах {wordform: info} в порядке wordforms.
+           info - словарь как у get_word_info: {'lemma', 'pos', 'source_file'} для словоформ корпуса,
+           {'lemma', 'pos'} с пометкой "(предположительно)" для остальных.
+           Словоформы корпуса находятся по индексу словоформ, неизвестные слова тегируются
+           одним вызовом теггера (а не по вызову на слово) и лемматизируются через кэш лемм.
+        """
+        store = self.store
+        results = {}
+        unknown = {} # {wordform_lower: [wordform]} - слова, которых нет в корпусе
+        for wordform in wordforms:
+            if wordform in results:
+                continue
+            wordform_lower = wordform.lower()
+            # Ищем первое вхождение в индексе словоформ
+            token_id = store.vocab.get_id(wordform_lower)
+            postings = store.token_index.get(token_id) if token_id is not None else None
+            # Строка может быть в словаре, но не как словоформа (например, только как лемма)
+            if postings:
+                doc_id, i = next(store.iter_positions(postings[:1]))
+                results[wordform] = {
+                    'lemma': store.vocab[store.lemma_ids[i]],
+                    'pos': store.vocab[store.tag_ids[i]],
+                    'source_file': store.documents[doc_id]['name'], # Имя файла первого совпадения
+                }
+            else:
+                results[wordform] = None
+                unknown.setdefault(wordform_lower, []).append(wordform)
+
+        if unknown:
+            # Слов нет в обработанном корпусе - пробуем лемматизировать их напрямую
+            words = list(unknown)
             try:
-                tagged = nltk.pos_tag([wordform_lower])
-                tag = tagged[0][1] if tagged else 'NN'
-                lemma = self.lemmatizer.lemmatize(wordform_lower, pos=self._get_wordnet_pos(tag))
-                return {'lemma': lemma, 'pos': tag + " (предположительно)"}
+                import nltk
+                self.warm_up_nltk() # Первое обращение к теггеру и WordNet - под блокировкой
+                # Каждое слово тегируется как отдельное предложение (как pos_tag([word])),
+                # но теггер загружается и вызывается один раз на весь список
+                tagged_words = nltk.pos_tag_sents([[word] for word in words])
+                for word, tagged in zip(words, tagged_words):
+                    tag = tagged[0][1] if tagged else 'NN'
+                    lemma = self.lemma_cache.lemmatize(word, self._get_wordnet_pos(tag))
+                    for wordform in unknown[word]:
+                        results[wordform] = {'lemma': lemma, 'pos': tag + " (предположительно)"}
             except Exception as e:
-                 print(f"Ошибка при попытке лемматизации ненайденного слова '{wordform_lower}': {e}")
-                 return {'lemma': 'Не найдено', 'pos': 'Не найдено'}
+                print(f"Ошибка при попытке лемматизации ненайденных слов ({', '.join(words[:5])}"
+                      f"{', ...' if len(words) > 5 else ''}): {e}")
+                for word in words:
+                    for wordform in unknown[word]:
+                        results[wordform] = {'lemma': 'Не найдено', 'pos': 'Не найдено'}
+        return results
+
+    def get_words_by_pos(self, target_pos, filename=None):
+        """Возвращает словоформы с заданной частью речи и их частоты [(word, count)].
+           target_pos (str): POS-тег или его префикс (например, 'NN' - все существительные).
+           filename (str, optional): Ограничить поиск одним файлом корпуса.
+        """
+        store = self.store
+        postings = store.tag_postings(target_pos)
+        if filename is not None:
+            postings = store.document_postings(postings, filename)
+        counts = Counter(store.token_ids[i] for _, i in store.iter_positions(postings))
+        return [(store.vocab[token_id], count) for token_id, count in counts.most_common()]
+
+    def get_profile_report(self):
+        """Возвращает текстовый отчет профилирования (см. profiling.Profiler.format_report)."""
+        return self.profiler.format_report()
+
+    def get_lemma_cache_stats(self):
+        """Возвращает статистику кэша лемм (записи, попадания, промахи, доля попаданий)."""
+        return self.lemma_cache.get_stats()
 
     def get_raw_text(self, filename):
         """Возвращает необработанный текст указанного файла из кэша."""
@@ -581,116 +923,141 @@ class CorpusManager:
         """Возвращает список имен файлов, которые были успешно обработаны."""
         return sorted(list(self.raw_texts.keys()))
 
-    def get_concordance(self, keyword, width=80, target_pos=None):
+    def get_concordance(self, keyword, width=80, target_pos=None, by_lemma=False):
         """Строит конкорданс для заданного слова.
-           keyword (str): Искомое слово (словоформа или лемма - зависит от контекста вызова).
+           keyword (str): Искомое слово (словоформа или лемма - зависит от by_lemma).
            width (int): Количество символов контекста слева и справа.
            target_pos (str, optional): Искомая часть речи (POS-тег).
+           by_lemma (bool): Искать по лемме - в результат попадают все словоформы этой леммы.
+           Запрос из нескольких слов ищется как фраза (см. get_phrase_concordance);
+           фильтр по части речи к фразе не применяется. Слово с символами * ? [...]
+           ищется как шаблон (см. get_pattern_concordance).
         """
-        if not self.tokens or not self.tagged_tokens or not self.raw_texts:
+        if len(keyword.split()) > 1:
+            return self.get_phrase_concordance(keyword, width, by_lemma)
+        if self.is_pattern(keyword):
+            return self.get_pattern_concordance(keyword, width, target_pos, by_lemma)
+        if not len(self.store) or not self.raw_texts:
             print("Конкорданс не может быть построен: корпус не загружен.")
             return []
         
         keyword_lower = keyword.lower()
-        results = []
-        # Используем enumerate для получения индекса, чтобы связать с tagged_tokens
-        for i, (token, filename) in enumerate(self.tokens):
-            # Получаем тег для текущего токена по тому же индексу i
-            # Проверяем границы на всякий случай
-            if i >= len(self.tagged_tokens):
-                print(f"Предупреждение: Несоответствие длины tokens и tagged_tokens при построении конкорданса для '{keyword}'. Индекс {i}")
+        store = self.store
+        keyword_id = store.vocab.get_id(keyword_lower)
+        if keyword_id is None:
+            return []
+        index = store.lemma_index if by_lemma else store.token_index
+        postings = index.get(keyword_id)
+        if target_pos is not None:
+            # Фильтр по части речи - пересечение со списком вхождений тегов
+            postings = intersect_postings(postings, store.tag_postings(target_pos))
+        # Вхождения слова берем из индекса, поэтому просматриваются только совпадения
+        return self._concordance_lines(postings, 1, width)
+
+    def get_phrase_concordance(self, phrase, width=80, by_lemma=False):
+        """Строит конкорданс для фразы - последовательности слов, идущих подряд.
+           phrase (str): Слова через пробел; "*" - пропуск, на месте которого может стоять
+                         любое слово (например, "preheat * oven").
+           by_lemma (bool): Сравнивать слова фразы с леммами, а не со словоформами.
+           Фраза ищется пересечением списков вхождений ее слов со сдвигом на позицию слова
+           во фразе, без просмотра всех токенов корпуса.
+           Возвращает строки (left, phrase, right, filename), как get_concordance.
+        """
+        if not len(self.store) or not self.raw_texts:
+            print("Конкорданс не может быть построен: корпус не загружен.")
+            return []
+        words = phrase.lower().split()
+        store = self.store
+        terms = []
+        for offset, word in enumerate(words):
+            if word == PHRASE_WILDCARD:
                 continue
-            
-            (original_token, tag), tag_filename = self.tagged_tokens[i]
-            
-            # Проверяем соответствие слова и части речи (если задана)
-            match = False
-            if token == keyword_lower:
-                if tag_filename == filename and original_token == token: # Доп. проверка согласованности
-                    if target_pos is None or tag.startswith(target_pos):
-                        match = True
-                else:
-                    print(f"Предупреждение: Несогласованность данных токена и тега для '{token}' в файле '{filename}' при поиске конкорданса.")
-            
-            if match:
-                # Нашли слово, теперь нужно найти его в исходном тексте файла
-                raw_text = self.raw_texts.get(filename)
+            word_id = store.vocab.get_id(word)
+            if word_id is None:
+                return [] # Слова нет в корпусе - фраза не встречается
+            terms.append((offset, word_id))
+        if not terms:
+            print("Фраза должна содержать хотя бы одно слово, кроме пропусков.")
+            return []
+        index = store.lemma_index if by_lemma else store.token_index
+        return self._concordance_lines(store.phrase_postings(index, terms, len(words)), len(words), width)
+
+    @staticmethod
+    def is_pattern(query):
+        """True, если запрос - шаблон слова (содержит * ? или [...]), а не отдельный пропуск "*"."""
+        query = query.strip()
+        return query != PHRASE_WILDCARD and PATTERN_SPECIAL_CHARS.search(query) is not None
+
+    def expand_pattern(self, pattern, by_lemma=False, regex=False):
+        """Возвращает словоформы (или леммы - by_lemma), подходящие под шаблон, в алфавитном порядке.
+           pattern: Шаблон (например, "bak*", "*berry", "colo?r") или регулярное выражение (regex=True).
+           Шаблон сравнивается с различными словами словаря, а не с каждым токеном корпуса.
+           Некорректное регулярное выражение вызывает ValueError.
+        """
+        store = self.store
+        try:
+            ids = store.match_vocabulary('lemmas' if by_lemma else 'tokens',
+                                         pattern.strip() if regex else pattern.strip().lower(), regex)
+        except re.error as e:
+            raise ValueError(f"Некорректное регулярное выражение '{pattern}': {e}")
+        return [store.vocab[string_id] for string_id in ids]
+
+    def get_pattern_concordance(self, pattern, width=80, target_pos=None, by_lemma=False, regex=False):
+        """Строит конкорданс для всех словоформ (или лемм), подходящих под шаблон.
+           Списки вхождений найденных слов объединяются, поэтому просматриваются только совпадения.
+           Остальные параметры - как у get_concordance; regex - шаблон является регулярным выражением.
+        """
+        if not len(self.store) or not self.raw_texts:
+            print("Конкорданс не может быть построен: корпус не загружен.")
+            return []
+        store = self.store
+        kind = 'lemmas' if by_lemma else 'tokens'
+        ids = [store.vocab.get_id(word) for word in self.expand_pattern(pattern, by_lemma, regex)]
+        if not ids:
+            return []
+        postings = store.merged_postings(kind, ids)
+        if target_pos is not None:
+            postings = intersect_postings(postings, store.tag_postings(target_pos))
+        return self._concordance_lines(postings, 1, width)
+
+    def get_pattern_frequency(self, pattern, top_n=20, by_lemma=False, regex=False, filename=None):
+        """Возвращает словоформы (или леммы), подходящие под шаблон, с частотами [(word, count)]
+           по убыванию частоты (всего корпуса или файла filename).
+        """
+        table = self.store.frequencies('lemmas' if by_lemma else 'tokens', filename)
+        if table is None:
+            return []
+        counts = table[0]
+        vocab = self.store.vocab
+        frequency = [(word, counts[vocab.get_id(word)]) for word in self.expand_pattern(pattern, by_lemma, regex)]
+        frequency = sorted((item for item in frequency if item[1] > 0), key=lambda item: -item[1])
+        return frequency if top_n is None else frequency[:top_n]
+
+    def _concordance_lines(self, postings, length, width):
+        """Строки конкорданса для вхождений postings; каждое вхождение - length токенов подряд,
+           начиная с позиции вхождения. Строки без дубликатов, отсортированы по файлу и левому контексту.
+        """
+        store = self.store
+        results = []
+        unknown_spans = 0 # Вхождения, позиция которых в тексте неизвестна (такие строки не строятся)
+        current_doc_id = raw_text = filename = None
+        for doc_id, i in store.iter_positions(postings):
+            # Нашли вхождение, берем контекст из исходного текста файла
+            if doc_id != current_doc_id:
+                current_doc_id = doc_id
+                filename = store.documents[doc_id]['name']
+                raw_text = self.raw_texts.get(filename, "")
                 if not raw_text:
                     print(f"Предупреждение: Не найден сырой текст для файла '{filename}' при построении конкорданса.")
-                    continue
-                
-                # TODO: Улучшить поиск контекста. Текущий поиск по строке keyword_lower
-                # может находить не точное вхождение токена, особенно если токен
-                # отличается от оригинального слова из-за регистра или обработки.
-                # Идеально было бы хранить индексы токенов из исходного текста.
-                # Пока ищем позицию ключевого слова в нижнем регистре.
-                try:
-                    # Ищем все вхождения, чтобы потенциально показать разные контексты одного слова
-                    # (но пока логика берет только первый контекст)
-                    # Ищем оригинальный токен (не keyword_lower), но сравниваем в нижнем регистре
-                    # чтобы найти позицию даже если регистр отличается в тексте
-                    search_term_lower = original_token.lower()
-                    raw_text_lower = raw_text.lower()
-                    current_pos = 0
-                    pos = -1
-                    # Наивный поиск позиции, соответствующей i-тому токену в файле
-                    # Это ОЧЕНЬ неэффективно и неточно для больших файлов!
-                    token_count_in_file = 0
-                    for idx, (tok, fname) in enumerate(self.tokens):
-                        if fname == filename:
-                            if idx == i:
-                                # Попытка найти n-ное вхождение слова в тексте
-                                search_start_index = 0
-                                found_occurrence = 0
-                                while found_occurrence <= token_count_in_file:
-                                    found_pos = raw_text_lower.find(search_term_lower, search_start_index)
-                                    if found_pos == -1:
-                                        pos = -1 # Не нашли нужное вхождение
-                                        break
-                                    # Проверка границ слова (чтобы не найти подстроку)
-                                    is_start_ok = found_pos == 0 or not raw_text[found_pos-1].isalnum()
-                                    is_end_ok = (found_pos + len(search_term_lower) == len(raw_text)) or \
-                                                not raw_text[found_pos + len(search_term_lower)].isalnum()
-
-                                    if is_start_ok and is_end_ok:
-                                        if found_occurrence == token_count_in_file:
-                                             pos = found_pos
-                                             break
-                                        found_occurrence += 1
-
-                                    search_start_index = found_pos + 1 # Искать следующее вхождение
-                                else:
-                                     pos = -1 # Цикл завершился без нахождения нужного вхождения
-                                break # Выходим из цикла поиска индекса токена
-                            elif tok.lower() == search_term_lower:
-                                token_count_in_file += 1
-                     #----- Конец неэффективного поиска позиции -----
-
-                    if pos == -1:
-                        # print(f"Не удалось точно определить позицию слова '{original_token}' (индекс {i}) в '{filename}'. Поиск по первому вхождению.")
-                        # Откат к простому поиску первого вхождения, если точное не найдено
-                        pos = raw_text_lower.find(search_term_lower)
-                        if pos == -1:
-                            continue # Слово вообще не найдено, пропускаем
-
-                except ValueError:
-                     print(f"Странно: слово '{original_token}' (токен '{token}') не найдено в '{filename}', хотя токен присутствует.")
-                     continue
-                
-                # Формируем контекст, используя найденную позицию `pos` и длину `original_token`
-                start = max(0, pos - width)
-                end = min(len(raw_text), pos + len(original_token) + width)
-                left_context = raw_text[start:pos].replace('\\n', ' ').strip()
-                # Используем original_token для выделения, т.к. он может отличаться регистром от keyword_lower
-                highlighted_word = raw_text[pos : pos + len(original_token)]
-                right_context = raw_text[pos + len(original_token):end].replace('\\n', ' ').strip()
-                
-                # Убираем лишние пробелы
-                left_context = ' '.join(left_context.split())
-                right_context = ' '.join(right_context.split())
-                
-                # Добавляем результат с именем файла
-                results.append((f"...{left_context}", highlighted_word, f"{right_context}...", filename))
+            if not raw_text:
+                continue
+            start, end = store.starts[i], store.ends[i + length - 1]
+            if end <= start:
+                unknown_spans += 1
+                continue
+            results.append(self._make_concordance_line(raw_text, start, end, width, filename))
+        if unknown_spans:
+            print(f"Предупреждение: {unknown_spans} вхождений пропущено - их позиция в тексте неизвестна.")
 
         # Удаляем дубликаты перед сортировкой
         results = list(set(results))
@@ -699,18 +1066,34 @@ class CorpusManager:
         results.sort(key=lambda x: (x[3], x[0]))
         return results
 
+    def _make_concordance_line(self, raw_text, start, end, width, filename):
+        """Формирует строку конкорданса (left, word, right, filename) по позиции [start, end) в тексте."""
+        left_context = raw_text[max(0, start - width):start]
+        # Слово берется из исходного текста, т.к. оно может отличаться регистром от токена
+        # (у фразы переводы строк между словами заменяются пробелами)
+        highlighted_word = ' '.join(raw_text[start:end].split())
+        right_context = raw_text[end:end + width]
+
+        # Убираем лишние пробелы
+        left_context = ' '.join(left_context.split())
+        right_context = ' '.join(right_context.split())
+        return (f"...{left_context}", highlighted_word, f"{right_context}...", filename)
+
     def update_raw_text(self, filename, new_text):
-        """Обновляет сырой текст для файла и удаляет кэш для переобработки."""
+        """Обновляет сырой текст для файла и удаляет его запись из кэша для переобработки."""
         if filename in self.raw_texts:
             self.raw_texts[filename] = new_text
+            # Позиции токенов относятся к старому тексту: до переобработки токены
+            # ищутся в новом тексте по порядку, как при загрузке из XML
+            span = self.store.document_range(filename)
+            if span is not None:
+                tokens = self.store.get_strings(self.store.token_ids, *span)
+                self.store.set_document_spans(filename, align_lowered_spans(new_text, tokens))
             print(f"Внутренний текст для '{filename}' обновлен.")
-            # Удаляем кэш, чтобы заставить систему пересчитать все при следующей перезагрузке
-            if os.path.exists(self.cache_filepath):
-                try:
-                    os.remove(self.cache_filepath)
-                    print(f"Файл кэша '{self.cache_filepath}' удален из-за редактирования текста.")
-                except Exception as e:
-                    print(f"Ошибка при удалении файла кэша '{self.cache_filepath}': {e}")
+            # Убираем файл из кэша, чтобы при следующем запуске он был переобработан
+            # (записи остальных файлов остаются в кэше)
+            self._save_to_cache(exclude={filename})
+            print(f"Запись файла '{filename}' удалена из кэша из-за редактирования текста.")
             return True
         else:
             print(f"Ошибка: Файл '{filename}' не найден в текущем корпусе.")
@@ -723,6 +1106,7 @@ if __name__ == '__main__':
     # corpus_dir = 'corpus_texts' # Если вы переместили recipe1.txt в corpus_texts
 
     # Перед запуском убедитесь, что скачали данные NLTK (см. main.py)
+    import nltk
     try:
         nltk.data.find('tokenizers/punkt')
         nltk.data.find('taggers/averaged_perceptron_tagger')
@@ -0,0 +1,821 @@
+import re
+import sys
+import heapq
+import fnmatch
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import accumulate, chain
+from binary_cache import load_array
+from collections.abc import Sequence
+from ngrams import (NGRAM_SIZES, ASSOCIATION_MEASURES, DEFAULT_MIN_COUNT, NgramTable, count_ngrams, unpack_ngram,
+                    top_ngrams, score_ngrams)
+
+# Компактное представление обработанного корпуса.
+# Вместо списков кортежей (по одному на токен) корпус хранится по столбцам:
+# строки (словоформы, леммы, теги) записываются один раз в словарь Vocabulary,
+# а для каждого токена хранятся только целочисленные id в массивах array.
+# Документ занимает непрерывный диапазон позиций [start, end) во всех столбцах.
+# Столбцы starts/ends хранят позиции токенов в исходном тексте документа
+# (пустой диапазон start == end означает, что позиция неизвестна).
+# Для поиска без просмотра всего корпуса строятся инвертированные индексы
+# (PostingsIndex): id строки -> упорядоченный список вхождений.
+# Частоты словоформ, лемм и тегов (по документам и по корпусу) поддерживаются
+# при добавлении и удалении документов, а не пересчитываются при каждом запросе.
+# Частоты n-грамм (биграмм и триграмм) словоформ и лемм (см. ngrams.py) считаются
+# при первом запросе и хранятся в компактной таблице до следующего изменения корпуса;
+# частоты n-грамм отдельного документа считаются по его диапазону столбцов.
+# Хранилище, загруженное из двоичного кэша (binary_cache), работает прямо с секциями
+# файла через mmap и копирует данные в память только перед первым изменением.
+
+# Тип элементов столбцов: беззнаковое 32-битное целое
+COLUMN_TYPECODE = 'I'
+# Тип элементов списков вхождений: беззнаковое 64-битное целое,
+# старшие 32 бита - doc_id, младшие - позиция токена внутри документа
+POSTING_TYPECODE = 'Q'
+POSTING_SHIFT = 32
+POSTING_MASK = (1 << POSTING_SHIFT) - 1
+# Виды частотных таблиц
+COUNT_KINDS = ('tokens', 'lemmas', 'tags')
+# Имена столбцов и индексов хранилища (они же - имена секций кэша)
+COLUMN_NAMES = ('token_ids', 'tag_ids', 'lemma_ids', 'doc_ids', 'starts', 'ends')
+INDEX_NAMES = ('token_index', 'lemma_index', 'tag_index', 'tag_prefix_index')
+# Столбцы строк по видам частотных таблиц
+COLUMN_BY_KIND = {'tokens': 'token_ids', 'lemmas': 'lemma_ids', 'tags': 'tag_ids'}
+# Индексы по видам частотных таблиц
+INDEX_BY_KIND = {'tokens': 'token_index', 'lemmas': 'lemma_index', 'tags': 'tag_index'}
+# Символы шаблона (как в fnmatch): * - любая последовательность, ? - один символ, [...] - набор символов
+PATTERN_SPECIAL_CHARS = re.compile(r"[*?\[]")
+# Символ больше любого символа строк словаря - верхняя граница диапазона строк с общим префиксом
+MAX_CHAR = chr(sys.maxunicode)
+# Виды таблиц n-грамм и соответствующие им столбцы
+NGRAM_KINDS = {'tokens': 'token_ids', 'lemmas': 'lemma_ids'}
+
+
+class Vocabulary:
+    """Таблица интернированных строк: строка <-> целочисленный id."""
+    def __init__(self, strings=()):
+        self._strings = []
+        self._ids = {}
+        for string in strings:
+            self.add(string)
+
+    def add(self, string):
+        """Добавляет строку (если ее еще нет) и возвращает ее id."""
+        string_id = self._ids.get(string)
+        if string_id is None:
+            string = sys.intern(string)
+            string_id = len(self._strings)
+            self._strings.append(string)
+            self._ids[string] = string_id
+        return string_id
+
+    def get_id(self, string):
+        """Возвращает id строки или None, если строки нет в словаре."""
+        return self._ids.get(string)
+
+    def __getitem__(self, string_id):
+        return self._strings[string_id]
+
+    def __len__(self):
+        return len(self._strings)
+
+    def __iter__(self):
+        return iter(self._strings)
+
+    def __getstate__(self):
+        # Сохраняем только список строк, словарь id восстанавливается при загрузке
+        return self._strings
+
+    def __setstate__(self, strings):
+        self.__init__(strings)
+
+
+class PostingsIndex:
+    """Инвертированный индекс: id строки -> array вхождений (doc_id << 32 | позиция в документе).
+       Документы получают возрастающие doc_id и добавляются в конец, поэтому списки
+       вхождений всегда отсортированы, а вхождения одного документа идут подряд.
+       Индекс из кэша хранится в виде секций (ключи, смещения, вхождения) и
+       переводится в словарь массивов при первом изменении.
+    """
+    def __init__(self):
+        self.postings = {}
+        # (keys, offsets, data) - memoryview секций кэша или None
+        self._mapped = None
+
+    def __len__(self):
+        """Количество ключей в индексе."""
+        if self._mapped is not None:
+            return len(self._mapped[0])
+        return len(self.postings)
+
+    def keys(self):
+        """Список ключей индекса."""
+        if self._mapped is not None:
+            return self._mapped[0].tolist()
+        return list(self.postings)
+
+    def get(self, key_id):
+        """Список вхождений ключа (пустой array, если ключа нет)."""
+        if self._mapped is not None:
+            keys, offsets, data = self._mapped
+            i = bisect_left(keys, key_id)
+            if i < len(keys) and keys[i] == key_id:
+                return data[offsets[i]:offsets[i + 1]]
+            return array(POSTING_TYPECODE)
+        return self.postings.get(key_id, array(POSTING_TYPECODE))
+
+    def materialize(self):
+        """Копирует списки вхождений из секций кэша в память."""
+        if self._mapped is None:
+            return
+        keys, offsets, data = self._mapped
+        self.postings = {key_id: load_array(data[offsets[i]:offsets[i + 1]], POSTING_TYPECODE)
+                         for i, key_id in enumerate(keys)}
+        self._mapped = None
+
+    def to_sections(self, prefix):
+        """Секции кэша: отсортированные ключи, смещения списков и сами списки подряд."""
+        self.materialize()
+        keys = array(COLUMN_TYPECODE, sorted(self.postings))
+        offsets = array(POSTING_TYPECODE, [0])
+        data = array(POSTING_TYPECODE)
+        for key_id in keys:
+            data.extend(self.postings[key_id])
+            offsets.append(len(data))
+        return {f"{prefix}.keys": keys, f"{prefix}.offsets": offsets, f"{prefix}.data": data}
+
+    @classmethod
+    def from_mapped(cls, mapped, prefix):
+        """Индекс поверх секций открытого кэша (binary_cache.MappedCache)."""
+        index = cls()
+        index._mapped = tuple(mapped.section(f"{prefix}.{part}") for part in ('keys', 'offsets', 'data'))
+        return index
+
+    def add_document(self, doc_id, key_ids):
+        """Добавляет вхождения документа. key_ids - id ключей по порядку токенов документа."""
+        self.materialize()
+        base = doc_id << POSTING_SHIFT
+        by_key = {}
+        for local_position, key_id in enumerate(key_ids):
+            by_key.setdefault(key_id, []).append(base | local_position)
+        for key_id, items in by_key.items():
+            postings = self.postings.get(key_id)
+            if postings is None:
+                self.postings[key_id] = array(POSTING_TYPECODE, items)
+            else:
+                postings.extend(items)
+
+    def remove_document(self, doc_id, key_ids):
+        """Удаляет вхождения документа. key_ids - ключи, которые встречаются в документе."""
+        self.materialize()
+        low = doc_id << POSTING_SHIFT
+        high = (doc_id + 1) << POSTING_SHIFT
+        for key_id in set(key_ids):
+            postings = self.postings.get(key_id)
+            if postings is None:
+                continue
+            start = bisect_left(postings, low)
+            del postings[start:bisect_left(postings, high, start)]
+            if not postings:
+                del self.postings[key_id]
+
+
+def intersect_postings(first, second):
+    """Пересечение двух отсортированных списков вхождений.
+       Просматривается меньший список, элементы ищутся в большем двоичным поиском,
+       поэтому время зависит от размера меньшего списка, а не от суммы размеров.
+    """
+    if len(first) > len(second):
+        first, second = second, first
+    result = array(POSTING_TYPECODE)
+    low = 0
+    high = len(second)
+    for posting in first:
+        low = bisect_left(second, posting, low, high)
+        if low == high:
+            break
+        if second[low] == posting:
+            result.append(posting)
+    return result
+
+
+def pattern_literal_ends(pattern):
+    """Обычные символы в начале и в конце шаблона fnmatch: (префикс, суффикс).
+       Набор [...] считается одним специальным символом, как в fnmatch.translate
+       ('!' в начале набора и ']' сразу после '[' или '[!' входят в набор);
+       '[' без закрывающей ']' - обычный символ. None, если специальных символов нет.
+    """
+    first = last = None
+    i, length = 0, len(pattern)
+    while i < length:
+        char = pattern[i]
+        end = i + 1
+        if char == '[':
+            j = end
+            if j < length and pattern[j] == '!':
+                j += 1
+            if j < length and pattern[j] == ']':
+                j += 1
+            j = pattern.find(']', j)
+            if j < 0:
+                i = end
+                continue
+            end = j + 1
+        elif char not in '*?':
+            i = end
+            continue
+        if first is None:
+            first = i
+        last = end
+        i = end
+    if first is None:
+        return None
+    return pattern[:first], pattern[last:]
+
+
+class CorpusStore:
+    """Столбцовое хранилище токенов корпуса.
+       token_ids, tag_ids, lemma_ids, doc_ids, starts, ends - столбцы одинаковой длины
+       (по элементу на токен), documents - таблица документов {doc_id: {'name', 'start', 'end'}}.
+       token_index - индекс словоформ, lemma_index - индекс лемм, tag_index - индекс POS-тегов
+       (id строки -> вхождения), tag_prefix_index - индекс по первой букве тега (N*, V*, J*...).
+       counts - частоты по корпусу {вид: Counter(id строки)}, document_counts - частоты
+       по документам {doc_id: {вид: Counter}}; виды перечислены в COUNT_KINDS.
+    """
+    def __init__(self):
+        self.vocab = Vocabulary()
+        self.token_ids = array(COLUMN_TYPECODE)
+        self.tag_ids = array(COLUMN_TYPECODE)
+        self.lemma_ids = array(COLUMN_TYPECODE)
+        self.doc_ids = array(COLUMN_TYPECODE)
+        self.starts = array(COLUMN_TYPECODE)
+        self.ends = array(COLUMN_TYPECODE)
+        self.token_index = PostingsIndex()
+        self.lemma_index = PostingsIndex()
+        self.tag_index = PostingsIndex()
+        self.tag_prefix_index = PostingsIndex()
+        self.counts = {kind: Counter() for kind in COUNT_KINDS}
+        self.document_counts = {}
+        # Результаты most_common и таблицы n-грамм до следующего изменения корпуса (в кэш не сохраняются)
+        self._top_cache = {}
+        self.documents = {}
+        self.doc_id_by_name = {}
+        self.next_doc_id = 0
+        # Открытый файл кэша (binary_cache.MappedCache), если данные читаются из него
+        self._mapping = None
+        # Частоты документов в секциях кэша: ({doc_id: номер строки}, {вид: (offsets, ids, values)})
+        self._mapped_document_counts = None
+
+    def __len__(self):
+        """Количество токенов в корпусе."""
+        return len(self.token_ids)
+
+    def _columns(self):
+        """Все столбцы хранилища."""
+        return tuple(getattr(self, name) for name in COLUMN_NAMES)
+
+    def to_sections(self):
+        """Данные хранилища для двоичного кэша: (meta, sections), см. binary_cache.write_cache."""
+        self.materialize()
+        vocab = list(self.vocab)
+        sections = {
+            # Строки словаря подряд в UTF-8 и смещения строк (в символах)
+            'vocab.offsets': array(POSTING_TYPECODE, accumulate(map(len, vocab), initial=0)),
+            'vocab.data': ''.join(vocab).encode('utf-8'),
+        }
+        for name in COLUMN_NAMES:
+            sections[f"columns.{name}"] = getattr(self, name)
+        for name in INDEX_NAMES:
+            sections.update(getattr(self, name).to_sections(name))
+        documents = sorted(self.documents.items(), key=lambda item: item[1]['start'])
+        for kind in COUNT_KINDS:
+            sections[f"counts.{kind}.ids"] = array(COLUMN_TYPECODE, self.counts[kind].keys())
+            sections[f"counts.{kind}.values"] = array(COLUMN_TYPECODE, self.counts[kind].values())
+            offsets = array(POSTING_TYPECODE, [0])
+            ids = array(COLUMN_TYPECODE)
+            values = array(COLUMN_TYPECODE)
+            for doc_id, _ in documents:
+                document_counts = self.document_counts[doc_id][kind]
+                ids.extend(document_counts.keys())
+                values.extend(document_counts.values())
+                offsets.append(len(ids))
+            sections[f"document_counts.{kind}.offsets"] = offsets
+            sections[f"document_counts.{kind}.ids"] = ids
+            sections[f"document_counts.{kind}.values"] = values
+        meta = {
+            'documents': [[doc_id, doc['name'], doc['start'], doc['end']] for doc_id, doc in documents],
+            'next_doc_id': self.next_doc_id,
+        }
+        return meta, sections
+
+    @classmethod
+    def from_mapped(cls, mapped, meta):
+        """Хранилище поверх открытого кэша (binary_cache.MappedCache).
+           Сразу загружаются только словарь, таблица документов и частоты по корпусу;
+           столбцы и индексы читаются из файла по мере обращения.
+        """
+        store = cls()
+        offsets = mapped.section('vocab.offsets').tolist()
+        text = str(mapped.section('vocab.data'), 'utf-8')
+        store.vocab = Vocabulary(text[start:end] for start, end in zip(offsets, offsets[1:]))
+        for name in COLUMN_NAMES:
+            setattr(store, name, mapped.section(f"columns.{name}"))
+        for name in INDEX_NAMES:
+            setattr(store, name, PostingsIndex.from_mapped(mapped, name))
+        for kind in COUNT_KINDS:
+            store.counts[kind] = Counter(dict(zip(mapped.section(f"counts.{kind}.ids"),
+                                                  mapped.section(f"counts.{kind}.values"))))
+        rows = {}
+        for row, (doc_id, name, start, end) in enumerate(meta['documents']):
+            store.documents[doc_id] = {'name': name, 'start': start, 'end': end}
+            store.doc_id_by_name[name] = doc_id
+            rows[doc_id] = row
+        store.next_doc_id = meta['next_doc_id']
+        store._mapped_document_counts = (rows, {
+            kind: tuple(mapped.section(f"document_counts.{kind}.{part}") for part in ('offsets', 'ids', 'values'))
+            for kind in COUNT_KINDS
+        })
+        store._mapping = mapped
+        return store
+
+    def materialize(self):
+        """Копирует все данные из файла кэша в память и закрывает файл.
+           Вызывается перед изменением хранилища и перед перезаписью файла кэша.
+        """
+        if self._mapping is None:
+            return
+        for name in COLUMN_NAMES:
+            setattr(self, name, load_array(getattr(self, name), COLUMN_TYPECODE))
+        for name in INDEX_NAMES:
+            getattr(self, name).materialize()
+        for doc_id in self.documents:
+            self._get_document_counts(doc_id)
+        self._mapped_document_counts = None
+        self.close()
+
+    def close(self):
+        """Закрывает файл кэша. Если данные не были скопированы (materialize), хранилище
+           после этого использовать нельзя - так делается перед удалением файла кэша.
+        """
+        if self._mapping is not None:
+            self._mapping.close()
+            self._mapping = None
+
+    def _get_document_counts(self, doc_id):
+        """Частотные таблицы документа {вид: Counter} (из кэша загружаются при первом обращении)."""
+        document_counts = self.document_counts.get(doc_id)
+        if document_counts is None and self._mapped_document_counts is not None:
+            rows, sections = self._mapped_document_counts
+            row = rows[doc_id]
+            document_counts = {}
+            for kind, (offsets, ids, values) in sections.items():
+                start, end = offsets[row], offsets[row + 1]
+                document_counts[kind] = Counter(dict(zip(ids[start:end], values[start:end])))
+            self.document_counts[doc_id] = document_counts
+        return document_counts
+
+    def _get_ngram_counts(self, kind, n):
+        """Частоты n-грамм длины n вида kind по корпусу (ngrams.NgramTable).
+           Таблица строится при первом обращении и хранится до следующего изменения корпуса.
+        """
+        key = ('ngram_table', kind, n)
+        table = self._top_cache.get(key)
+        if table is None:
+            column = getattr(self, NGRAM_KINDS[kind])
+            ngram_counts = Counter()
+            for doc in self.documents.values():
+                ngram_counts.update(count_ngrams(column[doc['start']:doc['end']], n))
+            table = NgramTable(n, ngram_counts)
+            self._top_cache[key] = table
+        return table
+
+    def _index_keys(self, start, end):
+        """Пары (индекс, ключи токенов в диапазоне [start, end)) для всех индексов."""
+        tag_ids = self.tag_ids[start:end]
+        # Ключ индекса префиксов - id строки из первой буквы тега
+        prefix_ids = {tag_id: self.vocab.add(self.vocab[tag_id][:1]) for tag_id in set(tag_ids)}
+        return ((self.token_index, self.token_ids[start:end]),
+                (self.lemma_index, self.lemma_ids[start:end]),
+                (self.tag_index, tag_ids),
+                (self.tag_prefix_index, [prefix_ids[tag_id] for tag_id in tag_ids]))
+
+    def add_document(self, name, tokens, tags, lemmas, spans):
+        """Добавляет документ в конец столбцов (документ с тем же именем предварительно удаляется).
+           tokens, tags, lemmas - последовательности строк одинаковой длины,
+           spans - позиции токенов в тексте [(start, end)] (None - позиция неизвестна).
+           Возвращает doc_id.
+        """
+        if not (len(tokens) == len(tags) == len(lemmas) == len(spans)):
+            raise ValueError(f"Несогласованные данные документа '{name}': "
+                             f"токенов {len(tokens)}, тегов {len(tags)}, лемм {len(lemmas)}, позиций {len(spans)}")
+        if name in self.doc_id_by_name:
+            self.remove_document(name)
+        self.materialize()
+        doc_id = self.next_doc_id
+        self.next_doc_id += 1
+        add = self.vocab.add
+        start = len(self.token_ids)
+        self.token_ids.extend([add(token) for token in tokens])
+        self.tag_ids.extend([add(tag) for tag in tags])
+        self.lemma_ids.extend([add(lemma) for lemma in lemmas])
+        self.doc_ids.extend(array(COLUMN_TYPECODE, [doc_id]) * len(tokens))
+        self.starts.extend([span[0] if span else 0 for span in spans])
+        self.ends.extend([span[1] if span else 0 for span in spans])
+        for index, keys in self._index_keys(start, len(self.token_ids)):
+            index.add_document(doc_id, keys)
+        # Частоты документа и корпуса
+        document_counts = {
+            'tokens': Counter(self.token_ids[start:]),
+            'lemmas': Counter(self.lemma_ids[start:]),
+            'tags': Counter(self.tag_ids[start:]),
+        }
+        for kind in COUNT_KINDS:
+            self.counts[kind].update(document_counts[kind])
+        self.document_counts[doc_id] = document_counts
+        self._top_cache.clear()
+        self.documents[doc_id] = {'name': name, 'start': start, 'end': len(self.token_ids)}
+        self.doc_id_by_name[name] = doc_id
+        return doc_id
+
+    def remove_document(self, name):
+        """Удаляет документ из столбцов и сдвигает диапазоны следующих документов.
+           Возвращает False, если документа нет.
+        """
+        if name not in self.doc_id_by_name:
+            return False
+        self.materialize()
+        doc_id = self.doc_id_by_name.pop(name)
+        doc = self.documents.pop(doc_id)
+        start, end = doc['start'], doc['end']
+        for index, keys in self._index_keys(start, end):
+            index.remove_document(doc_id, keys)
+        document_counts = self.document_counts.pop(doc_id)
+        for kind in COUNT_KINDS:
+            counts = self.counts[kind]
+            for string_id, count in document_counts[kind].items():
+                counts[string_id] -= count
+                if counts[string_id] <= 0:
+                    del counts[string_id]
+        self._top_cache.clear()
+        for column in self._columns():
+            del column[start:end]
+        length = end - start
+        if length:
+            for other in self.documents.values():
+                if other['start'] >= end:
+                    other['start'] -= length
+                    other['end'] -= length
+        return True
+
+    def set_document_spans(self, name, spans):
+        """Заменяет позиции токенов документа в тексте (например, после изменения текста).
+           spans - [(start, end)] по токену документа (None - позиция неизвестна).
+           Возвращает False, если документа нет.
+        """
+        span = self.document_range(name)
+        if span is None:
+            return False
+        start, end = span
+        if len(spans) != end - start:
+            raise ValueError(f"Для документа '{name}' передано позиций {len(spans)}, токенов {end - start}")
+        self.materialize()
+        self.starts[start:end] = array(COLUMN_TYPECODE, [item[0] if item else 0 for item in spans])
+        self.ends[start:end] = array(COLUMN_TYPECODE, [item[1] if item else 0 for item in spans])
+        self._top_cache.clear()
+        return True
+
+    def iter_positions(self, postings):
+        """Переводит вхождения индекса в пары (doc_id, позиция токена в столбцах)."""
+        documents = self.documents
+        doc_id = doc_start = None
+        for posting in postings:
+            if posting >> POSTING_SHIFT != doc_id:
+                doc_id = posting >> POSTING_SHIFT
+                doc_start = documents[doc_id]['start']
+            yield doc_id, doc_start + (posting & POSTING_MASK)
+
+    def most_common(self, kind, top_n=None, name=None):
+        """Самые частые строки [(строка, частота)] по частотной таблице вида kind (см. COUNT_KINDS).
+           name: Имя документа; если не задано, используются частоты по всему корпусу.
+           При равных частотах строки идут в порядке первого появления в корпусе.
+        """
+        key = (kind, top_n, name)
+        result = self._top_cache.get(key)
+        if result is not None:
+            return list(result)
+        if name is not None:
+            doc_id = self.doc_id_by_name.get(name)
+            if doc_id is None:
+                return []
+            # Порядок ключей Counter документа совпадает с порядком первого появления
+            items = self._get_document_counts(doc_id)[kind].most_common(top_n)
+        else:
+            counts = self.counts[kind]
+            index = getattr(self, INDEX_BY_KIND[kind])
+            # Первое вхождение (наименьший элемент списка) задает порядок при равных частотах
+            order = lambda string_id: (-counts[string_id], index.get(string_id)[0])
+            ids = sorted(counts, key=order) if top_n is None else heapq.nsmallest(top_n, counts, key=order)
+            items = [(string_id, counts[string_id]) for string_id in ids]
+        result = [(self.vocab[string_id], count) for string_id, count in items]
+        self._top_cache[key] = result
+        return list(result)
+
+    def _ngram_table(self, kind, n, name):
+        """Частоты n-грамм корпуса или документа name (None, если документа нет)."""
+        if kind not in NGRAM_KINDS or n not in NGRAM_SIZES:
+            raise ValueError(f"Неподдерживаемая таблица n-грамм: {kind}, n={n}")
+        if name is None:
+            return self._get_ngram_counts(kind, n)
+        span = self.document_range(name)
+        if span is None:
+            return None
+        return count_ngrams(getattr(self, NGRAM_KINDS[kind])[span[0]:span[1]], n)
+
+    def most_common_ngrams(self, kind, n, top_n=None, name=None):
+        """Самые частые n-граммы [(кортеж строк, частота)] вида kind (см. NGRAM_KINDS) длины n.
+           name: Имя документа; если не задано, используются частоты по всему корпусу.
+           При равных частотах n-граммы идут в алфавитном порядке.
+        """
+        key = ('ngrams', kind, n, top_n, name)
+        result = self._top_cache.get(key)
+        if result is not None:
+            return list(result)
+        ngram_counts = self._ngram_table(kind, n, name)
+        if ngram_counts is None:
+            return []
+        vocab = self.vocab
+        strings = lambda ngram: tuple(vocab[string_id] for string_id in unpack_ngram(ngram, n))
+        result = [(strings(ngram), count) for ngram, count in top_ngrams(ngram_counts, n, top_n, strings)]
+        self._top_cache[key] = result
+        return list(result)
+
+    def collocations(self, kind, n, measure, top_n=None, name=None, min_count=DEFAULT_MIN_COUNT):
+        """N-граммы с наибольшей мерой связанности [(кортеж строк, значение меры, частота)].
+           measure: Название меры (см. ngrams.ASSOCIATION_MEASURES).
+           name: Имя документа; частоты слов и число токенов берутся по документу.
+           min_count: Минимальная частота n-граммы.
+           При равных значении меры и частоте n-граммы идут в алфавитном порядке.
+        """
+        key = ('collocations', kind, n, measure, top_n, name, min_count)
+        result = self._top_cache.get(key)
+        if result is not None:
+            return list(result)
+        ngram_counts = self._ngram_table(kind, n, name)
+        if ngram_counts is None:
+            return []
+        word_counts, total = self.frequencies(kind, name)
+        vocab = self.vocab
+        strings = lambda ngram: tuple(vocab[string_id] for string_id in unpack_ngram(ngram, n))
+        scored = score_ngrams(ngram_counts, word_counts, total, n, measure, strings, min_count)
+        result = [(strings(ngram), score, count)
+                  for ngram, score, count in (scored if top_n is None else scored[:top_n])]
+        self._top_cache[key] = result
+        return list(result)
+
+    def frequencies(self, kind, name=None):
+        """Частотная таблица вида kind и число токенов: (Counter(id строки), total)
+           по всему корпусу или по документу name (None, если документа нет).
+        """
+        if name is None:
+            return self.counts[kind], len(self)
+        doc_id = self.doc_id_by_name.get(name)
+        if doc_id is None:
+            return None
+        doc = self.documents[doc_id]
+        return self._get_document_counts(doc_id)[kind], doc['end'] - doc['start']
+
+    def collocates(self, postings, kind, window, tag_prefix=None, name=None, min_count=1):
+        """Коллокаты вхождений postings - строки вида kind ('tokens' или 'lemmas') в окне
+           ±window токенов вокруг каждого вхождения (окно не выходит за границы документа).
+           Просматриваются только окна вхождений, поэтому время пропорционально
+           числу вхождений, умноженному на размер окна.
+           tag_prefix: Учитывать только токены окна, POS-тег которых начинается с tag_prefix.
+           name: Имя документа, по которому считаются частоты слов для мер связанности
+                 (postings должны относиться к этому документу).
+           Возвращает [(строка, частота в окнах, {мера: значение})] по убыванию частоты.
+           Меры (см. ngrams.ASSOCIATION_MEASURES) сравнивают частоту в окнах с ожидаемой:
+           общее число позиций окон * частота строки / число токенов.
+        """
+        table = self.frequencies(kind, name)
+        if table is None:
+            return []
+        word_counts, total = table
+        column = getattr(self, COLUMN_BY_KIND[kind])
+        tag_ids = self.tag_ids
+        allowed_tags = None
+        if tag_prefix:
+            allowed_tags = {tag_id for tag_id in self.tag_index.keys() if self.vocab[tag_id].startswith(tag_prefix)}
+        documents = self.documents
+        counts = Counter()
+        window_total = 0 # Сколько позиций во всех окнах (без самих вхождений)
+        doc_id = doc_start = doc_end = None
+        for posting_doc_id, i in self.iter_positions(postings):
+            if posting_doc_id != doc_id:
+                doc_id = posting_doc_id
+                doc_start, doc_end = documents[doc_id]['start'], documents[doc_id]['end']
+            low = max(doc_start, i - window)
+            high = min(doc_end, i + window + 1)
+            window_total += high - low - 1
+            if allowed_tags is None:
+                counts.update(column[low:i])
+                counts.update(column[i + 1:high])
+            else:
+                for j in chain(range(low, i), range(i + 1, high)):
+                    if tag_ids[j] in allowed_tags:
+                        counts[column[j]] += 1
+        vocab = self.vocab
+        result = []
+        for string_id, count in counts.items():
+            if count < min_count:
+                continue
+            frequency = [window_total, word_counts[string_id]]
+            scores = {measure: score(count, frequency, total) for measure, score in ASSOCIATION_MEASURES.items()}
+            result.append((vocab[string_id], count, scores))
+        result.sort(key=lambda item: (-item[1], item[0]))
+        return result
+
+    def phrase_postings(self, index, terms, length):
+        """Вхождения фразы - позиции ее первого токена (doc_id << 32 | позиция в документе).
+           index: Индекс, по которому ищутся слова фразы (token_index или lemma_index).
+           terms: Слова фразы [(смещение от начала фразы, id строки)]; позиции, которых нет
+                  в terms, - пропуски (подходит любой токен).
+           length: Длина фразы в токенах вместе с пропусками.
+           Перебираются вхождения самого редкого слова, остальные слова проверяются двоичным
+           поиском в своих списках вхождений; фраза не выходит за границы документа.
+        """
+        lists = sorted(((index.get(key_id), offset) for offset, key_id in terms), key=lambda item: len(item[0]))
+        (anchor, anchor_offset), others = lists[0], lists[1:]
+        lows = [0] * len(others)
+        documents = self.documents
+        result = array(POSTING_TYPECODE)
+        for posting in anchor:
+            if posting & POSTING_MASK < anchor_offset:
+                continue # Фраза начиналась бы до начала документа
+            start = posting - anchor_offset
+            doc = documents[posting >> POSTING_SHIFT]
+            if (start & POSTING_MASK) + length > doc['end'] - doc['start']:
+                continue
+            # Позиции проверяются по возрастанию, поэтому поиск продолжается с предыдущего места
+            for k, (postings, offset) in enumerate(others):
+                target = start + offset
+                low = lows[k] = bisect_left(postings, target, lows[k])
+                if low == len(postings) or postings[low] != target:
+                    break
+            else:
+                result.append(start)
+        return result
+
+    def _sorted_vocabulary(self, kind):
+        """Различные строки индекса вида kind, отсортированные для поиска по префиксу и суффиксу:
+           (строки, их id, перевернутые строки, их id). Строится при первом обращении
+           после изменения корпуса.
+        """
+        key = ('sorted_vocabulary', kind)
+        result = self._top_cache.get(key)
+        if result is None:
+            vocab = self.vocab
+            key_ids = getattr(self, INDEX_BY_KIND[kind]).keys()
+            forward = sorted((vocab[string_id], string_id) for string_id in key_ids)
+            backward = sorted((vocab[string_id][::-1], string_id) for string_id in key_ids)
+            result = ([string for string, _ in forward], [string_id for _, string_id in forward],
+                      [string for string, _ in backward], [string_id for _, string_id in backward])
+            self._top_cache[key] = result
+        return result
+
+    def match_vocabulary(self, kind, pattern, regex=False):
+        """id различных строк вида kind ('tokens', 'lemmas' или 'tags'), подходящих под шаблон,
+           в алфавитном порядке строк.
+           pattern: Шаблон с символами * ? [...] (как в fnmatch) или регулярное выражение (regex=True,
+                    без учета регистра), которому должна соответствовать вся строка.
+           Шаблон проверяется только на различных строках словаря, а не на каждом вхождении.
+           Если шаблон начинается или заканчивается обычными символами, проверяются только
+           строки с этим префиксом (двоичный поиск в отсортированном словаре) или суффиксом
+           (двоичный поиск в словаре перевернутых строк) - берется меньший из диапазонов.
+           Некорректное регулярное выражение вызывает re.error.
+        """
+        strings, ids, reversed_strings, reversed_ids = self._sorted_vocabulary(kind)
+        if regex:
+            compiled = re.compile(pattern, re.IGNORECASE)
+            candidates = zip(strings, ids)
+        else:
+            compiled = re.compile(fnmatch.translate(pattern))
+            ends = pattern_literal_ends(pattern)
+            if ends is None:
+                # Шаблон без специальных символов - точное совпадение
+                i = bisect_left(strings, pattern)
+                return [ids[i]] if i < len(strings) and strings[i] == pattern else []
+            prefix, suffix = ends
+            suffix = suffix[::-1]
+            low = bisect_left(strings, prefix)
+            high = bisect_left(strings, prefix + MAX_CHAR, low)
+            reversed_low = bisect_left(reversed_strings, suffix)
+            reversed_high = bisect_left(reversed_strings, suffix + MAX_CHAR, reversed_low)
+            if high - low <= reversed_high - reversed_low:
+                candidates = zip(strings[low:high], ids[low:high])
+            else:
+                candidates = ((string[::-1], string_id) for string, string_id
+                              in zip(reversed_strings[reversed_low:reversed_high],
+                                     reversed_ids[reversed_low:reversed_high]))
+        vocab = self.vocab
+        return sorted((string_id for string, string_id in candidates if compiled.fullmatch(string)),
+                      key=lambda string_id: vocab[string_id])
+
+    def merged_postings(self, kind, key_ids):
+        """Объединение списков вхождений строк key_ids индекса вида kind (отсортированный список)."""
+        index = getattr(self, INDEX_BY_KIND[kind])
+        if len(key_ids) == 1:
+            return index.get(key_ids[0])
+        return array(POSTING_TYPECODE, heapq.merge(*(index.get(key_id) for key_id in key_ids)))
+
+    def tag_postings(self, tag_prefix):
+        """Вхождения токенов, POS-тег которых начинается с tag_prefix (как tag.startswith).
+           Если префиксу соответствует целый класс тегов (N*, V*...), используется индекс
+           префиксов, иначе списки вхождений подходящих тегов объединяются.
+        """
+        vocab = self.vocab
+        all_tag_ids = self.tag_index.keys()
+        tag_ids = [tag_id for tag_id in all_tag_ids if vocab[tag_id].startswith(tag_prefix)]
+        if not tag_ids:
+            return array(POSTING_TYPECODE)
+        if len(tag_ids) == 1:
+            return self.tag_index.get(tag_ids[0])
+        prefix_id = vocab.get_id(tag_prefix[:1])
+        coarse_count = sum(1 for tag_id in all_tag_ids if vocab[tag_id][:1] == tag_prefix[:1])
+        if prefix_id is not None and coarse_count == len(tag_ids):
+            return self.tag_prefix_index.get(prefix_id)
+        return array(POSTING_TYPECODE, heapq.merge(*(self.tag_index.get(tag_id) for tag_id in tag_ids)))
+
+    def document_postings(self, postings, name):
+        """Часть списка вхождений, относящаяся к документу name (двоичный поиск по doc_id)."""
+        doc_id = self.doc_id_by_name.get(name)
+        if doc_id is None:
+            return array(POSTING_TYPECODE)
+        start = bisect_left(postings, doc_id << POSTING_SHIFT)
+        return postings[start:bisect_left(postings, (doc_id + 1) << POSTING_SHIFT, start)]
+
+    def document_names(self):
+        """Имена документов в порядке их расположения в столбцах."""
+        return [doc['name'] for doc in sorted(self.documents.values(), key=lambda doc: doc['start'])]
+
+    def document_range(self, name):
+        """Возвращает диапазон позиций (start, end) документа или None."""
+        doc_id = self.doc_id_by_name.get(name)
+        if doc_id is None:
+            return None
+        doc = self.documents[doc_id]
+        return doc['start'], doc['end']
+
+    def document_name_at(self, position):
+        """Имя документа, которому принадлежит токен в позиции position."""
+        return self.documents[self.doc_ids[position]]['name']
+
+    def get_strings(self, column, start=0, end=None):
+        """Возвращает список строк столбца (token_ids, tag_ids или lemma_ids) в диапазоне [start, end)."""
+        vocab = self.vocab
+        return [vocab[string_id] for string_id in column[start:end]]
+
+    def get_document_data(self, name):
+        """Возвращает (tokens, tags, lemmas) документа в виде списков строк."""
+        start, end = self.document_range(name)
+        return (self.get_strings(self.token_ids, start, end),
+                self.get_strings(self.tag_ids, start, end),
+                self.get_strings(self.lemma_ids, start, end))
+
+
+class TokenView(Sequence):
+    """Представление столбцов хранилища в прежнем формате списков кортежей.
+       kind: 'tokens' - (token, filename), 'tagged_tokens' - ((token, tag), filename),
+       'lemmas' - (lemma, filename). Кортежи создаются только при обращении.
+    """
+    def __init__(self, store, kind):
+        self.store = store
+        self.kind = kind
+
+    def __len__(self):
+        return len(self.store)
+
+    def _make(self, position, filename):
+        store = self.store
+        vocab = store.vocab
+        if self.kind == 'tokens':
+            return vocab[store.token_ids[position]], filename
+        if self.kind == 'lemmas':
+            return vocab[store.lemma_ids[position]], filename
+        return (vocab[store.token_ids[position]], vocab[store.tag_ids[position]]), filename
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("индекс токена вне диапазона")
+        return self._make(index, self.store.document_name_at(index))
+
+    def __iter__(self):
+        store = self.store
+        for doc in sorted(store.documents.values(), key=lambda doc: doc['start']):
+            name = doc['name']
+            for position in range(doc['start'], doc['end']):
+                yield self._make(position, name)
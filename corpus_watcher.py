@@ -0,0 +1,72 @@
+import os
+import time
+
+# Наблюдение за директорией корпуса.
+# Директория периодически опрашивается через os.scandir: для каждого поддерживаемого
+# файла запоминается (mtime, size), и изменения определяются сравнением снимков.
+# Чтобы не переиндексировать корпус на каждый шаг копирования пачки файлов,
+# изменения накапливаются и отдаются только после паузы (debounce).
+
+# Пауза без новых изменений, после которой изменения считаются завершенными (в секундах)
+DEFAULT_DEBOUNCE = 2.0
+
+
+class CorpusWatcher:
+    """Отслеживает добавление, изменение и удаление файлов корпуса."""
+    def __init__(self, directory, extensions, debounce=DEFAULT_DEBOUNCE):
+        """directory: Директория корпуса (вложенные директории не просматриваются).
+           extensions: Поддерживаемые расширения файлов (например, (".txt", ".pdf")).
+           debounce: Сколько секунд директория должна оставаться без изменений.
+        """
+        self.directory = directory
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self.debounce = debounce
+        self._snapshot = self.scan()
+        self._pending = set() # Имена файлов, изменившихся с последней выдачи
+        self._last_change = None # Время последнего замеченного изменения
+
+    def scan(self):
+        """Снимок директории: {filename: (mtime_ns, size)} для поддерживаемых файлов."""
+        snapshot = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if not entry.name.lower().endswith(self.extensions):
+                        continue
+                    try:
+                        if not entry.is_file():
+                            continue
+                        stat = entry.stat()
+                    except OSError:
+                        continue # Файл удален между чтением директории и stat
+                    snapshot[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Ошибка при просмотре директории корпуса '{self.directory}': {e}")
+        return snapshot
+
+    def poll(self, now=None):
+        """Проверяет директорию. Возвращает множество измененных (добавленных, измененных
+           или удаленных) файлов, если после последнего изменения прошло не меньше debounce
+           секунд, иначе пустое множество.
+        """
+        now = time.monotonic() if now is None else now
+        snapshot = self.scan()
+        if snapshot != self._snapshot:
+            previous = self._snapshot
+            self._pending.update(name for name in previous.keys() | snapshot.keys()
+                                 if previous.get(name) != snapshot.get(name))
+            self._snapshot = snapshot
+            self._last_change = now
+            return set()
+        if self._pending and now - self._last_change >= self.debounce:
+            changed, self._pending = self._pending, set()
+            return changed
+        return set()
+
+    def reset(self):
+        """Принимает текущее состояние директории как исходное (например, после полной перезагрузки)."""
+        self._snapshot = self.scan()
+        self._pending = set()
+        self._last_change = None
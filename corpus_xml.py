@@ -0,0 +1,119 @@
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+
+# Потоковая запись и чтение корпуса в XML.
+# Документы записываются и читаются по одному, поэтому в памяти одновременно находятся
+# данные только одного документа, а не дерево элементов всего корпуса.
+# Схема совпадает с прежним экспортом:
+# <corpus><files><file name mtime><raw_text/><tokens/><tagged_tokens/><lemmas/></file>...</files></corpus>
+
+# Дополнительные замены при экранировании текста и значений атрибутов
+# (\r иначе потерялся бы при чтении: парсер XML нормализует переводы строк)
+_TEXT_ENTITIES = {'\r': '&#13;'}
+_ATTR_ENTITIES = {'"': '&quot;', '\n': '&#10;', '\r': '&#13;', '\t': '&#9;'}
+
+
+class CorpusXMLError(Exception):
+    """XML файл не соответствует схеме экспорта корпуса."""
+
+
+def _attr(value):
+    """Значение атрибута в кавычках с экранированием."""
+    return '"' + escape(str(value), _ATTR_ENTITIES) + '"'
+
+
+def _text(value):
+    """Текст элемента с экранированием."""
+    return escape(value, _TEXT_ENTITIES)
+
+
+def write_corpus_xml(f, documents, indent="  "):
+    """Записывает корпус в открытый текстовый файл f.
+       documents: Итерируемое (name, mtime, raw_text, data), где data - (tokens, tags, lemmas)
+       или None для файла без токенов.
+       indent: Строка отступа одного уровня; None - без отступов и переводов строк.
+    """
+    newline = "\n" if indent is not None else ""
+    indent = indent or ""
+
+    def line(level, content):
+        return f"{indent * level}{content}{newline}"
+
+    f.write(line(0, '<?xml version="1.0" encoding="utf-8"?>'))
+    f.write(line(0, "<corpus>"))
+    f.write(line(1, "<files>"))
+    for name, mtime, raw_text, data in documents:
+        parts = [line(2, f"<file name={_attr(name)} mtime={_attr(mtime)}>")]
+        parts.append(line(3, f"<raw_text>{_text(raw_text)}</raw_text>" if raw_text else "<raw_text/>"))
+        if data is not None:
+            tokens, tags, lemmas = data
+            parts.append(line(3, "<tokens>"))
+            parts.extend(line(4, f"<token>{_text(token)}</token>") for token in tokens)
+            parts.append(line(3, "</tokens>"))
+            parts.append(line(3, "<tagged_tokens>"))
+            parts.extend(line(4, f"<tagged_token token={_attr(token)} tag={_attr(tag)}/>")
+                         for token, tag in zip(tokens, tags))
+            parts.append(line(3, "</tagged_tokens>"))
+            parts.append(line(3, "<lemmas>"))
+            parts.extend(line(4, f"<lemma>{_text(lemma)}</lemma>") for lemma in lemmas)
+            parts.append(line(3, "</lemmas>"))
+        parts.append(line(2, "</file>"))
+        f.write("".join(parts))
+    f.write(line(1, "</files>"))
+    f.write(line(0, "</corpus>"))
+
+
+def _read_file_element(file_element):
+    """Данные одного элемента <file> в виде словаря (см. iter_corpus_xml)."""
+    raw_text_element = file_element.find("raw_text")
+    tokens_element = file_element.find("tokens")
+    tagged_tokens_element = file_element.find("tagged_tokens")
+    lemmas_element = file_element.find("lemmas")
+    tags = []
+    if tagged_tokens_element is not None:
+        for tagged_token_element in tagged_tokens_element.findall("tagged_token"):
+            token = tagged_token_element.get("token")
+            tag = tagged_token_element.get("tag")
+            if token and tag:
+                tags.append(tag)
+    return {
+        'name': file_element.get("name"),
+        'mtime': file_element.get("mtime"),
+        'raw_text': (raw_text_element.text or "") if raw_text_element is not None else "",
+        'tokens': [element.text for element in tokens_element.findall("token") if element.text]
+                  if tokens_element is not None else [],
+        'tags': tags,
+        'lemmas': [element.text for element in lemmas_element.findall("lemma") if element.text]
+                  if lemmas_element is not None else [],
+    }
+
+
+def iter_corpus_xml(source):
+    """Потоково читает экспорт корпуса (source - путь или открытый бинарный файл).
+       Выдает по словарю {'name', 'mtime', 'raw_text', 'tokens', 'tags', 'lemmas'} на каждый
+       элемент <file>; mtime - строка атрибута или None. После обработки элемент удаляется
+       из дерева, поэтому память ограничена размером одного документа.
+       Если файл не соответствует схеме, выбрасывается CorpusXMLError (ошибки синтаксиса - ET.ParseError).
+    """
+    depth = 0
+    files_element = None
+    in_files = False
+    for event, element in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 1 and element.tag != "corpus":
+                raise CorpusXMLError("корневой элемент не 'corpus'")
+            if depth == 2 and element.tag == "files" and files_element is None:
+                files_element = element
+                in_files = True
+            continue
+
+        depth -= 1
+        if in_files and depth == 2 and element.tag == "file":
+            yield _read_file_element(element)
+            # Прочитанные документы больше не нужны
+            files_element.clear()
+        elif element is files_element:
+            in_files = False
+    if files_element is None:
+        raise CorpusXMLError("не найден элемент 'files'")
@@ -0,0 +1,76 @@
+import os
+import hashlib
+
+# Хранилище текста, извлеченного из PDF/DOCX/RTF.
+# Ключ - хэш содержимого исходного файла, поэтому текст не нужно извлекать
+# повторно, пока байты файла не изменились (даже после удаления кэша
+# обработки или при переименовании файла), а одинаковые файлы извлекаются один раз.
+
+# Размер блока при чтении файла для вычисления хэша
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class ExtractedTextStore:
+    """Хранилище извлеченного текста: по одному файлу <хэш>.txt на исходный документ."""
+    def __init__(self, directory):
+        """directory: Директория хранилища (создается при первой записи)."""
+        self.directory = directory
+
+    @staticmethod
+    def hash_file(filepath):
+        """Возвращает SHA-256 содержимого файла (hex)."""
+        digest = hashlib.sha256()
+        with open(filepath, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _path(self, content_hash):
+        """Путь к файлу с текстом для заданного хэша."""
+        return os.path.join(self.directory, f"{content_hash}.txt")
+
+    def get(self, content_hash):
+        """Возвращает сохраненный текст или None, если его нет в хранилище."""
+        try:
+            with open(self._path(content_hash), 'r', encoding='utf-8', newline='') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Ошибка при чтении извлеченного текста {content_hash}: {e}")
+            return None
+
+    def put(self, content_hash, text):
+        """Сохраняет извлеченный текст. Запись атомарная: сначала во временный файл."""
+        path = self._path(content_hash)
+        tmp_path = path + ".tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # newline='' - текст сохраняется без преобразования переводов строк
+            with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Ошибка при сохранении извлеченного текста {content_hash}: {e}")
+
+    def prune(self, keep_hashes):
+        """Удаляет тексты, хэши которых не входят в keep_hashes (файлы удалены или изменены)."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Ошибка при чтении хранилища извлеченного текста: {e}")
+            return
+        removed = 0
+        for name in names:
+            content_hash, ext = os.path.splitext(name)
+            if ext == ".txt" and content_hash in keep_hashes:
+                continue
+            try:
+                os.remove(os.path.join(self.directory, name))
+                removed += 1
+            except OSError as e:
+                print(f"Не удалось удалить устаревший извлеченный текст {name}: {e}")
+        if removed:
+            print(f"Удалено устаревших извлеченных текстов: {removed}")
@@ -0,0 +1,163 @@
+import math
+import heapq
+from array import array
+from collections import Counter
+
+# Подсчет n-грамм (биграмм и триграмм) по столбцам id хранилища корпуса
+# и меры связанности слов (коллокаций).
+# N-грамма хранится как одно целое число: id слов упаковываются по 32 бита,
+# первое слово - в старших битах. Так таблица частот занимает память только
+# под встретившиеся n-граммы (не больше числа токенов), без матрицы слово x слово.
+# N-граммы не пересекают границы документов.
+# Таблица частот n-грамм всего корпуса хранится компактно (NgramTable): столбцы id слов
+# и столбец частот, без объектов Python на каждую n-грамму.
+
+# Размер поля одного id в упакованной n-грамме (id словаря - 32-битные, см. corpus_store.COLUMN_TYPECODE)
+NGRAM_SHIFT = 32
+NGRAM_MASK = (1 << NGRAM_SHIFT) - 1
+# Тип элементов столбцов NgramTable: беззнаковое 32-битное целое
+NGRAM_TYPECODE = 'I'
+# Поддерживаемые длины n-грамм
+NGRAM_SIZES = (2, 3)
+# Минимальная частота n-граммы для расчета мер связанности
+# (меры вроде PMI завышают оценку редких сочетаний)
+DEFAULT_MIN_COUNT = 3
+
+
+def pack_ngram(ids):
+    """Упаковывает последовательность id в одно число."""
+    key = 0
+    for string_id in ids:
+        key = key << NGRAM_SHIFT | string_id
+    return key
+
+
+def unpack_ngram(key, n):
+    """Последовательность id n-граммы (кортеж длины n)."""
+    return tuple((key >> (NGRAM_SHIFT * (n - 1 - i))) & NGRAM_MASK for i in range(n))
+
+
+def count_ngrams(ids, n):
+    """Частоты n-грамм последовательности id одного документа: Counter(упакованная n-грамма)."""
+    keys = list(ids[:max(0, len(ids) - n + 1)])
+    for i in range(1, n):
+        keys = [key << NGRAM_SHIFT | string_id for key, string_id in zip(keys, ids[i:])]
+    return Counter(keys)
+
+
+class NgramTable:
+    """Компактная таблица частот n-грамм: columns[i] - id i-го слова n-граммы,
+       counts - частоты; строки упорядочены по возрастанию упакованной n-граммы.
+       Занимает 4 * (n + 1) байт на различную n-грамму. Для чтения ведет себя как Counter
+       (len, keys, values, items с упакованными n-граммами), но не изменяется.
+    """
+    def __init__(self, n, ngram_counts=()):
+        self.n = n
+        self.columns = tuple(array(NGRAM_TYPECODE) for _ in range(n))
+        self.counts = array(NGRAM_TYPECODE)
+        for key in sorted(ngram_counts):
+            for column, string_id in zip(self.columns, unpack_ngram(key, n)):
+                column.append(string_id)
+            self.counts.append(ngram_counts[key])
+
+    def __len__(self):
+        return len(self.counts)
+
+    def keys(self):
+        """Упакованные n-граммы (генератор, ключи не хранятся в памяти)."""
+        keys = iter(self.columns[0])
+        for column in self.columns[1:]:
+            keys = (key << NGRAM_SHIFT | string_id for key, string_id in zip(keys, column))
+        return keys
+
+    def values(self):
+        return self.counts
+
+    def items(self):
+        return zip(self.keys(), self.counts)
+
+
+# --- Меры связанности ---
+# count - частота n-граммы, word_counts - частоты ее слов, total - число токенов.
+# Ожидаемая частота при независимости слов: total * произведение (частота слова / total).
+
+def _expected(word_counts, total):
+    expected = float(total)
+    for count in word_counts:
+        expected *= count / total
+    return expected
+
+
+def pmi(count, word_counts, total):
+    """Поточечная взаимная информация: log2(наблюдаемая / ожидаемая частота)."""
+    return math.log2(count / _expected(word_counts, total))
+
+
+def t_score(count, word_counts, total):
+    """t-score: (наблюдаемая - ожидаемая частота) / sqrt(наблюдаемая)."""
+    return (count - _expected(word_counts, total)) / math.sqrt(count)
+
+
+def log_likelihood(count, word_counts, total):
+    """Логарифмическое отношение правдоподобия (G2, Даннинг) по таблице сопряженности 2x2.
+       Для триграмм первые два слова рассматриваются как одно целое: их частота
+       оценивается ожидаемой частотой пары, что дает приближенную оценку.
+    """
+    if len(word_counts) == 2:
+        first, second = word_counts
+    else:
+        first = max(count, _expected(word_counts[:-1], total))
+        second = word_counts[-1]
+    observed = (count, max(first - count, 0), max(second - count, 0),
+                max(total - first - second + count, 0))
+    rows = (observed[0] + observed[1], observed[2] + observed[3])
+    columns = (observed[0] + observed[2], observed[1] + observed[3])
+    result = 0.0
+    for i, value in enumerate(observed):
+        expected = rows[i // 2] * columns[i % 2] / total
+        if value > 0 and expected > 0:
+            result += value * math.log(value / expected)
+    return 2 * result
+
+
+# {название: функция меры}
+ASSOCIATION_MEASURES = {
+    'pmi': pmi,
+    'log_likelihood': log_likelihood,
+    't_score': t_score,
+}
+
+
+def top_ngrams(ngram_counts, n, top_n, sort_key):
+    """Самые частые n-граммы [(key, count)].
+       При равных частотах порядок задает sort_key(key) (например, строки n-граммы).
+    """
+    if top_n is None:
+        candidates = ngram_counts.items()
+    else:
+        if top_n <= 0:
+            return []
+        # Отбираем кандидатов по порогу частоты, чтобы не сортировать всю таблицу
+        threshold = heapq.nlargest(top_n, ngram_counts.values())
+        if not threshold:
+            return []
+        candidates = [(key, count) for key, count in ngram_counts.items() if count >= threshold[-1]]
+    result = sorted(candidates, key=lambda item: (-item[1], sort_key(item[0])))
+    return result if top_n is None else result[:top_n]
+
+
+def score_ngrams(ngram_counts, word_counts, total, n, measure, sort_key, min_count=DEFAULT_MIN_COUNT):
+    """Меры связанности n-грамм [(key, score, count)] по убыванию score, затем частоты.
+       word_counts: Частоты слов {id: частота}; total: число токенов.
+       При равных score и частоте порядок задает sort_key(key) (например, строки n-граммы).
+       Учитываются только n-граммы с частотой не меньше min_count.
+    """
+    score = ASSOCIATION_MEASURES[measure]
+    result = []
+    for key, count in ngram_counts.items():
+        if count < min_count:
+            continue
+        ids = unpack_ngram(key, n)
+        result.append((key, score(count, [word_counts[string_id] for string_id in ids], total), count))
+    result.sort(key=lambda item: (-item[1], -item[2], sort_key(item[0])))
+    return result
@@ -0,0 +1,140 @@
+import io
+import time
+import cProfile
+import pstats
+import threading
+import contextlib
+from collections import defaultdict
+
+# Сбор времени и счетчиков по этапам обработки корпуса.
+# Этапы (извлечение текста, токенизация, теггинг, лемматизация, индексация,
+# чтение и запись кэша) замеряются целиком и по отдельным файлам.
+# Когда профилирование выключено, stage() возвращает общий пустой контекстный
+# менеджер, а count() и record() сразу возвращаются, поэтому накладные расходы -
+# несколько вызовов на файл.
+
+# Сколько функций показывать в отчете cProfile
+PROFILE_TOP_FUNCTIONS = 25
+# Пустой контекстный менеджер для выключенного профилирования
+_NULL_STAGE = contextlib.nullcontext()
+
+
+class Profiler:
+    """Таймеры и счетчики этапов обработки, общие и по файлам."""
+    def __init__(self, enabled=False, profile_calls=False):
+        """enabled: Собирать время и счетчики.
+           profile_calls: Дополнительно запускать cProfile в profiled() (заметно замедляет обработку).
+        """
+        self.enabled = enabled
+        self.profile_calls = profile_calls
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Очищает собранные данные."""
+        with self._lock:
+            self.stage_seconds = defaultdict(float) # {этап: секунды}
+            self.stage_calls = defaultdict(int) # {этап: число замеров}
+            self.counters = defaultdict(int) # {счетчик: значение}
+            self.files = defaultdict(lambda: defaultdict(int)) # {filename: {этап или счетчик: значение}}
+            self.call_profile = None # Текст отчета cProfile последнего profiled()
+
+    def stage(self, name, filename=None):
+        """Контекстный менеджер, замеряющий время этапа name (и файла filename, если задан)."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return self._timed_stage(name, filename)
+
+    @contextlib.contextmanager
+    def _timed_stage(self, name, filename):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started, filename)
+
+    def record(self, name, seconds, filename=None):
+        """Добавляет время этапа, замеренное в другом месте (например, в дочернем процессе)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.stage_seconds[name] += seconds
+            self.stage_calls[name] += 1
+            if filename is not None:
+                self.files[filename][name] += seconds
+
+    def count(self, filename=None, **counters):
+        """Увеличивает счетчики (например, bytes_read=..., tokens=...), общие и файла filename."""
+        if not self.enabled:
+            return
+        with self._lock:
+            for name, value in counters.items():
+                self.counters[name] += value
+                if filename is not None:
+                    self.files[filename][name] += value
+
+    @contextlib.contextmanager
+    def profiled(self, name):
+        """Замеряет этап name целиком; при profile_calls - с отчетом cProfile по вызовам функций.
+           cProfile учитывает только текущий поток (работа дочерних процессов в отчет не попадает).
+        """
+        if not self.enabled:
+            yield
+            return
+        profile = cProfile.Profile() if self.profile_calls else None
+        if profile is not None:
+            try:
+                profile.enable()
+            except ValueError as e:
+                # Уже работает другой профилировщик
+                print(f"Не удалось запустить cProfile: {e}")
+                profile = None
+        try:
+            with self.stage(name):
+                yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                output = io.StringIO()
+                pstats.Stats(profile, stream=output).sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+                self.call_profile = output.getvalue()
+
+    def report(self):
+        """Собранные данные в виде словаря (для JSON)."""
+        with self._lock:
+            return {
+                'stages': {name: {'calls': self.stage_calls[name], 'seconds': round(seconds, 6)}
+                           for name, seconds in self.stage_seconds.items()},
+                'counters': dict(self.counters),
+                'files': {filename: {key: round(value, 6) if isinstance(value, float) else value
+                                     for key, value in values.items()}
+                          for filename, values in self.files.items()},
+                'call_profile': self.call_profile,
+            }
+
+    def format_report(self, top_files=10):
+        """Текстовый отчет: время этапов, счетчики, самые медленные файлы и вывод cProfile."""
+        report = self.report()
+        if not report['stages'] and not report['counters']:
+            return "Данные профилирования отсутствуют (включите профилирование и обработайте корпус)."
+        lines = ["Этапы обработки (время в секундах; этапы обработки файлов в пуле процессов "
+                 "суммируются по процессам):"]
+        for name, stage in sorted(report['stages'].items(), key=lambda item: -item[1]['seconds']):
+            lines.append(f"  {name:<20} {stage['seconds']:>10.3f}   замеров: {stage['calls']}")
+        if report['counters']:
+            lines.append("Счетчики:")
+            for name, value in sorted(report['counters'].items()):
+                lines.append(f"  {name:<20} {value:>12}")
+        stage_names = set(report['stages'])
+        file_times = sorted(((sum(value for key, value in values.items() if key in stage_names), filename)
+                             for filename, values in report['files'].items()), reverse=True)
+        if file_times:
+            lines.append(f"Самые медленные файлы (топ {min(top_files, len(file_times))}):")
+            for seconds, filename in file_times[:top_files]:
+                details = ", ".join(f"{key}={value:.3f}" if isinstance(value, float) else f"{key}={value}"
+                                    for key, value in sorted(report['files'][filename].items()))
+                lines.append(f"  {seconds:>8.3f}  {filename}: {details}")
+        if report['call_profile']:
+            lines.append("cProfile (сортировка по суммарному времени):")
+            lines.append(report['call_profile'])
+        return "\n".join(lines)
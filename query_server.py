@@ -0,0 +1,282 @@
+import sys
+import json
+import time
+import argparse
+import threading
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from corpus_manager import CorpusManager, DEFAULT_RAW_TEXT_BUDGET
+from corpus_cli import DEFAULT_CORPUS_DIR, DEFAULT_NLTK_DATA_DIR, FREQUENCY_KINDS
+
+# Локальный HTTP/JSON сервер запросов к корпусу.
+# Корпус загружается один раз (индексы читаются из кэша через mmap), и несколько
+# пользователей обращаются к нему одновременно вместо того, чтобы каждый запускал
+# свою копию приложения. Используется только стандартная библиотека.
+#
+# Запросы (GET, параметры в строке запроса, ответ - JSON):
+#   /info?word=baked
+#   /concordance?word=bake&width=80&pos=VB&by_lemma=1
+#   /concordance?word=preheat+*+oven - фраза (* - любое слово)
+#   /concordance?word=bak*  или  /concordance?word=bak(e|ed)&regex=1 - шаблон слова
+#   /frequency?kind=wordforms|lemmas|pos&top=20&file=recipe1.txt
+#   /text?file=recipe1.txt
+#   /files
+#   /stats - число запросов и задержки по каждому запросу
+#
+# Пример: python query_server.py --corpus corpus_texts --port 8765 --max-concurrent 8
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Сколько запросов обрабатывается одновременно (остальные ждут свободного места)
+DEFAULT_MAX_CONCURRENT = 8
+# Сколько секунд запрос ждет свободного места, прежде чем получить ответ 503
+DEFAULT_QUEUE_TIMEOUT = 5.0
+# Сколько последних задержек хранится для расчета перцентилей
+LATENCY_WINDOW = 1000
+
+
+class QueryError(Exception):
+    """Некорректный запрос (ответ 400)."""
+
+
+class LatencyStats:
+    """Статистика одного вида запросов: количество, ошибки и задержки."""
+    def __init__(self, window=LATENCY_WINDOW):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._recent = deque(maxlen=window) # Последние задержки - для перцентилей
+        self._lock = threading.Lock()
+
+    def record(self, seconds, error=False):
+        """Учитывает выполненный запрос."""
+        with self._lock:
+            self.count += 1
+            self.errors += bool(error)
+            self.total += seconds
+            self.max = max(self.max, seconds)
+            self._recent.append(seconds)
+
+    def snapshot(self):
+        """Статистика в виде словаря (задержки в миллисекундах)."""
+        with self._lock:
+            recent = sorted(self._recent)
+            count, errors, total, maximum = self.count, self.errors, self.total, self.max
+
+        def percentile(p):
+            return recent[min(len(recent) - 1, int(p * len(recent)))] * 1000 if recent else 0.0
+
+        return {
+            'count': count,
+            'errors': errors,
+            'avg_ms': round(total / count * 1000, 3) if count else 0.0,
+            'p50_ms': round(percentile(0.5), 3),
+            'p95_ms': round(percentile(0.95), 3),
+            'max_ms': round(maximum * 1000, 3),
+        }
+
+
+class QueryServer(ThreadingHTTPServer):
+    """HTTP сервер, обслуживающий запросы к общей модели CorpusManager в отдельных потоках."""
+    daemon_threads = True
+
+    def __init__(self, address, model, max_concurrent=DEFAULT_MAX_CONCURRENT,
+                 queue_timeout=DEFAULT_QUEUE_TIMEOUT, verbose=False):
+        """address: (host, port).
+           model: Загруженный CorpusManager (используется только для чтения).
+           max_concurrent: Максимальное число одновременно выполняемых запросов.
+           queue_timeout: Сколько секунд ждать свободного места до ответа 503.
+           verbose: Печатать строку журнала на каждый запрос.
+        """
+        super().__init__(address, QueryRequestHandler)
+        self.model = model
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self.verbose = verbose
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.stats = {path: LatencyStats() for path in QueryRequestHandler.ENDPOINTS}
+        self.started = time.time()
+        self._counters_lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    def update_counters(self, in_flight=0, rejected=0):
+        """Изменяет счетчики выполняемых и отклоненных запросов."""
+        with self._counters_lock:
+            self.in_flight += in_flight
+            self.rejected += rejected
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов к корпусу."""
+    # {путь: метод обработчика}
+    ENDPOINTS = {
+        '/info': 'handle_info',
+        '/concordance': 'handle_concordance',
+        '/frequency': 'handle_frequency',
+        '/text': 'handle_text',
+        '/files': 'handle_files',
+        '/stats': 'handle_stats',
+    }
+    # Запросы, которые выполняются без ограничения одновременности (не обращаются к корпусу)
+    UNLIMITED = {'/stats'}
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        handler_name = self.ENDPOINTS.get(url.path)
+        if handler_name is None:
+            self._send_json(404, {'error': f"неизвестный запрос '{url.path}'",
+                                  'endpoints': sorted(self.ENDPOINTS)})
+            return
+        params = parse_qs(url.query)
+        server = self.server
+        limited = url.path not in self.UNLIMITED
+        if limited and not server.slots.acquire(timeout=server.queue_timeout):
+            server.update_counters(rejected=1)
+            self._send_json(503, {'error': "сервер перегружен, повторите запрос позже"})
+            return
+        server.update_counters(in_flight=1)
+        started = time.perf_counter()
+        try:
+            status, data = 200, getattr(self, handler_name)(params)
+        except QueryError as e:
+            status, data = 400, {'error': str(e)}
+        except Exception as e:
+            print(f"Ошибка при обработке запроса {self.path}: {e}", file=sys.stderr)
+            status, data = 500, {'error': str(e)}
+        finally:
+            server.update_counters(in_flight=-1)
+            if limited:
+                server.slots.release()
+        server.stats[url.path].record(time.perf_counter() - started, error=status != 200)
+        self._send_json(status, data)
+
+    def _send_json(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    # --- Разбор параметров ---
+    @staticmethod
+    def _param(params, name, default=None, required=False):
+        values = params.get(name)
+        if not values or not values[0]:
+            if required:
+                raise QueryError(f"не задан параметр '{name}'")
+            return default
+        return values[0]
+
+    def _int_param(self, params, name, default):
+        value = self._param(params, name, default)
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise QueryError(f"параметр '{name}' должен быть целым числом")
+        if value < 0:
+            raise QueryError(f"параметр '{name}' не может быть отрицательным")
+        return value
+
+    def _bool_param(self, params, name):
+        return str(self._param(params, name, "")).lower() in ("1", "true", "yes", "on")
+
+    # --- Запросы ---
+    def handle_info(self, params):
+        word = self._param(params, 'word', required=True)
+        return {'word': word, **self.server.model.get_word_info(word)}
+
+    def handle_concordance(self, params):
+        keyword = self._param(params, 'word', required=True)
+        model = self.server.model
+        options = {'width': self._int_param(params, 'width', 80), 'target_pos': self._param(params, 'pos'),
+                   'by_lemma': self._bool_param(params, 'by_lemma')}
+        try:
+            if self._bool_param(params, 'regex'):
+                lines = model.get_pattern_concordance(keyword, regex=True, **options)
+            else:
+                lines = model.get_concordance(keyword, **options)
+        except ValueError as e:
+            raise QueryError(str(e))
+        return {
+            'query': keyword,
+            'count': len(lines),
+            'lines': [{'left': left, 'word': word, 'right': right, 'file': filename}
+                      for left, word, right, filename in lines],
+        }
+
+    def handle_frequency(self, params):
+        kind = self._param(params, 'kind', 'wordforms')
+        if kind not in FREQUENCY_KINDS:
+            raise QueryError(f"параметр 'kind' должен быть одним из: {', '.join(FREQUENCY_KINDS)}")
+        frequency = getattr(self.server.model, FREQUENCY_KINDS[kind])(self._int_param(params, 'top', 20),
+                                                                      self._param(params, 'file'))
+        return {'kind': kind, 'items': [{'item': item, 'count': count} for item, count in frequency]}
+
+    def handle_text(self, params):
+        filename = self._param(params, 'file', required=True)
+        model = self.server.model
+        if filename not in model.raw_texts:
+            raise QueryError(f"файл '{filename}' не найден в корпусе")
+        return {'file': filename, 'text': model.get_raw_text(filename)}
+
+    def handle_files(self, params):
+        return {'files': self.server.model.get_processed_filenames(),
+                'summary': self.server.model.get_corpus_summary()}
+
+    def handle_stats(self, params):
+        server = self.server
+        return {
+            'uptime_seconds': round(time.time() - server.started, 1),
+            'max_concurrent': server.max_concurrent,
+            'in_flight': server.in_flight,
+            'rejected': server.rejected,
+            'endpoints': {path: stats.snapshot() for path, stats in server.stats.items()},
+            'raw_texts': server.model.raw_texts.get_stats(),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Локальный HTTP/JSON сервер запросов к корпусу.")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_DIR,
+                        help=f"Директория корпуса (по умолчанию {DEFAULT_CORPUS_DIR})")
+    parser.add_argument("--nltk-data", default=DEFAULT_NLTK_DATA_DIR, help="Директория данных NLTK")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Адрес (по умолчанию {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Порт (по умолчанию {DEFAULT_PORT})")
+    parser.add_argument("--max-concurrent", type=int, default=DEFAULT_MAX_CONCURRENT,
+                        help="Максимальное число одновременно выполняемых запросов")
+    parser.add_argument("--queue-timeout", type=float, default=DEFAULT_QUEUE_TIMEOUT,
+                        help="Сколько секунд запрос ждет свободного места до ответа 503")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Количество процессов для обработки новых файлов при запуске")
+    parser.add_argument("--raw-text-budget", type=int, default=DEFAULT_RAW_TEXT_BUDGET,
+                        help="Сколько символов исходных текстов держать в памяти")
+    parser.add_argument("--verbose", action="store_true", help="Журнал каждого запроса")
+    args = parser.parse_args(argv)
+
+    model = CorpusManager(args.corpus, args.nltk_data, workers=args.workers,
+                          raw_text_budget=args.raw_text_budget)
+    # Теггер и WordNet загружаются до приема запросов, а не одновременно в нескольких потоках
+    model.warm_up_nltk()
+    server = QueryServer((args.host, args.port), model, max(1, args.max_concurrent),
+                         args.queue_timeout, args.verbose)
+    print(f"Сервер запросов к корпусу: http://{args.host}:{server.server_address[1]}/ "
+          f"(одновременно до {server.max_concurrent} запросов)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Остановка сервера.")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
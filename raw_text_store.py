@@ -0,0 +1,155 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+# Хранилище исходных текстов документов корпуса.
+# Тексты лежат на диске (по файлу на документ), а в памяти держится только
+# ограниченный LRU-кэш недавно прочитанных текстов. Тексты нужны лишь для
+# просмотра файла, конкорданса и экспорта в XML, поэтому держать в памяти
+# весь корпус не требуется.
+
+# Бюджет LRU-кэша по умолчанию (в символах)
+DEFAULT_BUDGET = 16 * 1024 * 1024
+
+
+class RawTextStore(MutableMapping):
+    """Словарь {filename: text}, хранящий тексты на диске и кэширующий их в памяти.
+       Известные имена документов хранятся в памяти, поэтому проверка наличия,
+       перебор имен и len() не обращаются к диску.
+    """
+    def __init__(self, directory, budget=DEFAULT_BUDGET):
+        """directory: Директория хранилища (создается при первой записи).
+           budget: Максимальный суммарный размер текстов в памяти (в символах).
+        """
+        self.directory = directory
+        self.budget = budget
+        self._names = {} # Известные документы в порядке добавления
+        self._lru = OrderedDict() # {filename: text}, последний - самый недавний
+        self._lru_size = 0
+        self.hits = 0
+        self.misses = 0
+        # Хранилище может использоваться из фонового потока перезагрузки
+        self._lock = threading.RLock()
+
+    def _path(self, name):
+        """Путь к файлу с текстом документа (имя файла - хэш имени документа)."""
+        return os.path.join(self.directory, hashlib.sha1(name.encode('utf-8')).hexdigest() + ".txt")
+
+    def _remember(self, name, text):
+        """Помещает текст в LRU-кэш и вытесняет самые давние тексты сверх бюджета."""
+        self._forget(name)
+        if len(text) > self.budget:
+            return # Текст больше бюджета читается с диска при каждом обращении
+        self._lru[name] = text
+        self._lru_size += len(text)
+        while self._lru_size > self.budget:
+            _, evicted = self._lru.popitem(last=False)
+            self._lru_size -= len(evicted)
+
+    def _forget(self, name):
+        """Убирает текст из LRU-кэша."""
+        text = self._lru.pop(name, None)
+        if text is not None:
+            self._lru_size -= len(text)
+
+    def __getitem__(self, name):
+        with self._lock:
+            if name not in self._names:
+                raise KeyError(name)
+            text = self._lru.get(name)
+            if text is not None:
+                self._lru.move_to_end(name)
+                self.hits += 1
+                return text
+            self.misses += 1
+        try:
+            # newline='' - текст читается без преобразования переводов строк
+            with open(self._path(name), 'r', encoding='utf-8', newline='') as f:
+                text = f.read()
+        except FileNotFoundError:
+            print(f"Предупреждение: Текст файла '{name}' отсутствует в хранилище текстов.")
+            raise KeyError(name)
+        with self._lock:
+            if name in self._names:
+                self._remember(name, text)
+        return text
+
+    def __setitem__(self, name, text):
+        path = self._path(name)
+        tmp_path = path + ".tmp"
+        os.makedirs(self.directory, exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._names[name] = None
+            self._remember(name, text)
+
+    def __delitem__(self, name):
+        with self._lock:
+            del self._names[name]
+            self._forget(name)
+        try:
+            os.remove(self._path(name))
+        except FileNotFoundError:
+            pass
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __iter__(self):
+        return iter(list(self._names))
+
+    def __len__(self):
+        return len(self._names)
+
+    def register(self, name):
+        """Отмечает, что текст документа уже сохранен на диске (например, при предыдущем запуске).
+           Возвращает False, если файла с текстом нет.
+        """
+        if not os.path.exists(self._path(name)):
+            return False
+        with self._lock:
+            self._names[name] = None
+        return True
+
+    def clear(self):
+        """Удаляет все тексты (не читая их с диска, в отличие от MutableMapping.clear)."""
+        self.retain(())
+
+    def retain(self, names):
+        """Оставляет только тексты документов names, остальные удаляются с диска."""
+        names = set(names)
+        with self._lock:
+            for name in list(self._names):
+                if name not in names:
+                    del self._names[name]
+                    self._forget(name)
+            keep_files = {os.path.basename(self._path(name)) for name in self._names}
+        try:
+            files = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Ошибка при чтении хранилища текстов: {e}")
+            return
+        for file_name in files:
+            if file_name not in keep_files:
+                try:
+                    os.remove(os.path.join(self.directory, file_name))
+                except OSError as e:
+                    print(f"Не удалось удалить устаревший текст {file_name}: {e}")
+
+    def get_stats(self):
+        """Статистика хранилища: число документов, текстов в памяти, их размер и попадания в кэш."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'documents': len(self._names),
+                'resident_texts': len(self._lru),
+                'resident_chars': self._lru_size,
+                'budget': self.budget,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
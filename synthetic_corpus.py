@@ -0,0 +1,118 @@
+import os
+import sys
+import random
+import argparse
+import itertools
+
+# Генератор синтетических корпусов для замеров производительности (см. benchmark.py).
+# Слова словаря составляются из слогов, их частоты подчиняются закону Ципфа
+# (частота слова ранга r пропорциональна 1 / r^s), как и в реальных текстах.
+# Генерация детерминирована: одинаковые параметры и seed дают одинаковый корпус.
+
+# Слоги для построения слов словаря
+SYLLABLES = ["ba", "ke", "ro", "mi", "sa", "lu", "te", "po", "na", "di", "go", "fe",
+             "ri", "to", "ca", "le", "mo", "su", "pi", "da", "ne", "vo", "chi", "ra"]
+# Длина предложения в словах (минимум, максимум)
+SENTENCE_LENGTH = (6, 18)
+# Предложений в абзаце
+SENTENCES_PER_PARAGRAPH = 5
+
+
+def make_vocabulary(size, rng):
+    """Список из size различных слов (чем раньше в списке, тем чаще слово)."""
+    words = []
+    seen = set()
+    for length in itertools.count(1):
+        candidates = ["".join(parts) for parts in itertools.product(SYLLABLES, repeat=length)]
+        rng.shuffle(candidates)
+        for word in candidates:
+            if word not in seen:
+                seen.add(word)
+                words.append(word)
+                if len(words) == size:
+                    return words
+
+
+def iter_paragraphs(tokens, vocabulary, cum_weights, rng):
+    """Абзацы текста из примерно tokens слов."""
+    remaining = tokens
+    sentences = []
+    while remaining > 0:
+        length = min(remaining, rng.randint(*SENTENCE_LENGTH))
+        words = rng.choices(vocabulary, cum_weights=cum_weights, k=length)
+        sentence = " ".join(words)
+        # Запятые и заглавная буква - чтобы токенизатору было что делить
+        if length > 8:
+            cut = sentence.find(" ", len(sentence) // 2)
+            sentence = sentence[:cut] + "," + sentence[cut:]
+        sentences.append(sentence[:1].upper() + sentence[1:] + ".")
+        remaining -= length
+        if len(sentences) == SENTENCES_PER_PARAGRAPH:
+            yield " ".join(sentences)
+            sentences = []
+    if sentences:
+        yield " ".join(sentences)
+
+
+def _write_docx(path, paragraphs):
+    """Записывает абзацы в DOCX. Возвращает False, если python-docx не установлен."""
+    try:
+        import docx
+    except ImportError:
+        return False
+    document = docx.Document()
+    for paragraph in paragraphs:
+        document.add_paragraph(paragraph)
+    document.save(path)
+    return True
+
+
+def generate_corpus(directory, files=20, tokens_per_file=2000, vocabulary_size=5000, zipf_s=1.1,
+                    docx_fraction=0.0, seed=0):
+    """Создает в directory синтетический корпус.
+       files: Количество файлов.
+       tokens_per_file: Примерное количество слов в файле.
+       vocabulary_size: Размер словаря.
+       zipf_s: Показатель закона Ципфа (больше - сильнее преобладают частые слова).
+       docx_fraction: Доля файлов в формате DOCX (остальные - TXT; без python-docx - все TXT).
+       seed: Начальное значение генератора случайных чисел.
+       Возвращает список имен созданных файлов.
+    """
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(vocabulary_size, rng)
+    cum_weights = list(itertools.accumulate(1.0 / rank ** zipf_s for rank in range(1, vocabulary_size + 1)))
+    os.makedirs(directory, exist_ok=True)
+    docx_files = round(files * docx_fraction)
+    created = []
+    for index in range(files):
+        paragraphs = list(iter_paragraphs(tokens_per_file, vocabulary, cum_weights, rng))
+        name = f"synthetic_{index:05d}"
+        if index < docx_files and _write_docx(os.path.join(directory, name + ".docx"), paragraphs):
+            created.append(name + ".docx")
+            continue
+        with open(os.path.join(directory, name + ".txt"), "w", encoding="utf-8") as f:
+            f.write("\n\n".join(paragraphs))
+        created.append(name + ".txt")
+    if docx_files and not any(name.endswith(".docx") for name in created):
+        print("Предупреждение: python-docx не найден, все файлы созданы в формате TXT.", file=sys.stderr)
+    return created
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Генератор синтетического корпуса.")
+    parser.add_argument("directory", help="Директория для файлов корпуса")
+    parser.add_argument("--files", type=int, default=20, help="Количество файлов")
+    parser.add_argument("--tokens-per-file", type=int, default=2000, help="Примерное количество слов в файле")
+    parser.add_argument("--vocabulary", type=int, default=5000, help="Размер словаря")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Показатель закона Ципфа")
+    parser.add_argument("--docx-fraction", type=float, default=0.0, help="Доля файлов в формате DOCX")
+    parser.add_argument("--seed", type=int, default=0, help="Начальное значение генератора")
+    args = parser.parse_args(argv)
+    created = generate_corpus(args.directory, args.files, args.tokens_per_file, args.vocabulary,
+                              args.zipf, args.docx_fraction, args.seed)
+    print(f"Создано файлов: {len(created)} в {args.directory}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+import shutil
+import tempfile
+import unittest
+from corpus_manager import CorpusManager
+
+# Конкорданс по позициям токенов в тексте, в том числе после редактирования текста.
+# Документы добавляются так же, как при загрузке из XML (без токенизации NLTK).
+
+TEXT = "The baker will bake bread.\nBake it at noon, then bake again."
+TOKENS = ["the", "baker", "will", "bake", "bread", "bake", "it", "at", "noon", "then", "bake", "again"]
+TAGS = ["DT", "NN", "MD", "VB", "NN", "VB", "PRP", "IN", "NN", "RB", "VB", "RB"]
+LEMMAS = ["the", "baker", "will", "bake", "bread", "bake", "it", "at", "noon", "then", "bake", "again"]
+
+
+class ConcordanceTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="corpus_test_")
+        self.model = CorpusManager(self.directory, self.directory + "_nltk")
+        self.model.raw_texts["doc.txt"] = TEXT
+        self.model._add_xml_document("doc.txt", TEXT, TOKENS, TAGS, LEMMAS)
+
+    def tearDown(self):
+        self.model.store.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def assert_lines_match_text(self, lines, text, keyword):
+        """Каждая строка выделяет keyword (без учета регистра) в своем месте текста."""
+        for left, word, right, filename in lines:
+            self.assertEqual(word.lower(), keyword)
+            self.assertEqual(filename, "doc.txt")
+            self.assertIn(' '.join(f"{left[3:]} {word} {right[:-3]}".split()), ' '.join(text.split()))
+
+    def test_every_hit_at_its_own_offset(self):
+        lines = self.model.get_concordance("bake", width=10)
+        self.assertEqual(len(lines), 3) # "baker" не совпадает
+        self.assertEqual(len({line[0] for line in lines}), 3)
+        self.assert_lines_match_text(lines, TEXT, "bake")
+
+    def test_phrase(self):
+        lines = self.model.get_concordance("then bake", width=10)
+        self.assertEqual([line[1] for line in lines], ["then bake"])
+        self.assertEqual(self.model.get_concordance("bake * at", width=10)[0][1], "Bake it at")
+
+    def test_offsets_after_update_raw_text(self):
+        new_text = "Hello! " + TEXT.replace("bread", "fresh bread")
+        self.assertTrue(self.model.update_raw_text("doc.txt", new_text))
+        lines = self.model.get_concordance("bake", width=10)
+        self.assertEqual(len(lines), 3)
+        self.assert_lines_match_text(lines, new_text, "bake")
+        self.assertEqual([line[1] for line in self.model.get_concordance("bread", width=5)], ["bread"])
+        self.assertEqual([line[1] for line in self.model.get_concordance("then bake")], ["then bake"])
+
+    def test_removed_word_is_skipped(self):
+        new_text = TEXT.replace("noon", "night")
+        self.model.update_raw_text("doc.txt", new_text)
+        # Слова нет в новом тексте - строка не строится (а не выдумывается по другой позиции)
+        self.assertEqual(self.model.get_concordance("noon"), [])
+        self.assert_lines_match_text(self.model.get_concordance("bake", width=10), new_text, "bake")
+
+
+if __name__ == "__main__":
+    unittest.main()
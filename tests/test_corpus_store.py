@@ -0,0 +1,117 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from binary_cache import MappedCache, write_cache
+from corpus_store import (CorpusStore, COUNT_KINDS, INDEX_NAMES, NGRAM_KINDS, POSTING_SHIFT, POSTING_MASK)
+from ngrams import NGRAM_SIZES, ASSOCIATION_MEASURES
+
+# Хранилище после добавления и удаления документов по одному и после загрузки
+# из двоичного кэша должно быть неотличимо от построенного заново по тем же документам.
+# Сравниваются строки (а не id, которые зависят от истории словаря).
+
+WORDS = ["bake", "bread", "the", "oven", "at", "noon", "bakes", "baker", "flour", "salt", "water", "hot"]
+TAGS = ["NN", "NNS", "VB", "VBZ", "DT", "IN", "JJ"]
+
+
+def make_document(rng, length):
+    """Случайный документ: (tokens, tags, lemmas, spans)."""
+    tokens = [rng.choice(WORDS) for _ in range(length)]
+    tags = [rng.choice(TAGS) for _ in range(length)]
+    lemmas = [token.rstrip("s") for token in tokens]
+    spans = []
+    position = 0
+    for i, token in enumerate(tokens):
+        # Часть позиций неизвестна
+        spans.append(None if i % 7 == 3 else (position, position + len(token)))
+        position += len(token) + 1
+    return tokens, tags, lemmas, spans
+
+
+def build(documents, names):
+    store = CorpusStore()
+    for name in names:
+        store.add_document(name, *documents[name])
+    return store
+
+
+def snapshot(store):
+    """Состояние хранилища в виде строк."""
+    vocab = store.vocab
+    names = store.document_names()
+    state = {'documents': []}
+    for name in names:
+        start, end = store.document_range(name)
+        state['documents'].append((name, store.get_document_data(name),
+                                   list(store.starts[start:end]), list(store.ends[start:end]),
+                                   [store.document_name_at(position) for position in range(start, end)]))
+    for kind in COUNT_KINDS:
+        state[kind] = {vocab[string_id]: count for string_id, count in store.counts[kind].items()}
+        state[kind, 'top'] = store.most_common(kind)
+        state[kind, 'top3'] = store.most_common(kind, 3)
+        state[kind, 'documents'] = [store.most_common(kind, name=name) for name in names]
+    for index_name in INDEX_NAMES:
+        index = getattr(store, index_name)
+        state[index_name] = {
+            vocab[key_id]: [(store.documents[posting >> POSTING_SHIFT]['name'], posting & POSTING_MASK)
+                            for posting in index.get(key_id)]
+            for key_id in index.keys() if len(index.get(key_id))}
+    for kind in NGRAM_KINDS:
+        for n in NGRAM_SIZES:
+            state[kind, n] = store.most_common_ngrams(kind, n)
+            state[kind, n, 'top'] = store.most_common_ngrams(kind, n, 5)
+            for measure in ASSOCIATION_MEASURES:
+                state[kind, n, measure] = store.collocations(kind, n, measure, min_count=1)
+            state[kind, n, 'documents'] = [store.most_common_ngrams(kind, n, name=name) for name in names]
+    state['patterns'] = [[vocab[string_id] for string_id in store.match_vocabulary('tokens', pattern)]
+                         for pattern in ('bak*', '*s', 'b?ke', '[bs]*')]
+    return state
+
+
+class CorpusStoreTest(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(5)
+        self.documents = {f"doc{i}.txt": make_document(rng, rng.randint(0, 60)) for i in range(6)}
+        self.names = list(self.documents)
+        self.directory = tempfile.mkdtemp(prefix="corpus_store_test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_incremental_equals_rebuild(self):
+        store = build(self.documents, self.names)
+        # Удаление из середины, повторное добавление и замена документа с тем же именем
+        store.remove_document("doc2.txt")
+        store.remove_document("doc0.txt")
+        store.add_document("doc2.txt", *self.documents["doc2.txt"])
+        replacement = make_document(random.Random(7), 25)
+        store.add_document("doc4.txt", *replacement)
+        self.assertFalse(store.remove_document("missing.txt"))
+
+        documents = dict(self.documents, **{"doc4.txt": replacement})
+        expected = build(documents, ["doc1.txt", "doc3.txt", "doc5.txt", "doc2.txt", "doc4.txt"])
+        self.assertEqual(store.document_names(), expected.document_names())
+        self.assertEqual(snapshot(store), snapshot(expected))
+
+    def test_cache_load_equals_fresh_build(self):
+        store = build(self.documents, self.names)
+        expected = snapshot(store)
+        path = os.path.join(self.directory, "cache.bin")
+        meta, sections = store.to_sections()
+        write_cache(path, {'store': meta}, sections)
+
+        mapped = MappedCache(path)
+        loaded = CorpusStore.from_mapped(mapped, mapped.meta['store'])
+        try:
+            self.assertEqual(snapshot(loaded), expected)
+            # Изменение загруженного хранилища копирует данные из файла
+            loaded.remove_document("doc1.txt")
+            store.remove_document("doc1.txt")
+            self.assertEqual(snapshot(loaded), snapshot(store))
+        finally:
+            loaded.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import fnmatch
+import unittest
+from corpus_store import CorpusStore
+
+# Поиск строк словаря по шаблону (CorpusStore.match_vocabulary) должен давать
+# тот же результат, что и fnmatch, при любом положении * ? [...] в шаблоне.
+
+WORDS = ["bake", "baked", "baker", "bakes", "baking", "bike", "cake", "caking", "dog", "drag",
+         "make", "paking", "pog", "]x", "!x", "a[b", "ab", "a]b"]
+PATTERNS = [
+    "bake", "a[b", "nothing",
+    "?ake", "b?ke", "bak?", "?",
+    "*ing", "b*s", "bak*", "*", "*a*",
+    "[bp]aking", "b[ai]ke", "bake[sd]", "[!b]ake", "*[dg]", "b*[a-z]", "[a-c]*[dg]",
+    "[]]x", "[!]]x", "[!!]x", "a[[]b", "?[!a]*",
+]
+
+
+class MatchVocabularyTest(unittest.TestCase):
+    def setUp(self):
+        self.store = CorpusStore()
+        self.store.add_document("doc.txt", WORDS, ["NN"] * len(WORDS), WORDS, [None] * len(WORDS))
+
+    def matches(self, pattern, regex=False):
+        return [self.store.vocab[string_id] for string_id in self.store.match_vocabulary("tokens", pattern, regex)]
+
+    def test_same_as_fnmatch(self):
+        for pattern in PATTERNS:
+            with self.subTest(pattern=pattern):
+                expected = sorted(word for word in WORDS if fnmatch.fnmatchcase(word, pattern))
+                self.assertEqual(self.matches(pattern), expected)
+
+    def test_bracket_class_at_either_end(self):
+        self.assertEqual(self.matches("[bp]aking"), ["baking", "paking"])
+        self.assertEqual(self.matches("*[dg]"), ["baked", "baking", "caking", "dog", "drag", "paking", "pog"])
+        self.assertEqual(self.matches("b*[a-z]"), ["bake", "baked", "baker", "bakes", "baking", "bike"])
+
+    def test_regex(self):
+        self.assertEqual(self.matches("BAK(E|ING)", regex=True), ["bake", "baking"])
+
+
+if __name__ == "__main__":
+    unittest.main()
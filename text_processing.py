@@ -0,0 +1,289 @@
+import os
+import time
+
+# Функции обработки одного текста (токенизация, POS-теггинг, лемматизация).
+# Вынесены на уровень модуля, чтобы их можно было выполнять в дочерних
+# процессах ProcessPoolExecutor: методы CorpusManager для этого не подходят,
+# т.к. пришлось бы передавать в процесс всю модель вместе с корпусом.
+# NLTK импортируется только при первой обработке текста: при запуске с
+# актуальным кэшем он не нужен, а его импорт заметно замедляет старт.
+
+# Пакеты NLTK, необходимые для обработки: (имя пакета, путь ресурса)
+REQUIRED_NLTK_PACKAGES = [
+    ('punkt', 'tokenizers/punkt'),
+    ('averaged_perceptron_tagger', 'taggers/averaged_perceptron_tagger'),
+    ('wordnet', 'corpora/wordnet'),
+]
+
+# Кэш лемм дочернего процесса (создается в init_worker)
+_worker_lemma_cache = None
+
+# Токенизатор слов, который использует word_tokenize (умеет возвращать позиции токенов).
+# Создается при первом использовании (см. _get_word_tokenizer).
+_word_tokenizer = None
+
+
+def ensure_nltk_data(nltk_data_dir):
+    """Добавляет nltk_data_dir в пути поиска NLTK и скачивает туда недостающие пакеты."""
+    import nltk
+    # Указываем NLTK, где искать/хранить данные
+    if nltk_data_dir not in nltk.data.path:
+        nltk.data.path.append(nltk_data_dir)
+        print(f"Добавлен путь к данным NLTK: {nltk_data_dir}")
+    # Создаем директорию, если ее нет
+    os.makedirs(nltk_data_dir, exist_ok=True)
+
+    for package, resource in REQUIRED_NLTK_PACKAGES:
+        try:
+            # Пытаемся найти пакет в указанной директории
+            nltk.data.find(resource, paths=[nltk_data_dir])
+            print(f"Пакет NLTK '{package}' найден.")
+        except LookupError: # Обработка случая, если find не находит пакет
+            print(f"Пакет NLTK '{package}' не найден. Скачивание...")
+            try:
+                # Скачиваем пакет в указанную директорию
+                nltk.download(package, download_dir=nltk_data_dir)
+                print(f"Пакет NLTK '{package}' успешно скачан.")
+            except Exception as download_exception:
+                print(f"Ошибка при скачивании пакета NLTK '{package}': {download_exception}")
+                print("Пожалуйста, проверьте интернет-соединение и права доступа к директории.")
+        except Exception as e:
+            print(f"Непредвиденная ошибка при проверке пакета NLTK '{package}': {e}")
+
+
+def create_lemmatizer():
+    """Создает лемматизатор WordNet (с импортом NLTK)."""
+    from nltk.stem import WordNetLemmatizer
+    return WordNetLemmatizer()
+
+
+def _get_word_tokenizer():
+    """Токенизатор слов NLTK (создается при первом вызове)."""
+    global _word_tokenizer
+    if _word_tokenizer is None:
+        from nltk.tokenize import NLTKWordTokenizer
+        _word_tokenizer = NLTKWordTokenizer()
+    return _word_tokenizer
+
+
+class LemmaCache:
+    """Мемоизация лемматизации по паре (token, wordnet_pos).
+       Текст подчиняется закону Ципфа, поэтому одни и те же пары встречаются
+       очень часто, и WordNet достаточно вызвать один раз для каждой пары.
+    """
+    def __init__(self, lemmatizer=None, table=None, track_delta=False):
+        """lemmatizer: Объект с методом lemmatize(token, pos) (WordNetLemmatizer);
+           None - лемматизатор WordNet создается при первом промахе кэша.
+           table: Ранее сохраненная таблица {(token, wordnet_pos): lemma}.
+           track_delta: Накапливать новые записи для take_delta (нужно только в дочерних процессах).
+        """
+        self.lemmatizer = lemmatizer
+        self.table = dict(table or {})
+        self.hits = 0
+        self.misses = 0
+        self.track_delta = track_delta
+        # Записи и счетчики, накопленные с последнего вызова take_delta
+        self._new_entries = {}
+        self._delta_hits = 0
+        self._delta_misses = 0
+
+    def lemmatize(self, token, wordnet_pos):
+        """Возвращает лемму, обращаясь к лемматизатору только для новых пар."""
+        key = (token, wordnet_pos)
+        lemma = self.table.get(key)
+        if lemma is not None:
+            self.hits += 1
+            self._delta_hits += 1
+            return lemma
+        if self.lemmatizer is None:
+            self.lemmatizer = create_lemmatizer()
+        lemma = self.lemmatizer.lemmatize(token, pos=wordnet_pos)
+        self.table[key] = lemma
+        if self.track_delta:
+            self._new_entries[key] = lemma
+        self.misses += 1
+        self._delta_misses += 1
+        return lemma
+
+    def take_delta(self):
+        """Возвращает (new_entries, hits, misses) с момента предыдущего вызова и сбрасывает их.
+           Используется дочерними процессами, чтобы передать новые записи в основной процесс.
+        """
+        delta = (self._new_entries, self._delta_hits, self._delta_misses)
+        self._new_entries, self._delta_hits, self._delta_misses = {}, 0, 0
+        return delta
+
+    def merge(self, new_entries, hits=0, misses=0):
+        """Добавляет записи и счетчики, полученные от дочернего процесса."""
+        self.table.update(new_entries)
+        self.hits += hits
+        self.misses += misses
+
+    def get_stats(self):
+        """Возвращает статистику кэша: число записей, попаданий, промахов и долю попаданий."""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.table),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+def init_worker(nltk_data_dir, lemma_table=None):
+    """Инициализатор дочернего процесса: путь к данным NLTK и свой кэш лемм.
+       lemma_table: Таблица лемм основного процесса (начальное содержимое кэша).
+    """
+    global _worker_lemma_cache
+    import nltk
+    if nltk_data_dir and nltk_data_dir not in nltk.data.path:
+        nltk.data.path.append(nltk_data_dir)
+    _worker_lemma_cache = LemmaCache(create_lemmatizer(), lemma_table, track_delta=True)
+
+
+def get_wordnet_pos(treebank_tag):
+    """Конвертирует тег Penn Treebank в формат WordNet.
+       Необходимо для корректной лемматизации.
+    """
+    import nltk
+    if treebank_tag.startswith('J'):
+        return nltk.corpus.wordnet.ADJ
+    elif treebank_tag.startswith('V'):
+        return nltk.corpus.wordnet.VERB
+    elif treebank_tag.startswith('N'):
+        return nltk.corpus.wordnet.NOUN
+    elif treebank_tag.startswith('R'):
+        return nltk.corpus.wordnet.ADV
+    else:
+        # По умолчанию считаем существительным
+        return nltk.corpus.wordnet.NOUN
+
+
+def _lowered_offsets(text):
+    """Соответствие позиций text.lower() позициям text.
+       Нужно только если lower() меняет длину текста (например, 'İ' -> 'i̇').
+    """
+    offsets = []
+    for i, char in enumerate(text):
+        offsets.extend([i] * len(char.lower()))
+    offsets.append(len(text))
+    return offsets
+
+
+def align_spans(text, tokens, offset=0):
+    """Находит позиции (start, end) токенов в тексте последовательным поиском.
+       Ищутся только алфавитные токены; для остальных (и не найденных) возвращается None.
+       Используется, когда позиции не получены при токенизации (например, при загрузке из XML).
+    """
+    spans = []
+    cursor = 0
+    for token in tokens:
+        position = text.find(token, cursor) if token.isalpha() else -1
+        if position == -1:
+            spans.append(None)
+            continue
+        cursor = position + len(token)
+        spans.append((offset + position, offset + cursor))
+    return spans
+
+
+def align_lowered_spans(text, tokens):
+    """Позиции токенов, полученных из text.lower(), в исходном тексте text (см. align_spans)."""
+    lowered = text.lower()
+    spans = align_spans(lowered, tokens)
+    if len(lowered) != len(text):
+        offsets = _lowered_offsets(text)
+        spans = [(offsets[span[0]], offsets[span[1]]) if span else None for span in spans]
+    return spans
+
+
+def tokenize_with_spans(text):
+    """Токенизирует текст так же, как word_tokenize(text.lower()), и запоминает позиции токенов.
+       Возвращает список (token, start, end) только для алфавитных токенов;
+       start и end - позиции в исходном тексте text.
+    """
+    from nltk.tokenize import sent_tokenize
+    from nltk.tokenize.util import align_tokens
+    word_tokenizer = _get_word_tokenizer()
+    lowered = text.lower() # Приводим к нижнему регистру сразу
+    # word_tokenize сначала делит текст на предложения, а затем предложения на слова
+    sentences = sent_tokenize(lowered)
+    result = []
+    for sentence, (sentence_start, _) in zip(sentences, align_tokens(sentences, lowered)):
+        try:
+            spans = [(sentence_start + start, sentence_start + end)
+                     for start, end in word_tokenizer.span_tokenize(sentence)]
+            tokens = [lowered[start:end] for start, end in spans]
+        except Exception:
+            # Позиции не удалось сопоставить (например, из-за преобразования кавычек):
+            # ищем слова предложения в тексте по порядку
+            tokens = word_tokenizer.tokenize(sentence)
+            spans = align_spans(sentence, tokens, sentence_start)
+        for token, span in zip(tokens, spans):
+            # Оставляем только слова (алфавитные символы)
+            if span is not None and token.isalpha():
+                result.append((token, span[0], span[1]))
+
+    if len(lowered) != len(text):
+        offsets = _lowered_offsets(text)
+        result = [(token, offsets[start], offsets[end]) for token, start, end in result]
+    return result
+
+
+def process_text(text, lemma_cache, timings=None):
+    """Токенизирует, тегирует и лемматизирует один текст.
+       Возвращает кортеж (tokens, tagged, lemmas, spans) или None, если значимых токенов нет.
+       spans - позиции (start, end) токенов в исходном тексте.
+       timings: Словарь, в который записывается время этапов ('tokenize', 'pos_tag', 'lemmatize');
+       None - время не замеряется.
+    """
+    clock = time.perf_counter if timings is not None else None
+    started = clock() if clock else 0
+    # 1. Токенизация (разбиение на слова и пунктуацию) с запоминанием позиций
+    # 2. Фильтрация (удаление пунктуации): остаются только слова (алфавитные символы)
+    tokenized = tokenize_with_spans(text)
+    if clock:
+        timings['tokenize'] = clock() - started
+
+    if not tokenized:
+        return None # Файл без значимых токенов
+
+    file_tokens_filtered = [token for token, start, end in tokenized]
+    file_spans = [(start, end) for token, start, end in tokenized]
+
+    # 3. POS-теггинг (определение частей речи)
+    # Используем теггер по умолчанию (английский)
+    import nltk
+    started = clock() if clock else 0
+    file_tagged = nltk.pos_tag(file_tokens_filtered)
+    if clock:
+        timings['pos_tag'] = clock() - started
+
+    # 4. Лемматизация (приведение к начальной форме) через кэш лемм
+    started = clock() if clock else 0
+    file_lemmas = [lemma_cache.lemmatize(token, get_wordnet_pos(tag)) for token, tag in file_tagged]
+    if clock:
+        timings['lemmatize'] = clock() - started
+
+    return file_tokens_filtered, file_tagged, file_lemmas, file_spans
+
+
+def process_file(filename, text, lemma_cache=None, timed=False):
+    """Обрабатывает текст одного файла.
+       lemma_cache: Кэш лемм основного процесса; если не задан, используется кэш дочернего процесса.
+       timed: Замерять время этапов обработки (для профилирования).
+       Возвращает (filename, result, error, lemma_delta, timings): result - результат process_text,
+       error - текст ошибки или None, lemma_delta - новые записи кэша лемм и счетчики
+       (см. LemmaCache.take_delta) при обработке в дочернем процессе, иначе None,
+       timings - время этапов {этап: секунды} или None, если timed не задан.
+       Исключения не выбрасываются, чтобы ошибка в одном файле не прерывала обработку
+       остальных (в том числе в пуле процессов).
+    """
+    cache = lemma_cache if lemma_cache is not None else _worker_lemma_cache
+    timings = {} if timed else None
+    try:
+        result, error = process_text(text, cache, timings), None
+    except Exception as e:
+        result, error = None, str(e)
+    lemma_delta = cache.take_delta() if cache is not None and cache.track_delta else None
+    return filename, result, error, lemma_delta, timings
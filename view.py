@@ -58,6 +58,10 @@ class View:
         self.menu_bar.add_cascade(label="Файл", menu=self.file_menu)
         self.file_menu.add_command(label="Добавить файлы в корпус...")
         self.file_menu.add_command(label="Перезагрузить корпус")
+        self.file_menu.add_command(label="Отменить перезагрузку", state="disabled")
+        # Автоматическое обновление корпуса при изменении файлов в директории
+        self.watch_corpus_var = tk.BooleanVar(value=False)
+        self.file_menu.add_checkbutton(label="Следить за директорией корпуса", variable=self.watch_corpus_var)
         # XML Operations
         self.file_menu.add_separator()
         self.file_menu.add_command(label="Загрузить корпус из XML...", state="normal") # Added Load XML
@@ -66,8 +70,17 @@ class View:
         # --- Separator added
         self.file_menu.add_command(label="Сохранить результат как...")
         self.file_menu.add_command(label="Импорт слова из JSON...")
+        self.file_menu.add_command(label="Информация о словах из списка...")
         self.file_menu.add_separator()
         self.file_menu.add_command(label="Выход", command=self.root.quit)
+        # Меню "Сервис"
+        self.tools_menu = Menu(self.menu_bar, tearoff=0)
+        self.menu_bar.add_cascade(label="Сервис", menu=self.tools_menu)
+        self.profiling_var = tk.BooleanVar(value=False)
+        self.profile_calls_var = tk.BooleanVar(value=False)
+        self.tools_menu.add_checkbutton(label="Профилирование обработки", variable=self.profiling_var)
+        self.tools_menu.add_checkbutton(label="Профилирование вызовов (cProfile)", variable=self.profile_calls_var)
+        self.tools_menu.add_command(label="Отчет профилирования")
         # Меню "Помощь"
         self.help_menu = Menu(self.menu_bar, tearoff=0)
         self.menu_bar.add_cascade(label="Помощь", menu=self.help_menu)
@@ -98,7 +111,7 @@ class View:
         # Запрос
         input_query_frame = ttk.Frame(self.input_frame)
         input_query_frame.pack(fill=tk.X, pady=(0, 5))
-        ttk.Label(input_query_frame, text="Запрос (слово):").pack(side=tk.LEFT, padx=(0,5))
+        ttk.Label(input_query_frame, text="Запрос (слово, шаблон bak* или фраза):").pack(side=tk.LEFT, padx=(0,5))
         self.query_entry = ttk.Entry(input_query_frame, width=30)
         self.query_entry.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=5)
         self.query_entry.bind('<Return>', lambda event: self.controller.on_get_info_click() if hasattr(self, 'controller') else None)
@@ -118,6 +131,22 @@ class View:
         self.pos_filter_combobox['values'] = [f"{desc} ({tag})" if tag else desc for desc, tag in POS_OPTIONS]
         self.pos_filter_combobox.current(0) # Выбираем "Любая часть речи" по умолчанию
         self.pos_filter_combobox.pack(side=tk.LEFT, padx=5)
+        # Режим поиска по лемме (все словоформы леммы)
+        self.concordance_by_lemma_var = tk.BooleanVar(value=False)
+        self.concordance_by_lemma_checkbutton = ttk.Checkbutton(pos_filter_frame, text="Искать по лемме",
+                                                                variable=self.concordance_by_lemma_var)
+        self.concordance_by_lemma_checkbutton.pack(side=tk.LEFT, padx=5)
+        # Запрос - регулярное выражение для поиска слов
+        self.query_regex_var = tk.BooleanVar(value=False)
+        self.query_regex_checkbutton = ttk.Checkbutton(pos_filter_frame, text="Рег. выражение",
+                                                       variable=self.query_regex_var)
+        self.query_regex_checkbutton.pack(side=tk.LEFT, padx=5)
+        # Размер окна (токенов слева и справа) для поиска коллокатов; значение по умолчанию задает контроллер
+        ttk.Label(pos_filter_frame, text="Окно коллокатов ±").pack(side=tk.LEFT, padx=(10, 0))
+        self.collocate_window_var = tk.IntVar()
+        self.collocate_window_spinbox = ttk.Spinbox(pos_filter_frame, from_=1, to=20, width=4,
+                                                    textvariable=self.collocate_window_var)
+        self.collocate_window_spinbox.pack(side=tk.LEFT, padx=5)
         # -------------------------------------------
 
         # --- Фрейм для кнопок действий --- 
@@ -132,6 +161,12 @@ class View:
         self.lemma_freq_button.pack(side=tk.LEFT, padx=5)
         self.pos_freq_button = ttk.Button(self.button_frame, text="Част. частей речи")
         self.pos_freq_button.pack(side=tk.LEFT, padx=5)
+        self.ngrams_button = ttk.Button(self.button_frame, text="N-граммы")
+        self.ngrams_button.pack(side=tk.LEFT, padx=5)
+        self.collocates_button = ttk.Button(self.button_frame, text="Коллокаты")
+        self.collocates_button.pack(side=tk.LEFT, padx=5)
+        self.pattern_words_button = ttk.Button(self.button_frame, text="Слова по шаблону")
+        self.pattern_words_button.pack(side=tk.LEFT, padx=5)
         # ---------------------------------
 
         # --- Область вывода результатов --- 
@@ -167,15 +202,24 @@ class View:
         self.wordform_freq_button.config(command=self.controller.on_get_wordform_freq_click)
         self.lemma_freq_button.config(command=self.controller.on_get_lemma_freq_click)
         self.pos_freq_button.config(command=self.controller.on_get_pos_freq_click)
+        self.ngrams_button.config(command=self.controller.on_get_ngrams_click)
+        self.collocates_button.config(command=self.controller.on_get_collocates_click)
+        self.pattern_words_button.config(command=self.controller.on_get_pattern_words_click)
 
         # Привязка меню
         self.file_menu.entryconfig("Добавить файлы в корпус...", command=self.controller.on_add_files)
         self.file_menu.entryconfig("Перезагрузить корпус", command=self.controller.on_reload_corpus)
+        self.file_menu.entryconfig("Отменить перезагрузку", command=self.controller.on_cancel_reload)
+        self.file_menu.entryconfig("Следить за директорией корпуса", command=self.controller.on_toggle_watch_corpus)
         self.file_menu.entryconfig("Сохранить результат как...", command=self.controller.on_save_result)
         self.file_menu.entryconfig("Импорт слова из JSON...", command=self.controller.on_import_word_json)
+        self.file_menu.entryconfig("Информация о словах из списка...", command=self.controller.on_word_list_info)
         # Bind new XML menu items
         self.file_menu.entryconfig("Загрузить корпус из XML...", command=self.controller.on_load_corpus_xml)
         self.file_menu.entryconfig("Сохранить корпус как XML...", command=self.controller.on_save_corpus_xml)
+        self.tools_menu.entryconfig("Профилирование обработки", command=self.controller.on_toggle_profiling)
+        self.tools_menu.entryconfig("Профилирование вызовов (cProfile)", command=self.controller.on_toggle_profiling)
+        self.tools_menu.entryconfig("Отчет профилирования", command=self.controller.on_show_profile_report)
         self.help_menu.entryconfig("О программе", command=self.controller.on_show_about)
 
     def update_corpus_files_list(self, file_list):
@@ -203,6 +247,39 @@ class View:
             return tag
         return None # На всякий случай, если ничего не выбрано
 
+    def get_concordance_by_lemma(self):
+        """Возвращает True, если конкорданс нужно строить по лемме."""
+        return self.concordance_by_lemma_var.get()
+
+    def get_query_regex(self):
+        """Возвращает True, если запрос нужно рассматривать как регулярное выражение."""
+        return self.query_regex_var.get()
+
+    def set_collocate_window(self, window):
+        """Устанавливает размер окна коллокатов."""
+        self.collocate_window_var.set(window)
+
+    def get_collocate_window(self):
+        """Возвращает размер окна коллокатов или None, если введено некорректное значение."""
+        try:
+            window = self.collocate_window_var.get()
+        except tk.TclError:
+            return None
+        return window if window > 0 else None
+
+    def get_profiling_options(self):
+        """Возвращает (enabled, profile_calls) - включено ли профилирование обработки и cProfile."""
+        return self.profiling_var.get(), self.profile_calls_var.get()
+
+    def set_profiling_options(self, enabled, profile_calls):
+        """Устанавливает флажки меню профилирования."""
+        self.profiling_var.set(enabled)
+        self.profile_calls_var.set(profile_calls)
+
+    def get_watch_corpus(self):
+        """Возвращает True, если включено наблюдение за директорией корпуса."""
+        return self.watch_corpus_var.get()
+
     def get_output_text(self):
         """Возвращает весь текст из области вывода."""
         return self.output_text.get(1.0, tk.END)
@@ -257,6 +334,12 @@ class View:
         """Обновляет текст в статус-баре."""
         self.status_bar.config(text=message)
 
+    def set_reload_in_progress(self, in_progress):
+        """Переключает пункты меню перезагрузки: во время перезагрузки доступна только отмена."""
+        self.file_menu.entryconfig("Перезагрузить корпус", state="disabled" if in_progress else "normal")
+        self.file_menu.entryconfig("Загрузить корпус из XML...", state="disabled" if in_progress else "normal")
+        self.file_menu.entryconfig("Отменить перезагрузку", state="normal" if in_progress else "disabled")
+
     def enable_export_button(self):
         """Активирует кнопку Экспорт JSON."""
         self.export_json_button.config(state="normal")
@@ -280,7 +363,9 @@ class View:
 
         # Определяем колбэки
         def on_save(new_text):
-            save_callback(new_text)
+            # save_callback возвращает False, если сохранить нельзя - окно остается открытым
+            if save_callback(new_text) is False:
+                return
             edit_window.destroy()
 
         def on_cancel():